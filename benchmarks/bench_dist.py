@@ -0,0 +1,77 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - micro-benchmark of the toroidal distance           #
+# ---------------------------------------------------------------- #
+"""
+
+Compare the collision test of the original 'dist' (minimum of four square
+roots) with the minimum image 'torus_dist_squared' (no square root), and
+with its batched NumPy version 'torus_dist_squared_batch' (if available).
+
+command line:  python benchmarks/bench_dist.py [number of points]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.world import WORLD_WIDTH, WORLD_HEIGHT, torus_dist_squared
+try:
+    from engine.physics import numpy, torus_dist_squared_batch
+except ImportError:
+    numpy = None
+
+##################################################################
+
+def dist_four_sqrt(p, q):
+    # original 'dist(p, q, curved_space = True)'
+    return min(math.sqrt((p[0] - q[0]) ** 2                    + (p[1] - q[1]) ** 2),
+               math.sqrt((WORLD_WIDTH - abs(p[0] - q[0])) ** 2 + (p[1] - q[1]) ** 2),
+               math.sqrt((p[0] - q[0]) ** 2                    + (WORLD_HEIGHT - abs(p[1] - q[1])) ** 2),
+               math.sqrt((WORLD_WIDTH - abs(p[0] - q[0])) ** 2 + (WORLD_HEIGHT - abs(p[1] - q[1])) ** 2))
+
+def main(n = 10000, repeat = 5):
+    rnd = random.Random(0)
+    points = [(rnd.random() * WORLD_WIDTH, rnd.random() * WORLD_HEIGHT) for i in range(0, n)]
+    center = (WORLD_WIDTH / 2.0, WORLD_HEIGHT / 2.0)
+    radius = 80.0
+    radius_squared = radius * radius
+
+    def old():
+        return sum(1 for p in points if dist_four_sqrt(p, center) <= radius)
+
+    def new():
+        return sum(1 for p in points if torus_dist_squared(p, center) <= radius_squared)
+
+    # both tests must find the same collisions
+    assert old() == new()
+    results = [("dist (4 x sqrt)", min(timeit.repeat(old, number = 1, repeat = repeat))),
+               ("torus_dist_squared", min(timeit.repeat(new, number = 1, repeat = repeat)))]
+
+    if numpy is not None:
+        array = numpy.array(points)
+
+        def batch():
+            return int((torus_dist_squared_batch(array, center) <= radius_squared).sum())
+
+        assert batch() == new()
+        results.append(("torus_dist_squared_batch", min(timeit.repeat(batch, number = 1, repeat = repeat))))
+
+    reference = results[0][1]
+    print("%d collision tests (best of %d)" % (n, repeat))
+    for name, t in results:
+        print("  %-26s %10.3f ms  %8.1f ns/test  x%.1f" % (name, 1000.0 * t, 1e9 * t / n, reference / t))
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,81 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - benchmark of the environments                      #
+# ---------------------------------------------------------------- #
+"""
+
+Throughput (env-steps per second) of engine/env.py with random actions:
+    env          one Env (one world)
+    vec          one VecEnv of 'envs' worlds
+    process      one ProcessVecEnv of 'envs' worlds on 'workers' processes
+The worlds are reset when they finish (episodes of 'max-ticks' ticks at
+most). Each measure is the best of 'repeat' runs of 'steps' steps.
+
+command line:
+    python benchmarks/bench_env.py [--envs 64] [--workers N] [--steps 500] [--repeat 3]
+                                   [--frame-skip 1] [--max-ticks 3600] [--numpy-physics]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy
+
+from engine.env import Env, VecEnv, ProcessVecEnv, ACTIONS
+
+##################################################################
+
+def run(env, num_envs, steps, seed):
+    # return the time of 'steps' steps of random actions
+    actions = numpy.random.RandomState(seed).randint(0, len(ACTIONS), size = (steps, num_envs))
+    env.reset()
+    if isinstance(env, Env):
+        start = default_timer()
+        for step in range(0, steps):
+            observation, reward, terminated, truncated, info = env.step(actions[step, 0])
+            if terminated or truncated:
+                env.reset()
+        return default_timer() - start
+    start = default_timer()
+    for step in range(0, steps):
+        env.step(actions[step])
+    return default_timer() - start
+
+def main(argv):
+    parser = argparse.ArgumentParser(description = "Benchmark of the reinforcement learning environments.")
+    parser.add_argument("--envs", type = int, default = 64, help = "worlds of the vectorized environments")
+    parser.add_argument("--workers", type = int, default = None, help = "processes of ProcessVecEnv (default: all the cores)")
+    parser.add_argument("--steps", type = int, default = 500)
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--frame-skip", type = int, default = 1)
+    parser.add_argument("--max-ticks", type = int, default = 3600)
+    parser.add_argument("--numpy-physics", action = "store_true", help = "use the NumPy rock physics")
+    args = parser.parse_args(argv[1:])
+    workers = args.workers or multiprocessing.cpu_count()
+    options = {"max_ticks": args.max_ticks, "frame_skip": args.frame_skip, "numpy_physics": args.numpy_physics}
+
+    cases = [("env", 1, lambda: Env(0, **options)),
+             ("vec", args.envs, lambda: VecEnv(args.envs, 0, **options)),
+             ("process", args.envs, lambda: ProcessVecEnv(args.envs, workers, 0, **options))]
+    print("%d cores, %d workers, frame skip %d" % (multiprocessing.cpu_count(), workers, args.frame_skip))
+    print("%-8s %6s %14s %14s" % ("case", "envs", "env-steps/s", "us/env-step"))
+    for case, num_envs, make in cases:
+        env = make()
+        try:
+            best = min(run(env, num_envs, args.steps, seed) for seed in range(0, args.repeat))
+        finally:
+            env.close()
+        rate = num_envs * args.steps / best
+        print("%-8s %6d %14.0f %14.1f" % (case, num_envs, rate, 1e6 / rate))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,99 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - benchmark of the binary snapshots                  #
+# ---------------------------------------------------------------- #
+"""
+
+Throughput of engine/snapshot.py on a seeded world of 'entities' entities
+(half rocks, half missiles, see bench_world.make_world), in fixed point
+and exact snapshots:
+    encode      snapshot of the world
+    read        Snapshot of the bytes and all the values of all the columns
+    delta       delta snapshot one frame later (the rocks pulled by the ship)
+    apply       apply_delta of this delta to the first snapshot
+    restore     World.load_state of the snapshot (exact snapshots only)
+
+Each measure is the best of 'repeat' runs. The pure Python columns
+(without NumPy) are measured with --no-numpy.
+
+command line:
+    python benchmarks/bench_snapshot.py [--entities 10000] [--repeat 5] [--no-numpy]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_world import make_world, measure
+from engine import snapshot
+from engine.world import World
+
+##################################################################
+
+def step(world):
+    # one frame of the rocks and missiles (collisions are not needed to move the entities)
+    world.process_sprite_group(world.rock_group)
+    world.process_sprite_group(world.missile_group)
+    world.time += 1.0
+    return world
+
+def run_cases(entities, repeat, exact):
+    # return [(case, milliseconds, bytes)]
+    n = entities // 2
+    keyframe = snapshot.encode(make_world(n), exact)
+    results = [("encode", measure(lambda: make_world(n), lambda world: snapshot.encode(world, exact), repeat), len(keyframe))]
+
+    def read(data):
+        view = snapshot.Snapshot(data)
+        for group, fields in snapshot.GROUPS:
+            for field, kind in fields:
+                view.values(group, field)
+        return
+    results.append(("read", measure(lambda: keyframe, read, repeat), len(keyframe)))
+
+    def setup_delta():
+        world = make_world(n)
+        encoder = snapshot.SnapshotEncoder(exact)
+        encoder.encode(world)
+        return (encoder, step(world))
+    encoder, world = setup_delta()
+    delta = encoder.encode(world)
+    results.append(("delta", measure(setup_delta, lambda state: state[0].encode(state[1]), repeat), len(delta)))
+
+    base = snapshot.Snapshot(keyframe)
+    results.append(("apply", measure(lambda: delta, lambda data: snapshot.apply_delta(base, data), repeat), len(delta)))
+
+    if exact:
+        def setup_restore():
+            world = World()
+            world.sounds = None
+            return world
+        results.append(("restore", measure(setup_restore, lambda world: snapshot.restore(world, keyframe), repeat),
+                        len(keyframe)))
+    return results
+
+def main(argv):
+    parser = argparse.ArgumentParser(description = "Benchmark of the binary snapshots of the world.")
+    parser.add_argument("--entities", type = int, default = 10000, help = "rocks + missiles")
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--no-numpy", action = "store_true", help = "pure Python columns")
+    args = parser.parse_args(argv[1:])
+    if args.no_numpy:
+        snapshot.numpy = None
+
+    print("%d entities, %s columns" % (args.entities, "NumPy" if snapshot.numpy is not None else "pure Python"))
+    print("%-8s %-8s %10s %12s %10s %10s" % ("format", "case", "ms", "entities/s", "bytes", "MB/s"))
+    for exact in (False, True):
+        for case, ms, size in run_cases(args.entities, args.repeat, exact):
+            seconds = max(ms / 1000.0, 1e-9)
+            print("%-8s %-8s %10.2f %12.0f %10d %10.1f" % ("exact" if exact else "fixed", case, ms,
+                                                           args.entities / seconds, size, size / seconds / 1e6))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,232 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - benchmark suite of the world hot paths             #
+# ---------------------------------------------------------------- #
+"""
+
+Time the hot paths of the world (no display) on seeded worlds of 10, 100,
+1.000 and 10.000 rocks and as many missiles:
+    process_rock_collision   rock-rock bounces
+    group_group_collide      missile-rock hits
+    gravity                  Sprite.update of the rocks (RockGroup.update with --numpy)
+    rock_spawner             spawn of one rock (overlap rejection included)
+    hyperspace               one jump (refresh of the distance field included)
+
+Each measure is the best of 'repeat' runs, each run on a fresh world (the
+hot paths change the world they run on). Times are in milliseconds.
+
+The results are written as JSON (--out), and compared with a stored
+baseline (--baseline, for instance benchmarks/baseline.json): a case
+slower than the baseline by more than the threshold is flagged as a
+regression, and the exit code is then 1.
+
+A case (quadratic at worst) is skipped at the next sizes once it takes
+more than 1/100 of the budget, so that a slow case cannot block the suite.
+
+command line:
+    python benchmarks/bench_world.py [--sizes 10,100,1000,10000] [--repeat 5] [--numpy]
+                                     [--out results.json] [--baseline baseline.json] [--threshold 1.25]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import math
+import os
+import platform
+import random
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.world import World, Sprite, WORLD_WIDTH, WORLD_HEIGHT, asteroid_info, missile_info, MISSILE_LIFE
+try:
+    from engine.physics import numpy
+except ImportError:
+    numpy = None
+
+FORMAT_VERSION = 1
+SIZES = (10, 100, 1000, 10000)
+
+##################################################################
+
+def make_world(n, seed = 0, numpy_physics = False, clear_top = False):
+    # return a headless world with 'n' rocks and 'n' missiles (positions drawn from 'seed')
+    # clear_top -> no rock near the top edge (where rock_spawner can always place a rock)
+    world = World()
+    world.sounds = None
+    world.numpy_physics = numpy_physics
+    world.game_init(seed)
+    rnd = random.Random(seed)
+    radius = asteroid_info.get_radius()
+    ship = world.my_ship.get_position()
+    while len(world.rock_group) < n:
+        pos = (rnd.random() * WORLD_WIDTH, rnd.random() * WORLD_HEIGHT)
+        if clear_top and not (2 * radius < pos[1] < WORLD_HEIGHT - 2 * radius):
+            continue
+        # not on the ship (its first collision would clean the area around it)
+        if (pos[0] - ship[0]) ** 2 + (pos[1] - ship[1]) ** 2 < (3 * radius) ** 2:
+            continue
+        vel = (rnd.uniform(-3.0, 3.0), rnd.uniform(-3.0, 3.0))
+        rotation = rnd.uniform(0.25, 1.0) * (2.0 * math.pi / 60.0)
+        world.rock_group.add(Sprite(pos, vel, rotation, 0.0, rotation, asteroid_info))
+    for i in range(0, n):
+        pos = (rnd.random() * WORLD_WIDTH, rnd.random() * WORLD_HEIGHT)
+        angle = rnd.random() * 2.0 * math.pi
+        missile = Sprite(pos, (6.0 * math.cos(angle), 6.0 * math.sin(angle)), 0.0, angle, 0.0, missile_info)
+        missile.age = rnd.random() * MISSILE_LIFE
+        world.missile_group.add(missile)
+    return world
+
+def measure(setup, run, repeat):
+    # best time (milliseconds) of 'repeat' calls of run(setup()) (setup is not timed)
+    best = float('inf')
+    for i in range(0, repeat):
+        state = setup()
+        start = default_timer()
+        run(state)
+        best = min(best, default_timer() - start)
+    return 1000.0 * best
+
+##################################################################
+
+# cases: name -> (setup(n, numpy_physics), run(world))
+
+def setup_default(n, numpy_physics):
+    return make_world(n, numpy_physics = numpy_physics)
+
+def run_rock_collision(world):
+    world.process_rock_collision(world.rock_group)
+    return
+
+def run_group_group_collide(world):
+    world.group_group_collide(world.missile_group, world.rock_group)
+    return
+
+def run_gravity(world):
+    if world.numpy_physics:
+        world.rock_group.update(world.my_ship)
+    else:
+        world.process_sprite_group(world.rock_group)
+    return
+
+def setup_spawner(n, numpy_physics):
+    world = make_world(n, numpy_physics = numpy_physics, clear_top = True)
+    # room for one more rock
+    world.rock_max_number = n + 1
+    return world
+
+def run_spawner(world):
+    world.rock_spawner()
+    return
+
+def setup_hyperspace(n, numpy_physics):
+    world = make_world(n, numpy_physics = numpy_physics)
+    world.score = 1000000
+    return world
+
+def run_hyperspace(world):
+    world.hyperspace(1)
+    return
+
+CASES = collections.OrderedDict([
+    ("process_rock_collision", (setup_default, run_rock_collision)),
+    ("group_group_collide",    (setup_default, run_group_group_collide)),
+    ("gravity",                (setup_default, run_gravity)),
+    ("rock_spawner",           (setup_spawner, run_spawner)),
+    ("hyperspace",             (setup_hyperspace, run_hyperspace))])
+
+##################################################################
+
+def run_suite(sizes = SIZES, repeat = 5, numpy_physics = False, budget = 10.0, cases = None):
+    # return the results: {"results": {case: {size: milliseconds or None (skipped)}}, ...}
+    results = collections.OrderedDict()
+    for name in (cases or CASES):
+        setup, run = CASES[name]
+        results[name] = collections.OrderedDict()
+        skip = False
+        for n in sizes:
+            if skip:
+                results[name][str(n)] = None
+                continue
+            t = measure(lambda: setup(n, numpy_physics), run, repeat)
+            results[name][str(n)] = t
+            skip = (t > 1000.0 * budget / 100.0)
+    return {"version":  FORMAT_VERSION,
+            "python":   platform.python_version(),
+            "platform": platform.platform(),
+            "numpy":    numpy_physics,
+            "repeat":   repeat,
+            "results":  results}
+
+def compare(results, baseline, threshold = 1.25, noise = 0.01):
+    # return the list of regressions (case, size, time, baseline time): cases slower than the
+    # baseline by more than 'threshold' (ratio) and 'noise' (milliseconds)
+    regressions = []
+    for name in results["results"]:
+        for n, t in results["results"][name].items():
+            reference = baseline["results"].get(name, {}).get(n)
+            if t is None or reference is None:
+                continue
+            if t > reference * threshold and t - reference > noise:
+                regressions.append((name, n, t, reference))
+    return regressions
+
+def report(results, baseline = None, regressions = ()):
+    # print the results (and the ratios to the baseline)
+    flagged = set((name, n) for name, n, t, reference in regressions)
+    print("times in ms (best of %d)%s" % (results["repeat"], "  NumPy physics" if results["numpy"] else ""))
+    for name in results["results"]:
+        line = "  %-24s" % name
+        for n, t in results["results"][name].items():
+            if t is None:
+                cell = "%s: skipped" % n
+            else:
+                cell = "%s: %.3f" % (n, t)
+                if baseline is not None:
+                    reference = baseline["results"].get(name, {}).get(n)
+                    if reference:
+                        cell += " (x%.2f%s)" % (t / reference, " REGRESSION" if (name, n) in flagged else "")
+            line += "  %-28s" % cell
+        print(line)
+    return
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog = "python benchmarks/bench_world.py", description = "Benchmark the hot paths of the Asteroids world.")
+    parser.add_argument("--sizes", default = ",".join(str(n) for n in SIZES), help = "numbers of rocks (and missiles)")
+    parser.add_argument("--repeat", type = int, default = 5, help = "runs per measure (the best is kept)")
+    parser.add_argument("--case", action = "append", choices = list(CASES), help = "case to run (default: all)")
+    parser.add_argument("--numpy", action = "store_true", help = "use the NumPy rock physics")
+    parser.add_argument("--budget", type = float, default = 10.0, help = "seconds (a case over 1/100 of it is skipped at the next sizes)")
+    parser.add_argument("--out", help = "write the results to this JSON file")
+    parser.add_argument("--baseline", help = "compare with the results stored in this JSON file")
+    parser.add_argument("--threshold", type = float, default = 1.25, help = "slowdown ratio flagged as a regression")
+    args = parser.parse_args(argv[1:])
+    if args.numpy and numpy is None:
+        parser.error("numpy is not installed")
+
+    sizes = [int(n) for n in args.sizes.split(",")]
+    results = run_suite(sizes, args.repeat, args.numpy, args.budget, args.case)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent = 1)
+    baseline = None
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("version") != FORMAT_VERSION:
+            parser.error("%s: unknown format version" % args.baseline)
+        regressions = compare(results, baseline, args.threshold)
+    report(results, baseline, regressions)
+    if regressions:
+        print("%d regression(s) over x%.2f" % (len(regressions), args.threshold))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,12 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - headless engine                                    #
+# ---------------------------------------------------------------- #
+"""
+
+Simulation core of Asteroids, usable without any canvas or 'simplegui' import.
+
+Asteroids.py is the SimpleGUI front-end: it loads the assets, forwards the
+keyboard events to a World, calls World.step() once per frame and renders
+the World's state.
+
+"""
@@ -0,0 +1,397 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - multi-ship world                                   #
+# ---------------------------------------------------------------- #
+"""
+
+An Arena is a World shared by many ships (one per player), as run by the
+multiplayer server (see engine/server.py).
+
+The rules of the game are those of the World, applied to each player in
+turn: the world's my_ship, missile_group, score, lives, ship_stillness and
+statistics are those of the "active" player (see activate()), so that the
+controls, the hyperspace, the rock spawner, the crash of a ship and the
+scoring of World are used unchanged for every player.
+
+What changes with many ships:
+* the rocks are pulled by all the ships, and the ships pull each other
+  (SHIP_MASS), the distances being measured around the world,
+* the rocks are spawned around each ship (ARENA_ROCKS_PER_SHIP rocks per
+  ship in the world at most),
+* each missile scores for the player who fired it,
+* a player whose lives run out starts a new game at once (its ship is put
+  at a safe place, see place_ship()), so that the arena never ends.
+
+The rocks and missiles are identified by a serial number, given each time
+a sprite is taken from the pool (see TaggedPool): the ids of the entities
+sent to the clients. The explosions of each step are kept in 'events'
+(emptied by the server), and there are no texts (no screen to show them).
+
+The rocks are plain Sprites (no NumPy RockGroup); the gravity of all the
+ships is computed with NumPy when it is installed.
+
+"""
+##################################################################
+
+import collections
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import world as world_module
+from .group import Group
+from .pool import Pool
+from .world import World, Ship, Sprite, ship_info
+
+# rocks in the world per ship (at most)
+ARENA_ROCKS_PER_SHIP = 4
+
+# mass of a ship for the gravity between ships (as heavy as a rock of average spin)
+SHIP_MASS = 0.05
+
+# ship controls of the players (the bounce mode is set by the server)
+ARENA_KEYS = ("space", "up", "left", "right", "h")
+
+# attributes of the world that belong to the active player
+PLAYER_ATTRIBUTES = ("my_ship", "missile_group", "score", "lives", "ship_stillness",
+                     "ship_crashes", "rock_hits", "hyperspace_jumps")
+
+##################################################################
+
+
+# TaggedPool class (each object taken from the pool gets a new serial number)
+class TaggedPool(Pool):
+    def __init__(self, cls):
+        Pool.__init__(self, cls)
+        self.serial = 0
+        # object -> serial number of its current use
+        self.tags = {}
+        return
+
+    def acquire(self, *args):
+        obj = Pool.acquire(self, *args)
+        self.serial += 1
+        self.tags[obj] = self.serial
+        return obj
+
+
+# Player class (state of the world that belongs to one player, see Arena.activate)
+class Player:
+    def __init__(self, ident, ship):
+        self.ident = ident
+        self.my_ship = ship
+        self.missile_group = Group()
+        self.score = 0
+        self.lives = world_module.MAX_LIVES
+        self.ship_stillness = 0.0
+        self.ship_crashes = 0
+        self.rock_hits = 0
+        self.hyperspace_jumps = 0
+        # number of games over
+        self.games = 0
+        return
+
+##################################################################
+
+
+# Arena class
+class Arena(World):
+    def __init__(self, seed = None):
+        World.__init__(self, seed)
+        # the arena is not drawn: no sound, no text
+        self.sounds = None
+        # explosions of the steps since the last call to take_events(): (x, y, scale, sheet)
+        self.events = []
+        return
+
+    def game_init(self, seed = None):
+        # initialize a new arena (without players)
+        self.numpy_physics = False
+        self.sprite_pool = TaggedPool(Sprite)
+        World.game_init(self, seed)
+        # ident -> Player (in order of arrival)
+        self.players = collections.OrderedDict()
+        self.active = None
+        self.next_ident = 1
+        self.rock_max_number = 0
+        return
+
+    def is_over(self):
+        # the arena never ends
+        return False
+
+    def new_text(self, text, line, lifespan):
+        return
+
+    def new_explosion(self, pos, scale, sheet):
+        World.new_explosion(self, pos, scale, sheet)
+        self.events.append((float(pos[0]), float(pos[1]), scale, sheet))
+        return
+
+    def take_events(self):
+        # return (and forget) the explosions of the steps since the last call
+        events = self.events
+        self.events = []
+        return events
+
+    def tag(self, sprite):
+        # id of a rock or a missile
+        return self.sprite_pool.tags.get(sprite, 0)
+
+    ##############################################################
+
+    # players
+
+    def activate(self, player):
+        # make 'player' the active player (None -> no player): its state becomes the state of the world
+        if player is self.active:
+            return
+        if self.active is not None:
+            for name in PLAYER_ATTRIBUTES:
+                setattr(self.active, name, getattr(self, name))
+        if player is not None:
+            for name in PLAYER_ATTRIBUTES:
+                setattr(self, name, getattr(player, name))
+        self.active = player
+        return
+
+    def add_player(self):
+        # add a player (its ship at a safe place) and return it
+        ident = self.next_ident
+        self.next_ident += 1
+        player = Player(ident, Ship([0.0, 0.0], [0, 0], -math.pi / 2.0, ship_info))
+        self.place_ship(player.my_ship)
+        self.players[ident] = player
+        self.rock_max_number = ARENA_ROCKS_PER_SHIP * len(self.players)
+        return player
+
+    def remove_player(self, ident):
+        # remove a player and its missiles
+        player = self.players.pop(ident)
+        if player is self.active:
+            self.activate(None)
+        self.sprite_pool.release_all(player.missile_group)
+        player.missile_group.clear()
+        self.rock_max_number = ARENA_ROCKS_PER_SHIP * len(self.players)
+        return
+
+    def place_ship(self, ship):
+        # put a ship (stopped) at the point of HYPER_GRID the furthest from the rocks and the other ships
+        obstacles = [rock.pos for rock in self.rock_group]
+        obstacles += [player.my_ship.pos for player in self.players.values() if player.my_ship is not ship]
+        if obstacles:
+            self.hyper_field.refresh(obstacles)
+            point = self.hyper_field.points[self.hyper_field.get_safest()[0]]
+            # (the field does not describe the rocks only any more)
+            self.hyper_field.time = None
+        else:
+            point = (world_module.WORLD_WIDTH // 2, world_module.WORLD_HEIGHT // 2)
+        ship.pos = [float(point[0]), float(point[1])]
+        ship.vel = [0.0, 0.0]
+        ship.angle = -math.pi / 2.0
+        ship.angle_vel = 0.0
+        ship.thrust = False
+        return
+
+    def player_input(self, ident, key, flag):
+        # ship control of a player (key in ARENA_KEYS, flag == 1 -> key down / flag == 0 -> key up)
+        if key in ARENA_KEYS and ident in self.players:
+            self.activate(self.players[ident])
+            self.key_inputs[key](flag)
+        return
+
+    def new_games(self):
+        # the players without lives start a new game
+        for player in self.players.values():
+            self.activate(player)
+            if self.lives < 0:
+                player.games += 1
+                self.score = 0
+                self.lives = world_module.MAX_LIVES
+                self.ship_stillness = 0.0
+                self.place_ship(self.my_ship)
+        self.activate(None)
+        return
+
+    ##############################################################
+
+    # world update
+
+    def gravity(self, positions, masses, dt = 1.0):
+        # return the velocity changes [(dvx, dvy)] of the objects at 'positions' (of 'masses') pulled by all
+        # the ships for 'dt' frames (Newtonian gravity, softened closer than a ship radius: the pull falls to 0 at
+        # distance 0, so that a ship does not pull itself)
+        ships = [player.my_ship.pos for player in self.players.values()]
+        if not positions or not ships:
+            return [(0.0, 0.0)] * len(positions)
+        closest = ship_info.get_radius() ** 2
+        width = world_module.WORLD_WIDTH
+        height = world_module.WORLD_HEIGHT
+        gravity_pull = world_module.SHIP_GRAVITY_PULL
+        if numpy is not None:
+            p = numpy.array(positions, dtype = float)
+            d = numpy.array(ships, dtype = float)[None, :, :] - p[:, None, :]
+            # vector to the nearest image of each ship around the world
+            size = numpy.array([width, height], dtype = float)
+            d -= size * numpy.round(d / size)
+            d2 = numpy.maximum(d[:, :, 0] * d[:, :, 0] + d[:, :, 1] * d[:, :, 1], closest)
+            pull = gravity_pull * dt * numpy.array(masses, dtype = float)[:, None] / (d2 * numpy.sqrt(d2))
+            return (d * pull[:, :, None]).sum(axis = 1).tolist()
+        result = []
+        for i in range(0, len(positions)):
+            pos = positions[i]
+            dvx = 0.0
+            dvy = 0.0
+            for ship in ships:
+                dx = (ship[0] - pos[0] + width / 2.0) % width - width / 2.0
+                dy = (ship[1] - pos[1] + height / 2.0) % height - height / 2.0
+                d2 = max(dx * dx + dy * dy, closest)
+                pull = gravity_pull * masses[i] * dt / (d2 * math.sqrt(d2))
+                dvx += dx * pull
+                dvy += dy * pull
+            result.append((dvx, dvy))
+        return result
+
+    def process_rocks(self, dt = 1.0):
+        # Sprite.update of the rocks, pulled by all the ships
+        rocks = list(self.rock_group)
+        pull = self.gravity([rock.pos for rock in rocks], [rock.mass for rock in rocks], dt)
+        width = world_module.WORLD_WIDTH
+        height = world_module.WORLD_HEIGHT
+        for i in range(0, len(rocks)):
+            rock = rocks[i]
+            rock.angle += rock.angle_vel * dt
+            rock.vel[0] += pull[i][0]
+            rock.vel[1] += pull[i][1]
+            rock.pos[0] = (rock.pos[0] + rock.vel[0] * dt) % width
+            rock.pos[1] = (rock.pos[1] + rock.vel[1] * dt) % height
+            rock.age += dt
+        return
+
+    def process_ships(self, dt = 1.0):
+        # the ships pull each other, and move
+        ships = [player.my_ship for player in self.players.values()]
+        pull = self.gravity([ship.pos for ship in ships], [SHIP_MASS] * len(ships), dt)
+        for i in range(0, len(ships)):
+            ships[i].vel[0] += pull[i][0]
+            ships[i].vel[1] += pull[i][1]
+            ships[i].update(dt)
+        return
+
+    def process_ship_collisions(self):
+        # check if the ships have hit a rock (the rocks near each ship are found with the grid)
+        rocks = list(self.rock_group)
+        if not rocks:
+            return
+        grid = self.rock_grid
+        grid.build([rock.pos for rock in rocks])
+        for player in list(self.players.values()):
+            ship = player.my_ship
+            hits = [rocks[j] for j in grid.query(ship.pos) if rocks[j] in self.rock_group and rocks[j].collide(ship)]
+            if hits:
+                self.activate(player)
+                for rock in hits:
+                    # explosion is centered on the rock (as in group_collide)
+                    self.new_explosion(rock.get_position(), 1, 1)
+                    self.rock_group.remove(rock)
+                    self.sprite_pool.release(rock)
+                self.ship_crash()
+        return
+
+    def process_missile_collisions(self, dt = 1.0):
+        # check if the missiles (of all the players) have hit a rock: each hit scores for the player who fired
+        missiles = []
+        owners = []
+        for player in self.players.values():
+            for missile in player.missile_group:
+                missiles.append(missile)
+                owners.append(player)
+        rocks = list(self.rock_group)
+        hits = self.missile_hits(missiles, rocks, [rock.pos for rock in rocks], dt)
+        if not hits:
+            return
+        scores = collections.OrderedDict()
+        for i, j in hits:
+            self.new_explosion(rocks[j].get_position(), 1, 1)
+            self.rock_group.remove(rocks[j])
+            self.sprite_pool.release(rocks[j])
+            owner = owners[i]
+            scores[owner] = scores.get(owner, 0) + 1
+            if missiles[i] in owner.missile_group:
+                owner.missile_group.remove(missiles[i])
+                self.sprite_pool.release(missiles[i])
+        for player in scores:
+            self.activate(player)
+            self.rock_hits += scores[player]
+            self.update_score(50 * scores[player])
+        return
+
+    def step(self, dt = 1.0):
+        # advance the arena by 'dt' frames (same phases as World.step)
+        profiler = self.profiler
+        self.time += dt
+        self.activate(None)
+
+        self.step_effects(dt)
+        if profiler is not None:
+            profiler.lap("effects")
+
+        self.process_rocks(dt)
+        if profiler is not None:
+            profiler.lap("rocks")
+        if self.bounce_mode:
+            self.process_rock_collision(self.rock_group)
+        if profiler is not None:
+            profiler.lap("rock collision")
+
+        for player in self.players.values():
+            self.process_missiles(player.missile_group, dt)
+        if profiler is not None:
+            profiler.lap("missiles")
+
+        self.process_ships(dt)
+        if profiler is not None:
+            profiler.lap("ship")
+
+        self.process_ship_collisions()
+        if profiler is not None:
+            profiler.lap("ship collision")
+
+        self.process_missile_collisions(dt)
+        if profiler is not None:
+            profiler.lap("missile collision")
+
+        self.new_games()
+        if profiler is not None:
+            profiler.lap("new games")
+        return
+
+    def process_missiles(self, group, dt = 1.0):
+        # update the missiles of a group (missiles have no mass: no gravity)
+        dead = []
+        width = world_module.WORLD_WIDTH
+        height = world_module.WORLD_HEIGHT
+        for missile in list(group):
+            missile.pos[0] = (missile.pos[0] + missile.vel[0] * dt) % width
+            missile.pos[1] = (missile.pos[1] + missile.vel[1] * dt) % height
+            missile.age += dt
+            if missile.is_dead():
+                dead.append(missile)
+        group.difference_update(dead)
+        self.sprite_pool.release_all(dead)
+        return
+
+    def rock_spawner(self):
+        # World.rock_spawner for each player (survival bonus, stillness, one rock around its ship)
+        for player in self.players.values():
+            self.activate(player)
+            World.rock_spawner(self)
+        self.activate(None)
+        return
+
+    def get_scores(self):
+        # return {ident: (score, lives)}
+        self.activate(None)
+        return dict((ident, (player.score, player.lives)) for ident, player in self.players.items())
@@ -0,0 +1,118 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - loading of the images and sounds                   #
+# ---------------------------------------------------------------- #
+"""
+
+The assets are named after their path on CodeSkulptor's asset server
+(for instance "lathrop/nebula_blue.png"): asset_url() is the URL given to
+simplegui (CodeSkulptor only loads from URLs), and local_path() is the
+copy of the asset in the _img/ and _snd/ trees of this repository, where
+SimpleGUICS2Pygame looks first (it only downloads the missing assets):
+    _img/commondatastorage.googleapis.com/codeskulptor_assets/lathrop/nebula_blue.png
+
+The images are needed by the first frame: load_images() loads them all at
+once, on a pool of threads (the downloads of the missing assets overlap),
+or one after the other when there are no threads (CodeSkulptor).
+
+The sounds are not needed before they are played (and decoding them is
+most of the loading time: about 0.4 s for the soundtrack alone): sound()
+returns a LazySound, which decodes its sound the first time it is played.
+
+The loaders (simplegui.load_image, simplegui.load_sound) are given by the
+front-end, so that this module does not depend on simplegui.
+
+"""
+##################################################################
+
+import os
+
+ASSET_HOST = "commondatastorage.googleapis.com"
+ASSET_URL = "http://" + ASSET_HOST + "/codeskulptor-assets/"
+
+# root of the repository (parent of the _img/ and _snd/ directories)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_DIR = os.path.join(ROOT, "_img")
+SOUND_DIR = os.path.join(ROOT, "_snd")
+
+# number of images loaded at the same time
+LOAD_THREADS = 4
+
+##################################################################
+
+def asset_url(name):
+    # URL of asset 'name' (for instance "lathrop/nebula_blue.png")
+    return ASSET_URL + name
+
+def local_path(directory, name):
+    # local copy of asset 'name' in 'directory' (IMAGE_DIR or SOUND_DIR)
+    # (SimpleGUICS2Pygame replaces the characters of the URL other than letters, digits, '.', '_' and '/' by '_')
+    return os.path.join(directory, ASSET_HOST, "codeskulptor_assets", *name.replace("-", "_").split("/"))
+
+def load_images(load_image, names):
+    # return {key: image} for names = {key: asset name}, the images being loaded by load_image(url)
+    keys = list(names)
+    urls = [asset_url(names[key]) for key in keys]
+    try:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(min(LOAD_THREADS, len(urls)))
+    except (ImportError, OSError):
+        pool = None
+    if pool is None:
+        images = [load_image(url) for url in urls]
+    else:
+        try:
+            images = pool.map(load_image, urls)
+        finally:
+            pool.close()
+            pool.join()
+    return dict(zip(keys, images))
+
+def sound(load_sound, name):
+    # sound 'name', decoded by load_sound(url) when it is first played
+    return LazySound(load_sound, asset_url(name))
+
+##################################################################
+
+
+# LazySound class
+class LazySound:
+    # same methods as simplegui's sounds
+    def __init__(self, load_sound, url):
+        self.load_sound = load_sound
+        self.url = url
+        self.sound = None
+        self.volume = None
+        return
+
+    def is_loaded(self):
+        return self.sound is not None
+
+    def load(self):
+        # decode the sound (if not yet done)
+        if self.sound is None:
+            self.sound = self.load_sound(self.url)
+            if self.volume is not None:
+                self.sound.set_volume(self.volume)
+        return self.sound
+
+    def play(self):
+        self.load().play()
+        return
+
+    def pause(self):
+        # (a sound never played is not playing)
+        if self.sound is not None:
+            self.sound.pause()
+        return
+
+    def rewind(self):
+        if self.sound is not None:
+            self.sound.rewind()
+        return
+
+    def set_volume(self, volume):
+        # (kept until the sound is decoded)
+        self.volume = volume
+        if self.sound is not None:
+            self.sound.set_volume(volume)
+        return
@@ -0,0 +1,136 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - sound manager                                      #
+# ---------------------------------------------------------------- #
+"""
+
+The world only records the names of its sounds (see World.play_sound):
+the front-end hands them to the SoundManager, which starts them once per
+frame, in update().
+
+A burst of sounds (a ship crash cleaning the area around the ship, heavy
+fire) does not flood the mixer:
+* each sound has a minimum time between two starts: the starts in between
+  are dropped (within one frame, they would only play the same sound
+  several times over itself),
+* at most 'voices' sounds play at the same time (some mixer channels are
+  left to the soundtrack and the thrust), each sound using at most
+  'copies' of them. When all the voices are busy, a new sound replaces the
+  oldest sound of the lowest priority, unless this priority is higher than
+  its own (the sound is then dropped).
+
+A sound object (simplegui's sound: play, pause, rewind, set_volume) plays
+one voice at a time: the manager loads a copy of the sound for each voice
+of this sound, with load(name). The length of the sounds (when their
+voice is free again) is set in SOUND_SETTINGS, as simplegui cannot tell
+when a sound is over.
+
+The looping sounds (thrust) are not voices: set_loop(name, on) is called
+at each frame, and the sound is only played or stopped when 'on' changes.
+
+"""
+##################################################################
+
+# name -> (priority, minimum time between two starts (seconds), length (seconds), volume)
+SOUND_SETTINGS = {"missile":   (1, 0.05, 0.25, 0.5),
+                  "explosion": (2, 0.08, 0.9, 1.0)}
+
+# voices playing at the same time (pygame's mixer has 8 channels: 2 are left to the soundtrack and the thrust)
+MAX_VOICES = 6
+# voices of the same sound
+MAX_COPIES = 3
+
+##################################################################
+
+
+# SoundManager class
+class SoundManager:
+    def __init__(self, load, settings = SOUND_SETTINGS, voices = MAX_VOICES, copies = MAX_COPIES):
+        # load(name): new sound object of sound 'name'
+        self.load = load
+        self.settings = settings
+        self.max_voices = voices
+        self.max_copies = copies
+        # sounds to be started at the next update
+        self.queue = []
+        # name -> loaded copies of the sound
+        self.copies = {}
+        # voices playing: [end time, priority, name, sound object]
+        self.voices = []
+        # name -> time of the last start
+        self.last_start = {}
+        # looping sounds: name -> sound object / name -> playing
+        self.loops = {}
+        self.loop_on = {}
+        # statistics
+        self.played = 0
+        self.dropped = 0
+        return
+
+    def play(self, name):
+        # start sound 'name' at the next update
+        self.queue.append(name)
+        return
+
+    def set_loop(self, name, on):
+        # play (on == True) or stop the looping sound 'name' (only if it changes)
+        if on != self.loop_on.get(name, False):
+            if name not in self.loops:
+                self.loops[name] = self.load(name)
+            if on:
+                self.loops[name].play()
+            else:
+                self.loops[name].pause()
+                self.loops[name].rewind()
+            self.loop_on[name] = on
+        return
+
+    def update(self, now):
+        # start the sounds queued since the last update ('now': time in seconds)
+        if self.queue:
+            # free the voices of the sounds over
+            self.voices = [voice for voice in self.voices if voice[0] > now]
+            for name in self.queue:
+                self.start(name, now)
+            del self.queue[:]
+        return
+
+    def start(self, name, now):
+        # start sound 'name' on a voice (if not too soon after its last start, and if a voice can be found)
+        priority, interval, length, volume = self.settings[name]
+        if name in self.last_start and now - self.last_start[name] < interval:
+            self.dropped += 1
+            return
+        same = [voice for voice in self.voices if voice[2] == name]
+        if len(same) >= self.max_copies:
+            # all the copies of the sound are playing: the oldest one is started again
+            voice = min(same, key = lambda voice: voice[0])
+            self.voices.remove(voice)
+            sound = voice[3]
+        else:
+            if len(self.voices) >= self.max_voices:
+                # replace the oldest sound of the lowest priority
+                victim = min(self.voices, key = lambda voice: (voice[1], voice[0]))
+                if victim[1] > priority:
+                    self.dropped += 1
+                    return
+                victim[3].rewind()
+                self.voices.remove(victim)
+            sound = self.free_copy(name, same)
+        sound.rewind()
+        sound.play()
+        self.voices.append([now + length, priority, name, sound])
+        self.last_start[name] = now
+        self.played += 1
+        return
+
+    def free_copy(self, name, playing):
+        # a copy of sound 'name' not in the voices 'playing' (loaded if needed)
+        copies = self.copies.setdefault(name, [])
+        busy = [voice[3] for voice in playing]
+        for sound in copies:
+            if not any(b is sound for b in busy):
+                return sound
+        sound = self.load(name)
+        sound.set_volume(self.settings[name][3])
+        copies.append(sound)
+        return sound
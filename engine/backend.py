@@ -0,0 +1,110 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - private parts of SimpleGUICS2Pygame                #
+# ---------------------------------------------------------------- #
+"""
+
+The front-end only uses simplegui's public API, except for a few speed-ups
+which need private attributes of SimpleGUICS2Pygame. They are all here,
+written against SimpleGUICS2Pygame 2.1.0:
+    Canvas(None, width, height), Canvas._pygame_surface
+                        offscreen layers (new_layer, draw_layer, clear_layer)
+    Image._dir_search_first, Sound._dir_search_first
+                        local _img/ and _snd/ trees (set_media_dirs)
+    Image._pygame_surface
+                        images in the pixel format of the display (convert_image)
+    Frame._set_canvas_background_image
+                        image drawn instead of the background color (set_background_image)
+
+Backend(simplegui) only uses them with a SimpleGUICS2Pygame of the same
+major version (SUPPORTED_MAJOR) whose classes still have these attributes.
+Otherwise the methods do nothing and return False (or None for new_layer),
+and the front-end falls back to plain draw_image and draw_text.
+
+"""
+##################################################################
+
+# version of SimpleGUICS2Pygame this module was written against, and the major version accepted
+WRITTEN_AGAINST = "2.1.0"
+SUPPORTED_MAJOR = 2
+
+##################################################################
+
+def simpleguics2pygame_version(simplegui):
+    # version (tuple of ints) of the SimpleGUICS2Pygame which provides 'simplegui', None if it is not SimpleGUICS2Pygame
+    if not getattr(simplegui, "__name__", "").startswith("SimpleGUICS2Pygame"):
+        return None
+    try:
+        import SimpleGUICS2Pygame
+        return tuple(int(part) for part in SimpleGUICS2Pygame._VERSION.split(".")[:3])
+    except (ImportError, AttributeError, ValueError):
+        return None
+
+
+# Backend class
+class Backend:
+    def __init__(self, simplegui):
+        self.simplegui = simplegui
+        self.version = simpleguics2pygame_version(simplegui)
+        self.pygame = None
+        if self.version is not None and self.version[0] == SUPPORTED_MAJOR:
+            try:
+                import pygame
+                self.pygame = pygame
+            except ImportError:
+                pass
+        # the private parts can be used
+        self.enabled = (self.pygame is not None)
+        return
+
+    def set_media_dirs(self, image_dir, sound_dir):
+        # look for the images in 'image_dir' and the sounds in 'sound_dir' before downloading them
+        image = getattr(self.simplegui, "Image", None)
+        sound = getattr(self.simplegui, "Sound", None)
+        if not self.enabled or not hasattr(image, "_dir_search_first") or not hasattr(sound, "_dir_search_first"):
+            return False
+        image._dir_search_first = image_dir
+        sound._dir_search_first = sound_dir
+        return True
+
+    def new_layer(self, width, height):
+        # return a transparent offscreen canvas (None if there are no offscreen canvases)
+        if not self.enabled or not hasattr(self.simplegui, "Canvas"):
+            return None
+        try:
+            layer = self.simplegui.Canvas(None, width, height)
+        except TypeError:
+            return None
+        if not hasattr(layer, "_pygame_surface"):
+            return None
+        layer._pygame_surface = self.pygame.Surface((width, height), self.pygame.SRCALPHA)
+        return layer
+
+    def clear_layer(self, layer):
+        # make an offscreen canvas (see new_layer) transparent again
+        layer._pygame_surface.fill((0, 0, 0, 0))
+        return True
+
+    def draw_layer(self, canvas, layer, pos):
+        # draw an offscreen canvas (see new_layer), its top left corner at 'pos'
+        canvas._pygame_surface.blit(layer._pygame_surface, pos)
+        return True
+
+    def convert_image(self, image):
+        # convert an image to the pixel format of the display (once the frame exists)
+        # SimpleGUICS2Pygame keeps the images as loaded: an image in another pixel format than the canvas is
+        # converted pixel by pixel each time it is drawn (about 15 times slower for a full canvas image)
+        surface = getattr(image, "_pygame_surface", None)
+        if not self.enabled or surface is None:
+            return False
+        if surface.get_alpha() is not None or surface.get_flags() & self.pygame.SRCALPHA:
+            image._pygame_surface = surface.convert_alpha()
+        else:
+            image._pygame_surface = surface.convert()
+        return True
+
+    def set_background_image(self, frame, image):
+        # draw 'image' (which covers the whole canvas) instead of filling the canvas with the background color
+        if not self.enabled or not hasattr(frame, "_set_canvas_background_image"):
+            return False
+        frame._set_canvas_background_image(image)
+        return True
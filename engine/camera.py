@@ -0,0 +1,97 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - view of the world on the canvas                    #
+# ---------------------------------------------------------------- #
+"""
+
+The world (WORLD_WIDTH x WORLD_HEIGHT) can be larger than the canvas
+(WIDTH x HEIGHT): the Camera follows the ship, and only the objects within
+the view are drawn (the world itself, physics and collisions included, is
+updated everywhere).
+
+The view is centered on view_center(ship) (see engine/world.py): along a
+dimension where the world has the size of the canvas, the view does not
+scroll, and an object at 'pos' is drawn at 'pos' (as before the world
+could be larger). Along the other dimensions, an object is drawn at its
+offset from the center of the view, measured around the world (the
+nearest of its images: a rock just across the connected sides is drawn
+next to the ship).
+
+cull() returns the sprites of a group within the view (the sprites beyond
+'margin' of the canvas are not drawn) and their positions on the canvas.
+The rocks kept in NumPy arrays (see engine/physics.py) are culled all at
+once.
+
+"""
+##################################################################
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import world as world_module
+from .world import view_center
+
+##################################################################
+
+
+# Camera class
+class Camera:
+    def __init__(self):
+        # size of the world and of the view (the constants of engine/world.py when the camera is created)
+        self.world_size = (world_module.WORLD_WIDTH, world_module.WORLD_HEIGHT)
+        self.view_size = (world_module.WIDTH, world_module.HEIGHT)
+        self.center = view_center((self.world_size[0] / 2.0, self.world_size[1] / 2.0))
+        # the view scrolls along x / along y
+        self.scroll = (self.world_size[0] > self.view_size[0], self.world_size[1] > self.view_size[1])
+        return
+
+    def follow(self, pos):
+        # center the view on the point 'pos' (see view_center)
+        self.center = view_center(pos)
+        return
+
+    def to_screen(self, pos):
+        # position on the canvas of the point 'pos' of the world
+        x = pos[0]
+        y = pos[1]
+        if self.scroll[0]:
+            world = self.world_size[0]
+            x = (x - self.center[0] + world / 2.0) % world + (self.view_size[0] - world) / 2.0
+        if self.scroll[1]:
+            world = self.world_size[1]
+            y = (y - self.center[1] + world / 2.0) % world + (self.view_size[1] - world) / 2.0
+        return (x, y)
+
+    def cull(self, group, margin):
+        # return the list of (sprite, position on the canvas) of the sprites of 'group' that can be seen
+        # (margin: size of a sprite from its center)
+        if numpy is not None and hasattr(group, "positions") and hasattr(group, "views"):
+            return self.cull_arrays(group, margin)
+        result = []
+        low_x = -margin
+        low_y = -margin
+        high_x = self.view_size[0] + margin
+        high_y = self.view_size[1] + margin
+        to_screen = self.to_screen
+        for sprite in list(group):
+            screen = to_screen(sprite.pos)
+            if low_x <= screen[0] <= high_x and low_y <= screen[1] <= high_y:
+                result.append((sprite, screen))
+        return result
+
+    def cull_arrays(self, group, margin):
+        # cull() of a RockGroup (engine/physics.py): the positions of all the rocks are converted at once
+        positions = group.positions()
+        if len(positions) == 0:
+            return []
+        screen = positions.copy()
+        for axis in (0, 1):
+            world = self.world_size[axis]
+            view = self.view_size[axis]
+            if self.scroll[axis]:
+                screen[:, axis] = (screen[:, axis] - self.center[axis] + world / 2.0) % world + (view - world) / 2.0
+        visible = ((screen[:, 0] >= -margin) & (screen[:, 0] <= self.view_size[0] + margin) &
+                   (screen[:, 1] >= -margin) & (screen[:, 1] <= self.view_size[1] + margin))
+        views = group.views
+        return [(views[i], (screen[i, 0], screen[i, 1])) for i in numpy.nonzero(visible)[0]]
@@ -0,0 +1,75 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - batched explosions                                 #
+# ---------------------------------------------------------------- #
+"""
+
+All the explosions of the world are kept in flat lists (one list per
+attribute: x, y, scale, sheet, age) instead of one object per explosion in
+a group: a chain reaction (a ship crash cleaning the area around the ship)
+adds hundreds of explosions without creating any object.
+
+update() ages all the explosions and removes the dead ones in one pass:
+the live explosions are moved down over the dead ones (keeping their
+order) and the lists are cut once at the end.
+
+Explosion i is drawn from (x[i], y[i]), at scale[i], from spritesheet
+sheet[i] (1 -> standard explosion / 2 -> explosion of rocks cleaned around
+the ship), frame int(age[i]) of the spritesheet.
+
+"""
+##################################################################
+
+
+# ExplosionBatch class
+class ExplosionBatch:
+    def __init__(self, info):
+        # all the explosions have the lifespan of 'info' (number of frames of the spritesheet)
+        self.lifespan = info.get_lifespan()
+        self.x = []
+        self.y = []
+        self.scale = []
+        self.sheet = []
+        self.age = []
+        return
+
+    def __len__(self):
+        return len(self.age)
+
+    def add(self, pos, scale, sheet, age = 0):
+        self.x.append(float(pos[0]))
+        self.y.append(float(pos[1]))
+        self.scale.append(scale)
+        self.sheet.append(sheet)
+        self.age.append(age)
+        return
+
+    def clear(self):
+        for values in (self.x, self.y, self.scale, self.sheet, self.age):
+            del values[:]
+        return
+
+    def update(self, dt = 1.0):
+        # age all the explosions by 'dt' frames, and remove the dead ones (age > lifespan)
+        x, y, scale, sheet, age = self.x, self.y, self.scale, self.sheet, self.age
+        lifespan = self.lifespan
+        n = len(age)
+        # j: next free slot (explosions 0 to j - 1 are alive)
+        j = 0
+        for i in range(0, n):
+            a = age[i] + dt
+            if a <= lifespan:
+                if j != i:
+                    x[j] = x[i]
+                    y[j] = y[i]
+                    scale[j] = scale[i]
+                    sheet[j] = sheet[i]
+                age[j] = a
+                j += 1
+        if j < n:
+            for values in (x, y, scale, sheet, age):
+                del values[j:]
+        return
+
+    def get_state(self):
+        # return the list of the explosions (x, y, scale, sheet, age)
+        return list(zip(self.x, self.y, self.scale, self.sheet, self.age))
@@ -0,0 +1,333 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - reinforcement learning environments                #
+# ---------------------------------------------------------------- #
+"""
+
+The headless game as a reinforcement learning environment (requires NumPy),
+with the reset() / step(action) interface of Gymnasium (without depending
+on it):
+    reset(seed)   -> observation, info
+    step(action)  -> observation, reward, terminated, truncated, info
+
+Actions are integers (ACTIONS[action] = thrust, turn, fire, hyperspace):
+0 to 11 are the combinations of thrust (off / on), turn (left / none /
+right) and fire (no / yes), 12 is the hyperspace. The controls are held
+from one step to the next (they are only pressed or released when they
+change), through World.key_input, as a player would. Each step plays
+'frame_skip' ticks.
+
+Observations are float32 arrays of OBSERVATION_SIZE values:
+    the ship (SHIP_FEATURES):        velocity (2), direction (cos, sin), turning (-1 / 0 / 1),
+                                     missiles in flight, stillness, hyperspace credit (0 / 1)
+    the NEAREST_ROCKS nearest rocks  present (1, 0 for padding), offset from the ship around the
+    (ROCK_FEATURES each, nearest     world (2), velocity relative to the ship (2)
+    first):
+all scaled to about [-1, 1].
+
+Rewards are the points scored through World.update_score during the step
+(survival, rocks destroyed, and the 50 points of a crash, as the player
+sees them); the 100 points paid for a hyperspace jump are not counted.
+An episode is terminated at game over, truncated after 'max_ticks'.
+
+VecEnv steps N worlds in lockstep: the actions of all the worlds are
+played, then the observations of all the worlds are computed at once
+(one batch of NumPy arrays for all the rocks). A finished world is reset
+at once (its last observation and statistics are in the info). ProcessVecEnv
+spreads the worlds of a VecEnv over worker processes (one per core).
+
+"""
+##################################################################
+
+import multiprocessing
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import world as world_module
+from .world import World
+
+# actions: (thrust, turn, fire, hyperspace)
+ACTIONS = [(thrust, turn, fire, False) for thrust in (False, True) for turn in (-1, 0, 1) for fire in (False, True)]
+ACTIONS.append((False, 0, False, True))
+NOOP = ACTIONS.index((False, 0, False, False))
+
+NEAREST_ROCKS = 8
+SHIP_FEATURES = 8
+ROCK_FEATURES = 5
+OBSERVATION_SIZE = SHIP_FEATURES + NEAREST_ROCKS * ROCK_FEATURES
+
+# ticks played per step
+FRAME_SKIP = 1
+# 10 minutes of play
+MAX_TICKS = 36000
+
+##################################################################
+
+
+# EnvWorld class (a World that holds the controls of the actions and counts the points of update_score)
+class EnvWorld(World):
+    def __init__(self, seed = None):
+        self.reward = 0
+        World.__init__(self, seed)
+        self.sounds = None
+        return
+
+    def game_init(self, seed = None):
+        World.game_init(self, seed)
+        # controls held (a new ship does not turn nor thrust)
+        self.turning = 0
+        self.thrusting = False
+        return
+
+    def update_score(self, increase_score):
+        self.reward += increase_score
+        World.update_score(self, increase_score)
+        return
+
+    def play(self, action, frame_skip = FRAME_SKIP, max_ticks = MAX_TICKS):
+        # play 'action' for 'frame_skip' ticks at most (less at the end of the game) and return the points scored
+        thrust, turn, fire, jump = ACTIONS[action]
+        if thrust != self.thrusting:
+            self.key_input("up", int(thrust))
+            self.thrusting = thrust
+        if turn != self.turning:
+            if self.turning != 0:
+                self.key_input("right" if self.turning == 1 else "left", 0)
+            if turn != 0:
+                self.key_input("right" if turn == 1 else "left", 1)
+            self.turning = turn
+        if fire:
+            self.key_input("space", 1)
+        if jump:
+            self.key_input("h", 1)
+        self.reward = 0
+        for k in range(0, frame_skip):
+            self.tick()
+            if self.is_over() or self.ticks >= max_ticks:
+                break
+        return self.reward
+
+
+# Env class (one world)
+class Env:
+    def __init__(self, seed = None, max_ticks = MAX_TICKS, frame_skip = FRAME_SKIP, numpy_physics = False):
+        if numpy is None:
+            raise ImportError("numpy is required for the environments")
+        self.random = random.Random(seed)
+        self.max_ticks = max_ticks
+        self.frame_skip = frame_skip
+        self.world = EnvWorld(self.random.randrange(2 ** 32))
+        self.world.numpy_physics = numpy_physics
+        self.observation = numpy.zeros((1, OBSERVATION_SIZE), dtype = numpy.float32)
+        return
+
+    def reset(self, seed = None):
+        # new game (seed drawn from the seed of the environment if not given)
+        if seed is None:
+            seed = self.random.randrange(2 ** 32)
+        self.world.game_init(seed)
+        observe([self.world], self.observation)
+        return self.observation[0].copy(), {"seed": seed}
+
+    def step(self, action):
+        world = self.world
+        reward = world.play(int(action), self.frame_skip, self.max_ticks)
+        observe([world], self.observation)
+        terminated = world.is_over()
+        truncated = not terminated and world.ticks >= self.max_ticks
+        info = {"ticks": world.ticks, "score": world.score, "lives": world.lives}
+        if terminated or truncated:
+            info["stats"] = world.get_stats()
+        return self.observation[0].copy(), float(reward), terminated, truncated, info
+
+    def close(self):
+        return
+
+
+# VecEnv class (N worlds in lockstep)
+class VecEnv:
+    def __init__(self, num_envs, seed = None, max_ticks = MAX_TICKS, frame_skip = FRAME_SKIP, numpy_physics = False):
+        if numpy is None:
+            raise ImportError("numpy is required for the environments")
+        self.num_envs = num_envs
+        self.random = random.Random(seed)
+        self.max_ticks = max_ticks
+        self.frame_skip = frame_skip
+        self.worlds = []
+        for k in range(0, num_envs):
+            world = EnvWorld(self.random.randrange(2 ** 32))
+            world.numpy_physics = numpy_physics
+            self.worlds.append(world)
+        self.observations = numpy.zeros((num_envs, OBSERVATION_SIZE), dtype = numpy.float32)
+        return
+
+    def reset(self, seeds = None):
+        # new games (seeds drawn from the seed of the environment if not given)
+        # return observations (num_envs x OBSERVATION_SIZE), info {"seeds": seeds}
+        if seeds is None:
+            seeds = [self.random.randrange(2 ** 32) for world in self.worlds]
+        for world, seed in zip(self.worlds, seeds):
+            world.game_init(seed)
+        observe(self.worlds, self.observations)
+        return self.observations.copy(), {"seeds": list(seeds)}
+
+    def step(self, actions):
+        # play actions[k] in world k; return observations, rewards, terminated, truncated (arrays of num_envs)
+        # and infos {k: info} of the worlds that have finished (and are already reset):
+        # info = {"final_observation": last observation, "stats": World.get_stats()}
+        frame_skip = self.frame_skip
+        max_ticks = self.max_ticks
+        rewards = []
+        terminated = []
+        truncated = []
+        finished = []
+        k = 0
+        for world, action in zip(self.worlds, numpy.asarray(actions).tolist()):
+            rewards.append(world.play(action, frame_skip, max_ticks))
+            over = world.is_over()
+            terminated.append(over)
+            truncated.append(not over and world.ticks >= max_ticks)
+            if over or world.ticks >= max_ticks:
+                finished.append(k)
+            k += 1
+        observations = observe(self.worlds, self.observations).copy()
+        infos = {}
+        if finished:
+            worlds = [self.worlds[k] for k in finished]
+            for k in finished:
+                infos[k] = {"final_observation": observations[k].copy(), "stats": self.worlds[k].get_stats()}
+                self.worlds[k].game_init(self.random.randrange(2 ** 32))
+            observations[finished] = observe(worlds)
+        return (observations, numpy.array(rewards, dtype = numpy.float32), numpy.array(terminated),
+                numpy.array(truncated), infos)
+
+    def close(self):
+        return
+
+
+# ProcessVecEnv class (the worlds of a VecEnv spread over worker processes)
+class ProcessVecEnv:
+    def __init__(self, num_envs, workers = None, seed = None, max_ticks = MAX_TICKS, frame_skip = FRAME_SKIP,
+                 numpy_physics = False):
+        if numpy is None:
+            raise ImportError("numpy is required for the environments")
+        self.num_envs = num_envs
+        workers = max(1, min(num_envs, workers or multiprocessing.cpu_count()))
+        seeds = random.Random(seed)
+        # worlds bounds[w] to bounds[w + 1] - 1 are played by worker w
+        self.bounds = [num_envs * w // workers for w in range(0, workers + 1)]
+        self.pipes = []
+        self.processes = []
+        for w in range(0, workers):
+            pipe, child = multiprocessing.Pipe()
+            args = (self.bounds[w + 1] - self.bounds[w], seeds.randrange(2 ** 32), max_ticks, frame_skip, numpy_physics)
+            process = multiprocessing.Process(target = run_worker, args = (child, args))
+            process.daemon = True
+            process.start()
+            child.close()
+            self.pipes.append(pipe)
+            self.processes.append(process)
+        return
+
+    def reset(self, seeds = None):
+        for w in range(0, len(self.pipes)):
+            self.pipes[w].send(("reset", None if seeds is None else list(seeds[self.bounds[w]:self.bounds[w + 1]])))
+        results = [pipe.recv() for pipe in self.pipes]
+        seeds = [seed for observations, info in results for seed in info["seeds"]]
+        return numpy.concatenate([observations for observations, info in results]), {"seeds": seeds}
+
+    def step(self, actions):
+        # (see VecEnv.step: the workers play their worlds at the same time)
+        actions = numpy.asarray(actions)
+        for w in range(0, len(self.pipes)):
+            self.pipes[w].send(("step", actions[self.bounds[w]:self.bounds[w + 1]]))
+        results = [pipe.recv() for pipe in self.pipes]
+        infos = {}
+        for w in range(0, len(results)):
+            for k, info in results[w][4].items():
+                infos[self.bounds[w] + k] = info
+        return tuple(numpy.concatenate([result[i] for result in results]) for i in range(0, 4)) + (infos,)
+
+    def close(self):
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+            pipe.close()
+        for process in self.processes:
+            process.join()
+        self.pipes = []
+        self.processes = []
+        return
+
+def run_worker(pipe, args):
+    # worker process of a ProcessVecEnv: plays a VecEnv of its worlds on request
+    env = VecEnv(*args)
+    while True:
+        command, data = pipe.recv()
+        if command == "reset":
+            pipe.send(env.reset(data))
+        elif command == "step":
+            pipe.send(env.step(data))
+        else:
+            break
+    pipe.close()
+    return
+
+##################################################################
+
+def rock_table(worlds):
+    # return positions and velocities of the rocks of all 'worlds' (array of rows x, y, vx, vy, world after
+    # world) and the number of rocks of each world
+    counts = [len(world.rock_group) for world in worlds]
+    stores = [getattr(world.rock_group, "store", None) for world in worlds]
+    if None not in stores:
+        # (NumPy rock physics: the arrays of the rocks)
+        rows = [numpy.hstack((store.pos[:store.n], store.vel[:store.n])) for store in stores]
+        return numpy.concatenate(rows) if rows else numpy.zeros((0, 4)), counts
+    rows = [(rock.pos[0], rock.pos[1], rock.vel[0], rock.vel[1]) for world in worlds for rock in world.rock_group]
+    return numpy.array(rows, dtype = float).reshape(-1, 4), counts
+
+def observe(worlds, out = None):
+    # write the observations of 'worlds' in 'out' (array of len(worlds) x OBSERVATION_SIZE, new if None) and return it
+    n = len(worlds)
+    if out is None:
+        out = numpy.zeros((n, OBSERVATION_SIZE), dtype = numpy.float32)
+    else:
+        out[:] = 0.0
+    velocity_max = world_module.VELOCITY_MAX_SHIP
+    ships = numpy.array([(world.my_ship.pos[0], world.my_ship.pos[1], world.my_ship.vel[0], world.my_ship.vel[1],
+                          world.my_ship.angle, world.my_ship.angle_vel, len(world.missile_group),
+                          world.ship_stillness, world.score) for world in worlds], dtype = float).reshape(-1, 9)
+    out[:, 0] = ships[:, 2] / velocity_max
+    out[:, 1] = ships[:, 3] / velocity_max
+    out[:, 2] = numpy.cos(ships[:, 4])
+    out[:, 3] = numpy.sin(ships[:, 4])
+    out[:, 4] = numpy.sign(ships[:, 5])
+    out[:, 5] = ships[:, 6] / world_module.MISSILE_MAX_NUMBER
+    out[:, 6] = numpy.minimum(ships[:, 7] / 60.0, 1.0)
+    out[:, 7] = ships[:, 8] >= 100
+    rocks, counts = rock_table(worlds)
+    if len(rocks) == 0:
+        return out
+    # offsets (around the world) and relative velocities of the rocks, from the ship of their world
+    counts = numpy.array(counts)
+    owner = numpy.repeat(numpy.arange(n), counts)
+    size = numpy.array([world_module.WORLD_WIDTH, world_module.WORLD_HEIGHT], dtype = float)
+    half = size / 2.0
+    offsets = (rocks[:, 0:2] - ships[owner, 0:2] + half) % size - half
+    velocities = rocks[:, 2:4] - ships[owner, 2:4]
+    # rank of each rock in its world (nearest first): the NEAREST_ROCKS first ones are observed
+    order = numpy.lexsort(((offsets * offsets).sum(axis = 1), owner))
+    rank = numpy.arange(len(order)) - (numpy.cumsum(counts) - counts)[owner[order]]
+    kept = rank < NEAREST_ROCKS
+    order = order[kept]
+    rows = owner[order]
+    columns = SHIP_FEATURES + ROCK_FEATURES * rank[kept]
+    out[rows, columns] = 1.0
+    out[rows, columns + 1] = offsets[order, 0] / half[0]
+    out[rows, columns + 2] = offsets[order, 1] / half[1]
+    out[rows, columns + 3] = velocities[order, 0] / velocity_max
+    out[rows, columns + 4] = velocities[order, 1] / velocity_max
+    return out
@@ -0,0 +1,106 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - spatial grid                                       #
+# ---------------------------------------------------------------- #
+"""
+
+Uniform grid (cell list) over the toroidal world, used as a broadphase:
+only objects in the same or in one of the 8 neighbouring cells (wrapping
+around the edges of the world) are candidates for a collision.
+
+The cells are at least 'cell_size' wide and high, so two objects closer
+than 'cell_size' are always in neighbouring cells.
+
+"""
+##################################################################
+
+import math
+
+##################################################################
+
+
+# SpatialGrid class
+class SpatialGrid:
+    def __init__(self, width, height, cell_size):
+        self.width = width
+        self.height = height
+        # number of columns and rows (cells are stretched to fill the world exactly)
+        self.cols = max(1, int(width // cell_size))
+        self.rows = max(1, int(height // cell_size))
+        self.cell_width = float(width) / self.cols
+        self.cell_height = float(height) / self.rows
+        # two objects closer than this are always in neighbouring cells (at least 'cell_size')
+        self.reach = min(self.cell_width, self.cell_height)
+        # neighbouring cells of each cell (itself included, without duplicates for small grids)
+        self.neighbours = []
+        for row in range(0, self.rows):
+            for col in range(0, self.cols):
+                cells = set()
+                for d_row in (-1, 0, 1):
+                    for d_col in (-1, 0, 1):
+                        cells.add(((row + d_row) % self.rows) * self.cols + (col + d_col) % self.cols)
+                self.neighbours.append(sorted(cells))
+        self.cells = {}
+        self.positions = []
+        return
+
+    def cell_of(self, pos):
+        # return the index of the cell containing position 'pos'
+        col = min(int((pos[0] % self.width) / self.cell_width), self.cols - 1)
+        row = min(int((pos[1] % self.height) / self.cell_height), self.rows - 1)
+        return row * self.cols + col
+
+    def build(self, positions):
+        # put each position (object i -> positions[i]) in its cell
+        self.positions = positions
+        self.cells = {}
+        for i in range(0, len(positions)):
+            cell = self.cell_of(positions[i])
+            if cell in self.cells:
+                self.cells[cell].append(i)
+            else:
+                self.cells[cell] = [i]
+        return
+
+    def remove(self, i):
+        # remove object i from its cell (it is no longer returned by the queries)
+        cell = self.cell_of(self.positions[i])
+        self.cells[cell].remove(i)
+        return
+
+    def query(self, pos):
+        # return the indexes of the objects that may be closer than 'cell_size' from 'pos'
+        result = []
+        for cell in self.neighbours[self.cell_of(pos)]:
+            if cell in self.cells:
+                result.extend(self.cells[cell])
+        return result
+
+    def query_segment(self, p, q, distance):
+        # return the sorted indexes of the objects that may be closer than 'distance' from segment p -> q
+        # (the segment is cut in pieces short enough for a query of each piece's middle to cover it)
+        if distance >= self.reach:
+            raise ValueError("distance %s is over the reach of the grid (%s)" % (distance, self.reach))
+        length = math.sqrt((q[0] - p[0]) ** 2 + (q[1] - p[1]) ** 2)
+        pieces = max(1, int(math.ceil(length / (2.0 * (self.reach - distance)))))
+        if pieces == 1:
+            return sorted(self.query(((p[0] + q[0]) / 2.0, (p[1] + q[1]) / 2.0)))
+        result = set()
+        for k in range(0, pieces):
+            t = (k + 0.5) / pieces
+            result.update(self.query((p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))))
+        return sorted(result)
+
+    def pairs(self):
+        # return the sorted list of candidate pairs (i, j), i < j, of objects in neighbouring cells
+        # (sorted so that the pairs are handled in the same order as a brute force double loop)
+        result = []
+        cells = self.cells
+        for cell in cells:
+            neighbours = [cells[c] for c in self.neighbours[cell] if c in cells]
+            for i in cells[cell]:
+                for members in neighbours:
+                    for j in members:
+                        if j > i:
+                            result.append((i, j))
+        result.sort()
+        return result
@@ -0,0 +1,66 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - ordered groups of sprites                          #
+# ---------------------------------------------------------------- #
+"""
+
+A Group is a set of sprites iterated in insertion order.
+
+The groups of the World used to be Python sets of objects, iterated in the
+order of their memory addresses: the order in which rocks bounce off each
+other (and therefore their velocities) could differ from one run to the
+next. With ordered groups, the same seed and the same inputs give exactly
+the same game.
+
+"""
+##################################################################
+
+import sys
+
+# dictionaries keep the insertion order from Python 3.7
+if sys.version_info >= (3, 7):
+    ordered_dict = dict
+else:
+    from collections import OrderedDict as ordered_dict
+
+##################################################################
+
+
+# Group class (same methods as the 'set' it replaces)
+class Group(object):
+    __slots__ = ("members",)
+
+    def __init__(self, members = ()):
+        self.members = ordered_dict()
+        for member in members:
+            self.members[member] = None
+        return
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __contains__(self, member):
+        return (member in self.members)
+
+    def add(self, member):
+        self.members[member] = None
+        return
+
+    def remove(self, member):
+        del self.members[member]
+        return
+
+    def discard(self, member):
+        self.members.pop(member, None)
+        return
+
+    def difference_update(self, members):
+        for member in members:
+            self.members.pop(member, None)
+        return
+
+    def clear(self):
+        self.members.clear()
+        return
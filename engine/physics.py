@@ -0,0 +1,288 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - vectorized rock physics (NumPy)                    #
+# ---------------------------------------------------------------- #
+"""
+
+Structure-of-arrays backend for the rocks (optional, requires NumPy).
+
+A RockGroup keeps the positions, velocities, masses, angles, angular
+velocities and ages of all its rocks in NumPy arrays, so that the gravity
+of the ship, the integration and the wrap around the world are computed
+for all the rocks at once (RockGroup.update).
+
+Each rock is still seen as a Sprite: a RockView reads and writes its own
+slot of the arrays, so the rest of the game (collisions, bounce, drawing)
+does not know about the arrays. A RockGroup behaves as the Group it
+replaces (add / remove / discard / difference_update / len / iteration),
+iteration order included: a removal moves the following rocks down one
+slot. A removed rock becomes a plain Sprite with the values of its slot.
+
+Enabled with World.numpy_physics (see NUMPY_PHYSICS in engine/world.py).
+
+"""
+##################################################################
+
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import world as world_module
+from .world import Sprite
+
+##################################################################
+
+def torus_dist_squared_batch(p, q, width = None, height = None):
+    # batched version of torus_dist_squared (engine/world.py):
+    # p and q are arrays of points (last dimension = (x, y)) broadcast against each other
+    # for example: p of shape (n, 2) and q of shape (2,)          -> n distances squared
+    #              p of shape (n, 1, 2) and q of shape (1, m, 2)  -> n x m distances squared
+    # the world is WORLD_WIDTH x WORLD_HEIGHT unless 'width' and 'height' are given
+    if width is None:
+        width = world_module.WORLD_WIDTH
+        height = world_module.WORLD_HEIGHT
+    d = numpy.abs(numpy.asarray(p, dtype = float) - numpy.asarray(q, dtype = float))
+    d = numpy.minimum(d, numpy.abs(numpy.array([width, height], dtype = float) - d))
+    return d[..., 0] * d[..., 0] + d[..., 1] * d[..., 1]
+
+##################################################################
+
+
+# RockStore class (arrays of the rocks, slots 0 to n-1 are in use)
+class RockStore:
+    def __init__(self, capacity = 16):
+        if numpy is None:
+            raise ImportError("numpy is required for the vectorized rock physics")
+        self.n = 0
+        self.pos = numpy.zeros((capacity, 2))
+        self.vel = numpy.zeros((capacity, 2))
+        self.mass = numpy.zeros(capacity)
+        self.angle = numpy.zeros(capacity)
+        self.angle_vel = numpy.zeros(capacity)
+        self.age = numpy.zeros(capacity)
+        return
+
+    def grow(self):
+        # double the capacity of all the arrays
+        for name in ("pos", "vel", "mass", "angle", "angle_vel", "age"):
+            old = getattr(self, name)
+            new = numpy.zeros((2 * old.shape[0],) + old.shape[1:])
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+        return
+
+    def append(self, pos, vel, mass, angle, angle_vel, age):
+        # fill the next free slot and return its index
+        if self.n == self.pos.shape[0]:
+            self.grow()
+        i = self.n
+        self.pos[i] = pos
+        self.vel[i] = vel
+        self.mass[i] = mass
+        self.angle[i] = angle
+        self.angle_vel[i] = angle_vel
+        self.age[i] = age
+        self.n += 1
+        return i
+
+##################################################################
+
+
+# RockView class (a rock seen as a Sprite)
+class RockView(Sprite):
+    # pos, vel, mass, angle, angle_vel and age are properties reading the arrays
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index, radius, lifespan):
+        self.store = store
+        self.index = index
+        self.radius = radius
+        self.lifespan = lifespan
+        return
+
+    @property
+    def pos(self):
+        return self.store.pos[self.index]
+
+    @pos.setter
+    def pos(self, value):
+        self.store.pos[self.index] = value
+
+    @property
+    def vel(self):
+        return self.store.vel[self.index]
+
+    @vel.setter
+    def vel(self, value):
+        self.store.vel[self.index] = value
+
+    @property
+    def mass(self):
+        return self.store.mass[self.index]
+
+    @mass.setter
+    def mass(self, value):
+        self.store.mass[self.index] = value
+
+    @property
+    def angle(self):
+        return self.store.angle[self.index]
+
+    @angle.setter
+    def angle(self, value):
+        self.store.angle[self.index] = value
+
+    @property
+    def angle_vel(self):
+        return self.store.angle_vel[self.index]
+
+    @angle_vel.setter
+    def angle_vel(self, value):
+        self.store.angle_vel[self.index] = value
+
+    @property
+    def age(self):
+        return self.store.age[self.index]
+
+    @age.setter
+    def age(self, value):
+        self.store.age[self.index] = value
+
+##################################################################
+
+
+def detach(rock, store):
+    # turn a RockView removed from its group into a plain Sprite (DetachedRock) with the values of its slot
+    # in 'store' (read before the slots are compacted), so that no arrays are allocated for the removed rocks
+    # (DetachedRock has the same layout as RockView, its class can be changed in place)
+    i = rock.index
+    pos = [float(store.pos[i][0]), float(store.pos[i][1])]
+    vel = [float(store.vel[i][0]), float(store.vel[i][1])]
+    values = (float(store.mass[i]), float(store.angle[i]), float(store.angle_vel[i]), float(store.age[i]))
+    rock.__class__ = DetachedRock
+    rock.store = None
+    rock.index = None
+    rock.pos = pos
+    rock.vel = vel
+    rock.mass, rock.angle, rock.angle_vel, rock.age = values
+    return
+
+
+# DetachedRock class (a rock removed from its RockGroup: a plain Sprite)
+class DetachedRock(Sprite):
+    __slots__ = ("store", "index")
+
+##################################################################
+
+
+# RockGroup class (replaces the Group of rocks)
+class RockGroup:
+    def __init__(self, info):
+        self.radius = info.get_radius()
+        self.lifespan = info.get_lifespan()
+        self.store = RockStore()
+        # views[i] is the RockView of slot i
+        self.views = []
+        return
+
+    def __len__(self):
+        return len(self.views)
+
+    def __iter__(self):
+        return iter(list(self.views))
+
+    def __contains__(self, rock):
+        return (isinstance(rock, RockView) and rock.store is self.store)
+
+    def add(self, sprite):
+        # add a rock (any Sprite) to the group and return its RockView
+        # (the Sprite itself is not kept: its values are copied in the arrays)
+        if sprite in self:
+            return sprite
+        i = self.store.append(sprite.pos, sprite.vel, sprite.mass, sprite.angle, sprite.angle_vel, sprite.age)
+        view = RockView(self.store, i, self.radius, self.lifespan)
+        self.views.append(view)
+        return view
+
+    def remove(self, rock):
+        if rock not in self:
+            raise KeyError(rock)
+        self.compact([rock])
+        return
+
+    def discard(self, rock):
+        if rock in self:
+            self.compact([rock])
+        return
+
+    def difference_update(self, rocks):
+        # (all the rocks removed at once: the arrays are compacted only once)
+        removed = collections.OrderedDict()
+        for rock in rocks:
+            if rock in self:
+                removed[rock.index] = rock
+        if removed:
+            self.compact(list(removed.values()))
+        return
+
+    def compact(self, removed):
+        # remove the rocks 'removed' (RockViews of this group): the other rocks keep their order,
+        # their slots are moved down over the free slots
+        store = self.store
+        n = store.n
+        keep = numpy.ones(n, dtype = bool)
+        for rock in removed:
+            keep[rock.index] = False
+            detach(rock, store)
+        m = n - len(removed)
+        for name in ("pos", "vel", "mass", "angle", "angle_vel", "age"):
+            array = getattr(store, name)
+            array[:m] = array[:n][keep]
+        store.n = m
+        self.views = [self.views[i] for i in range(0, n) if keep[i]]
+        for i in range(0, m):
+            self.views[i].index = i
+        return
+
+    def positions(self):
+        # return the array of the positions of the rocks (one row per rock, in iteration order)
+        return self.store.pos[:self.store.n]
+
+    def torus_dist_squared(self, point):
+        # return the array of the distances squared of the rocks to 'point' (in iteration order)
+        return torus_dist_squared_batch(self.positions(), point)
+
+    def nearest_dist_squared(self, points):
+        # return the array of the distances squared of each point to its nearest rock (inf if no rock)
+        if len(self) == 0:
+            return numpy.full(len(points), float('inf'))
+        points = numpy.asarray(points, dtype = float)
+        return torus_dist_squared_batch(points[:, None, :], self.positions()[None, :, :]).min(axis = 1)
+
+    def update(self, ship, dt = 1.0):
+        # Sprite.update() of all the rocks at once
+        s = self.store
+        n = s.n
+        if n == 0:
+            return
+        pos = s.pos[:n]
+        vel = s.vel[:n]
+        mass = s.mass[:n]
+        # update angle
+        s.angle[:n] += s.angle_vel[:n] * dt
+        # update speed: rocks with mass != 0 are gravitationally attracted to the ship
+        vect = numpy.asarray(ship.get_position(), dtype = float) - pos
+        d2 = vect[:, 0] * vect[:, 0] + vect[:, 1] * vect[:, 1]
+        heavy = mass > 0.0
+        # Newtonian gravity along the normalized vector rock -> ship
+        pull = numpy.zeros(n)
+        pull[heavy] = world_module.SHIP_GRAVITY_PULL * mass[heavy] / d2[heavy] / numpy.sqrt(d2[heavy])
+        vel += vect * (pull * dt)[:, None]
+        # update position + remain within the world
+        pos += vel * dt
+        pos[:, 0] %= world_module.WORLD_WIDTH
+        pos[:, 1] %= world_module.WORLD_HEIGHT
+        s.age[:n] += dt
+        return
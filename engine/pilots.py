@@ -0,0 +1,357 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - scripted pilots                                    #
+# ---------------------------------------------------------------- #
+"""
+
+Pilots play headless games: before each tick, act(world) may press or
+release ship controls through World.key_input, exactly as a player would
+(so a game played by a pilot can also be recorded, see engine/replay.py).
+
+Each pilot has its own random generator (seeded), so that a game played by
+a pilot is as deterministic as the world itself.
+
+The AutoPilot actually plays: it aims at the rocks (leading them), dodges
+them and jumps to hyperspace as a last resort, with the same controls
+(fire_missile, ship_thrust, ship_rotate, hyperspace). Every DECISION_TICKS
+ticks, threats() predicts the trajectories of all the rocks at once,
+including the pull of the ship (SHIP_GRAVITY_PULL), over HORIZON frames:
+the time to collision of each rock with the ship, and where each rock can
+be hit by a missile. A Squadron plays several worlds in lockstep and
+evaluates the threats of all of them in one batch of NumPy arrays (small
+batches, or no NumPy: plain loops). The time spent deciding is kept
+(decision_time, decision_ticks) and reported by the runner (see
+engine/runner.py).
+
+"""
+##################################################################
+
+import math
+import random
+from time import perf_counter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# (the constants of the world are read through the module when they are used: see engine/runner.py)
+from . import world as world_module
+from .world import ship_info, asteroid_info
+
+# the AutoPilot decides every DECISION_TICKS ticks (the controls are held in between)
+DECISION_TICKS = 3
+# the trajectories of the rocks are predicted over HORIZON frames, by steps of HORIZON_STEP frames
+HORIZON = 90
+HORIZON_STEP = 3
+# a rock closer than this (ship radius + rock radius + margin) collides
+COLLISION_DISTANCE = ship_info.get_radius() + asteroid_info.get_radius() + 10
+# time to collision (frames) below which the ship dodges / jumps to hyperspace
+DODGE_TIME = 45
+HYPERSPACE_TIME = 9
+# a missile is fired at most every FIRE_TICKS ticks
+FIRE_TICKS = 6
+# below BATCH_MIN rocks (all the worlds together), threats() loops in Python (NumPy costs more per call)
+BATCH_MIN = 24
+
+##################################################################
+
+
+# IdlePilot class (never touches the controls)
+class IdlePilot:
+    def __init__(self, seed = None):
+        self.random = random.Random(seed)
+        return
+
+    def act(self, world):
+        return
+
+
+# RandomPilot class (holds random controls for random durations, fires often)
+class RandomPilot(IdlePilot):
+    def act(self, world):
+        rnd = self.random.random
+        if rnd() < 0.03:
+            world.key_input("up", int(rnd() < 0.5))
+        if rnd() < 0.05:
+            world.key_input("left", int(rnd() < 0.5))
+        if rnd() < 0.05:
+            world.key_input("right", int(rnd() < 0.5))
+        if rnd() < 0.2:
+            world.key_input("space", 1)
+        if rnd() < 0.001:
+            world.key_input("h", 1)
+        return
+
+
+# SpinnerPilot class (the "death blossom": spin in place and hammer the space bar)
+class SpinnerPilot(IdlePilot):
+    def act(self, world):
+        if world.ticks == 0:
+            world.key_input("right", 1)
+        world.key_input("space", 1)
+        return
+
+
+# AutoPilot class (aims, shoots, dodges and jumps to hyperspace)
+class AutoPilot(IdlePilot):
+    def __init__(self, seed = None):
+        IdlePilot.__init__(self, seed)
+        # controls held: turning (-1 left / 0 / 1 right), thrusting
+        self.turning = 0
+        self.thrusting = False
+        self.last_fire = None
+        self.last_hyperspace = None
+        # time spent deciding (seconds) and number of ticks played
+        self.decision_time = 0.0
+        self.decision_ticks = 0
+        return
+
+    def act(self, world):
+        # (a Squadron of one)
+        Squadron([self]).act([world])
+        return
+
+    def decide(self, world, positions, velocities, ttc, aims):
+        # choose the controls from the time to collision 'ttc' and the aiming 'aims' of the rocks (see threats())
+        ship = world.my_ship
+        if not ttc:
+            self.steer(world, None, False)
+            return
+        danger = min(range(0, len(ttc)), key = lambda i: ttc[i])
+        if (ttc[danger] <= HYPERSPACE_TIME and world.score >= 100 and
+                (self.last_hyperspace is None or world.ticks - self.last_hyperspace > 60)):
+            world.key_input("h", 1)
+            self.last_hyperspace = world.ticks
+            return
+        if ttc[danger] <= DODGE_TIME:
+            # dodge: thrust across the relative velocity of the rock, away from it
+            dx = offset(positions[danger][0], ship.pos[0], world_module.WORLD_WIDTH)
+            dy = offset(positions[danger][1], ship.pos[1], world_module.WORLD_HEIGHT)
+            vx = velocities[danger][0] - ship.vel[0]
+            vy = velocities[danger][1] - ship.vel[1]
+            if -vy * dx + vx * dy > 0.0:
+                vx, vy = -vx, -vy
+            self.steer(world, math.atan2(vx, -vy), True)
+            return
+        # attack: the rock that can be hit first (the most dangerous one if several can)
+        targets = [i for i in range(0, len(aims)) if aims[i] is not None]
+        if not targets:
+            # nothing within range: keep moving slowly (stillness makes the rocks aim at the ship)
+            self.steer(world, None, world.ship_stillness > 10.0 and ship.get_speed() < 1.0)
+            return
+        target = min(targets, key = lambda i: (ttc[i], aims[i][1]))
+        error = self.steer(world, aims[target][0], False)
+        tolerance = max(world_module.SHIP_ANGLE_INCREMENT / 2.0, math.atan2(asteroid_info.get_radius() / 2.0, aims[target][2]))
+        if (abs(error) <= tolerance and len(world.missile_group) < world_module.MISSILE_MAX_NUMBER and
+                (self.last_fire is None or world.ticks - self.last_fire >= FIRE_TICKS)):
+            world.key_input("space", 1)
+            self.last_fire = world.ticks
+        return
+
+    def steer(self, world, angle, thrust):
+        # turn towards 'angle' (None -> stop turning), thrust when facing it ('thrust'), return the angle error
+        error = 0.0
+        turning = 0
+        if angle is not None:
+            error = (angle - world.my_ship.angle + math.pi) % (2.0 * math.pi) - math.pi
+            if abs(error) > world_module.SHIP_ANGLE_INCREMENT / 2.0:
+                turning = 1 if error > 0.0 else -1
+        if turning != self.turning:
+            if self.turning != 0:
+                world.key_input("right" if self.turning == 1 else "left", 0)
+            if turning != 0:
+                world.key_input("right" if turning == 1 else "left", 1)
+            self.turning = turning
+        thrust = thrust and abs(error) < math.pi / 4.0
+        if thrust != self.thrusting:
+            world.key_input("up", int(thrust))
+            self.thrusting = thrust
+        return error
+
+
+# Squadron class (pilots playing several worlds in lockstep: the threats of all
+# the worlds where an AutoPilot decides are evaluated in one batch)
+class Squadron:
+    def __init__(self, pilots):
+        self.pilots = pilots
+        return
+
+    def act(self, worlds):
+        # pilots[k] acts on worlds[k]
+        start = perf_counter()
+        deciding = []
+        for pilot, world in zip(self.pilots, worlds):
+            if not isinstance(pilot, AutoPilot):
+                pilot.act(world)
+                continue
+            pilot.decision_ticks += 1
+            if world.ticks % DECISION_TICKS == 0:
+                deciding.append((pilot, world))
+        if not deciding:
+            return
+        # rocks of all the worlds, world after world
+        positions = []
+        velocities = []
+        masses = []
+        owner = []
+        bounds = [0]
+        for k in range(0, len(deciding)):
+            p, v, m = rock_arrays(deciding[k][1])
+            positions.append(p)
+            velocities.append(v)
+            masses.append(m)
+            owner.append([k] * len(m))
+            bounds.append(bounds[-1] + len(m))
+        ships = [world.my_ship for pilot, world in deciding]
+        ttc, aims = threats(concatenate(positions), concatenate(velocities), concatenate(masses),
+                            [ship.pos for ship in ships], [ship.vel for ship in ships], concatenate(owner))
+        for k in range(0, len(deciding)):
+            pilot, world = deciding[k]
+            first, last = bounds[k], bounds[k + 1]
+            pilot.decide(world, positions[k], velocities[k], ttc[first:last], aims[first:last])
+        # (the time of the batch is shared by the worlds where a pilot decided)
+        elapsed = (perf_counter() - start) / len(deciding)
+        for pilot, world in deciding:
+            pilot.decision_time += elapsed
+        return
+
+##################################################################
+
+def offset(a, b, size):
+    # signed offset from b to a around a dimension of the world of 'size'
+    return (a - b + size / 2.0) % size - size / 2.0
+
+def concatenate(arrays):
+    # concatenation of NumPy arrays, or of lists
+    if numpy is not None:
+        return numpy.concatenate(arrays)
+    return [item for array in arrays for item in array]
+
+def rock_arrays(world):
+    # positions, velocities and masses of the rocks of 'world' (NumPy arrays if NumPy is there, lists otherwise)
+    store = getattr(world.rock_group, "store", None)
+    if numpy is not None and store is not None:
+        n = store.n
+        return store.pos[:n].copy(), store.vel[:n].copy(), store.mass[:n].copy()
+    positions = [(float(rock.pos[0]), float(rock.pos[1])) for rock in world.rock_group]
+    velocities = [(float(rock.vel[0]), float(rock.vel[1])) for rock in world.rock_group]
+    masses = [float(rock.mass) for rock in world.rock_group]
+    if numpy is not None:
+        return (numpy.array(positions, dtype = float).reshape(-1, 2), numpy.array(velocities, dtype = float).reshape(-1, 2),
+                numpy.array(masses, dtype = float))
+    return positions, velocities, masses
+
+def threats(positions, velocities, masses, ship_pos, ship_vel, owner, horizon = HORIZON, step = HORIZON_STEP):
+    # predict the trajectories of the rocks (pulled by their ship, as in Sprite.update) and of the ships (drifting)
+    # over 'horizon' frames, by steps of 'step' frames; rock i is in the world of ship owner[i]; return:
+    #   ttc:  time to collision of each rock with its ship (frames, inf if none within the horizon)
+    #   aims: for each rock, (angle, time, distance) of the first missile that can hit it (None if none)
+    if numpy is None or len(masses) < BATCH_MIN:
+        return threats_loop(positions, velocities, masses, ship_pos, ship_vel, owner, horizon, step)
+    owner = numpy.asarray(owner, dtype = int)
+    p = numpy.array(positions, dtype = float).reshape(-1, 2)
+    v = numpy.array(velocities, dtype = float).reshape(-1, 2)
+    m = numpy.asarray(masses, dtype = float)
+    n = len(m)
+    origin = numpy.array(ship_pos, dtype = float).reshape(-1, 2)
+    drift = numpy.array(ship_vel, dtype = float).reshape(-1, 2)
+    s = origin.copy()
+    sv = drift.copy()
+    size = numpy.array([world_module.WORLD_WIDTH, world_module.WORLD_HEIGHT])
+    half = size / 2.0
+    friction = (1.0 - world_module.SPACE_FRICTION) ** step
+    missile_life = world_module.MISSILE_LIFE
+    missile_speed = world_module.VELOCITY_MISSILE * (1.0 + 1.5 * numpy.sqrt((drift * drift).sum(axis = 1)) /
+                                                     world_module.VELOCITY_MAX_SHIP)
+    # per rock: the pull factor, the ship at time 0, the missile speed and the drift of the missile
+    pull = world_module.SHIP_GRAVITY_PULL * step * m
+    rock_origin = origin[owner]
+    rock_drift = drift[owner]
+    rock_missile_speed = missile_speed[owner]
+    ttc = numpy.full(n, numpy.inf)
+    aim_time = numpy.full(n, numpy.inf)
+    aim_vector = numpy.zeros((n, 2))
+    for k in range(1, int(horizon // step) + 1):
+        t = k * step
+        # gravity of the ship (Euclidian vector rock -> ship, as in Sprite.update)
+        d = s[owner] - p
+        d2 = numpy.maximum((d * d).sum(axis = 1), 1.0)
+        v += d * (pull / (d2 * numpy.sqrt(d2)))[:, None]
+        p += v * step
+        p %= size
+        s += sv * step
+        s %= size
+        sv *= friction
+        # time to collision (distance around the world)
+        r = (p - s[owner] + half) % size - half
+        hit = ((r * r).sum(axis = 1) < COLLISION_DISTANCE ** 2) & (ttc == numpy.inf)
+        ttc[hit] = t
+        # a missile fired now reaches the rock at time t (the missile also has the velocity of the ship)
+        if t <= missile_life:
+            a = (p - rock_origin + half) % size - half - rock_drift * t
+            reach = ((a * a).sum(axis = 1) <= (rock_missile_speed * t) ** 2) & (aim_time == numpy.inf)
+            aim_time[reach] = t
+            aim_vector[reach] = a[reach]
+    aims = [None] * n
+    angles = numpy.arctan2(aim_vector[:, 1], aim_vector[:, 0]).tolist()
+    distances = numpy.sqrt((aim_vector * aim_vector).sum(axis = 1)).tolist()
+    times = aim_time.tolist()
+    for i in numpy.nonzero(aim_time < numpy.inf)[0].tolist():
+        aims[i] = (angles[i], times[i], distances[i])
+    return ttc.tolist(), aims
+
+def threats_loop(positions, velocities, masses, ship_pos, ship_vel, owner, horizon, step):
+    # threats() without NumPy (one rock at a time)
+    width = world_module.WORLD_WIDTH
+    height = world_module.WORLD_HEIGHT
+    gravity_pull = world_module.SHIP_GRAVITY_PULL
+    missile_life = world_module.MISSILE_LIFE
+    velocity_missile = world_module.VELOCITY_MISSILE
+    velocity_max_ship = world_module.VELOCITY_MAX_SHIP
+    friction = (1.0 - world_module.SPACE_FRICTION) ** step
+    ttc = []
+    aims = []
+    for i in range(0, len(masses)):
+        px, py = positions[i]
+        vx, vy = velocities[i]
+        # (int: owner may be a NumPy array of floats when it comes from the concatenation of empty lists)
+        ship = int(owner[i])
+        ox, oy = ship_pos[ship]
+        svx, svy = ship_vel[ship]
+        drift_x, drift_y = svx, svy
+        missile_speed = velocity_missile * (1.0 + 1.5 * math.sqrt(svx * svx + svy * svy) / velocity_max_ship)
+        sx, sy = ox, oy
+        collision = float("inf")
+        aim = None
+        for k in range(1, int(horizon // step) + 1):
+            t = k * step
+            dx = sx - px
+            dy = sy - py
+            d2 = max(dx * dx + dy * dy, 1.0)
+            pull = gravity_pull * masses[i] * step / (d2 * math.sqrt(d2))
+            vx += dx * pull
+            vy += dy * pull
+            px = (px + vx * step) % width
+            py = (py + vy * step) % height
+            sx = (sx + svx * step) % width
+            sy = (sy + svy * step) % height
+            svx *= friction
+            svy *= friction
+            rx = offset(px, sx, width)
+            ry = offset(py, sy, height)
+            if collision == float("inf") and rx * rx + ry * ry < COLLISION_DISTANCE ** 2:
+                collision = t
+            if aim is None and t <= missile_life:
+                ax = offset(px, ox, width) - drift_x * t
+                ay = offset(py, oy, height) - drift_y * t
+                if ax * ax + ay * ay <= (missile_speed * t) ** 2:
+                    aim = (math.atan2(ay, ax), float(t), math.sqrt(ax * ax + ay * ay))
+        ttc.append(collision)
+        aims.append(aim)
+    return ttc, aims
+
+# pilots by name
+PILOTS = {"idle":    IdlePilot,
+          "random":  RandomPilot,
+          "spinner": SpinnerPilot,
+          "auto":    AutoPilot}
@@ -0,0 +1,46 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - object pools                                       #
+# ---------------------------------------------------------------- #
+"""
+
+Pools of recycled objects (missiles, rocks, texts), so that
+steady-state play does not allocate (nor garbage collect) entities.
+
+An object is taken from a pool with acquire(...) (same arguments as the
+constructor of its class, which must have a reset(...) method with the
+same signature) and given back with release() once it has left its group.
+'allocated' counts the objects actually created by the pool.
+
+"""
+##################################################################
+
+
+# Pool class
+class Pool:
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.allocated = 0
+        return
+
+    def acquire(self, *args):
+        # return a recycled object (or a new one if there is none) initialized with 'args'
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+        else:
+            obj = self.cls(*args)
+            self.allocated += 1
+        return obj
+
+    def release(self, obj):
+        # give back an object that is no longer used
+        # (objects of another class, such as the rock views of engine/physics.py, are ignored)
+        if type(obj) is self.cls:
+            self.free.append(obj)
+        return
+
+    def release_all(self, objects):
+        for obj in objects:
+            self.release(obj)
+        return
@@ -0,0 +1,105 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - per-frame phase profiler                           #
+# ---------------------------------------------------------------- #
+"""
+
+Lightweight per-phase timers, with rolling percentiles over the last
+'window' frames.
+
+The code to be profiled calls lap(phase) at the end of each phase: the
+time since the previous lap is added to the phase for the current frame.
+end_frame() closes the frame (time of each phase in this frame -> rolling
+windows, 0 for the phases that did not run in this frame). When profiling
+is off, World.profiler is None and the laps are not even called.
+
+The summary (count, mean, p50, p95, p99, max in milliseconds per frame)
+can be dumped to a JSON or CSV file.
+
+"""
+##################################################################
+
+import collections
+import json
+from time import time as wall_clock
+
+##################################################################
+
+
+# Profiler class
+class Profiler:
+    def __init__(self, window = 600):
+        self.window = window
+        # phase -> deque of the times (seconds) of the last 'window' frames
+        self.times = collections.OrderedDict()
+        # time of each phase in the current frame
+        self.current = collections.OrderedDict()
+        self.frames = 0
+        self.last = wall_clock()
+        return
+
+    def start_frame(self):
+        # start timing (the time since the last end_frame() is not counted)
+        self.last = wall_clock()
+        return
+
+    def lap(self, phase):
+        # add the time since the previous lap to 'phase'
+        now = wall_clock()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last)
+        self.last = now
+        return
+
+    def end_frame(self):
+        # push the times of the current frame in the rolling windows (and their total as "frame")
+        # (a phase that did not run in this frame, for instance the ticks of a frame without tick, counts 0)
+        total = 0.0
+        for phase in self.current:
+            if phase not in self.times:
+                self.times[phase] = collections.deque(maxlen = self.window)
+        for phase in self.times:
+            if phase == "frame":
+                continue
+            time = self.current.get(phase, 0.0)
+            self.times[phase].append(time)
+            total += time
+        if "frame" not in self.times:
+            self.times["frame"] = collections.deque(maxlen = self.window)
+        self.times["frame"].append(total)
+        self.current = collections.OrderedDict()
+        self.frames += 1
+        return
+
+    def summary(self):
+        # return {phase: {"count", "mean", "p50", "p95", "p99", "max"}} (times in milliseconds per frame)
+        result = collections.OrderedDict()
+        for phase in self.times:
+            times = sorted(self.times[phase])
+            if not times:
+                continue
+            result[phase] = {"count": len(times),
+                             "mean":  1000.0 * sum(times) / len(times),
+                             "p50":   1000.0 * percentile(times, 50),
+                             "p95":   1000.0 * percentile(times, 95),
+                             "p99":   1000.0 * percentile(times, 99),
+                             "max":   1000.0 * times[-1]}
+        return result
+
+    def dump(self, path):
+        # write the summary to 'path' (CSV if the name ends with .csv, JSON otherwise)
+        summary = self.summary()
+        with open(path, "w") as f:
+            if path.endswith(".csv"):
+                f.write("phase,count,mean_ms,p50_ms,p95_ms,p99_ms,max_ms\n")
+                for phase in summary:
+                    s = summary[phase]
+                    f.write("%s,%d,%.4f,%.4f,%.4f,%.4f,%.4f\n" % (phase, s["count"], s["mean"], s["p50"], s["p95"], s["p99"], s["max"]))
+            else:
+                json.dump({"frames": self.frames, "window": self.window, "phases": summary}, f, indent = 1)
+        return
+
+##################################################################
+
+def percentile(values, p):
+    # p-th percentile (nearest rank) of the sorted list 'values'
+    rank = int(round(p / 100.0 * (len(values) - 1)))
+    return values[rank]
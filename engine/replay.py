@@ -0,0 +1,163 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - input recording and replay                         #
+# ---------------------------------------------------------------- #
+"""
+
+Recording of the ship controls of a game, and replay of the game from the
+recording (the world is deterministic, see engine/world.py).
+
+Recording file (little endian):
+    header: "ASTR" / version (uint16) / seed (uint64) / bounce mode (uint8) / numpy physics (uint8)
+    events: tick (uint32) / key (uint8, index in KEYS) / flag (uint8, 1 -> key down, 0 -> key up)
+    end:    tick (uint32) / END (uint8) / 0 (uint8)   (number of ticks of the game)
+
+An event recorded at tick t is applied after the t-th tick (before tick t+1).
+
+A Replay runs the game headless as fast as possible, and keeps a snapshot
+of the world every 'snapshot_interval' ticks so that seek() to an earlier
+tick restarts from the nearest snapshot. The snapshots are exact binary
+snapshots (see engine/snapshot.py): the replay goes on exactly as the
+recorded game, and a snapshot takes a few kilobytes.
+
+command line:  python -m engine.replay <recording> [tick]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import bisect
+import struct
+import sys
+from time import time as wall_clock
+
+from .snapshot import encode, restore
+from .world import World
+
+MAGIC = b"ASTR"
+VERSION = 1
+HEADER = struct.Struct("<4sHQBB")
+EVENT = struct.Struct("<IBB")
+
+# ship controls (see World.key_inputs)
+KEYS = ("space", "up", "left", "right", "h", "b")
+END = 255
+
+##################################################################
+
+
+# Recorder class
+class Recorder:
+    def __init__(self, world, path):
+        # record the game of 'world' (which must have just been initialized) to file 'path'
+        self.world = world
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, world.seed, world.bounce_mode, world.numpy_physics))
+        world.recorder = self
+        return
+
+    def record(self, tick, key, flag):
+        self.file.write(EVENT.pack(tick, KEYS.index(key), flag))
+        return
+
+    def close(self):
+        # write the end of the recording (number of ticks played)
+        if self.file is not None:
+            self.file.write(EVENT.pack(self.world.ticks, END, 0))
+            self.file.close()
+            self.file = None
+            self.world.recorder = None
+        return
+
+##################################################################
+
+def read_recording(path):
+    # return (seed, bounce_mode, numpy_physics, events, end) of a recording
+    # events is the list of (tick, key, flag), end is the number of ticks (None if the recording was not closed)
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, bounce_mode, numpy_physics = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("%s is not an Asteroids recording (version %d)" % (path, VERSION))
+    events = []
+    end = None
+    for offset in range(HEADER.size, len(data) - EVENT.size + 1, EVENT.size):
+        tick, key, flag = EVENT.unpack_from(data, offset)
+        if key == END:
+            end = tick
+        else:
+            events.append((tick, KEYS[key], flag))
+    return (seed, bool(bounce_mode), bool(numpy_physics), events, end)
+
+##################################################################
+
+
+# Replay class
+class Replay:
+    def __init__(self, path, snapshot_interval = 600):
+        seed, bounce_mode, numpy_physics, events, end = read_recording(path)
+        self.events = events
+        self.event_ticks = [event[0] for event in events]
+        if end is None:
+            end = events[-1][0] if events else 0
+        self.end = end
+        self.snapshot_interval = snapshot_interval
+        world = World()
+        world.sounds = None
+        world.numpy_physics = numpy_physics
+        world.game_init(seed)
+        world.bounce_mode = bounce_mode
+        self.world = world
+        # index of the next event to apply
+        self.next_event = 0
+        # snapshots: tick -> exact snapshot (bytes)
+        self.snapshots = {0: encode(world, exact = True, state = True)}
+        return
+
+    def run_to(self, tick):
+        # fast-forward the world to 'tick' (or to the end of the game)
+        world = self.world
+        events = self.events
+        tick = min(tick, self.end)
+        while world.ticks < tick and not world.is_over():
+            while self.next_event < len(events) and events[self.next_event][0] <= world.ticks:
+                world.key_input(events[self.next_event][1], events[self.next_event][2])
+                self.next_event += 1
+            world.tick()
+            if world.ticks % self.snapshot_interval == 0 and world.ticks not in self.snapshots:
+                self.snapshots[world.ticks] = encode(world, exact = True, state = True)
+        return world
+
+    def seek(self, tick):
+        # put the world at 'tick', from the nearest snapshot if 'tick' is in the past
+        # (or if a snapshot is closer than the current tick)
+        known = max(t for t in self.snapshots if t <= tick)
+        if tick < self.world.ticks or known > self.world.ticks:
+            restore(self.world, self.snapshots[known])
+            self.next_event = bisect.bisect_left(self.event_ticks, known)
+        return self.run_to(tick)
+
+    def run(self):
+        # replay the whole game
+        return self.run_to(self.end)
+
+##################################################################
+
+def main(argv):
+    if len(argv) < 2:
+        print("usage: python -m engine.replay <recording> [tick]")
+        return 2
+    replay = Replay(argv[1])
+    start = wall_clock()
+    if len(argv) > 2:
+        world = replay.seek(int(argv[2]))
+    else:
+        world = replay.run()
+    elapsed = wall_clock() - start
+    print("tick %d / %d  score %d  lives %d  rocks %d  missiles %d" % (world.ticks, replay.end, world.score, world.lives,
+                                                                      len(world.rock_group), len(world.missile_group)))
+    print("replayed in %.3f s (%.0f ticks/s)" % (elapsed, world.ticks / max(elapsed, 1e-9)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
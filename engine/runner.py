@@ -0,0 +1,199 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - batch simulation runner                            #
+# ---------------------------------------------------------------- #
+"""
+
+Run many headless games (one seed per game) on all the CPU cores, for
+instance to balance SHIP_GRAVITY_PULL, ROCK_MAX_NUMBER, etc.
+
+Each game is played by a pilot (see engine/pilots.py) until game over or
+'max_ticks', in a pool of worker processes. The statistics of each game
+(World.get_stats() + pilot and lives lost, + the time the pilot spends
+deciding per tick for the pilots that keep it) are written to a JSON lines
+file as soon as the game is over, so that nothing is held in memory.
+
+With 'lockstep' > 1, each process plays that many games together, tick
+after tick: the AutoPilots of all these games then evaluate their threats
+in one NumPy batch (python -m engine.runner --pilot auto --lockstep 100).
+
+Constants of engine/world.py can be overridden for the whole batch with
+'params' (for example {"SHIP_GRAVITY_PULL": 2000.0}): each worker sets them
+in its own copy of the module, and computes the constants derived from
+them again, before playing. Only the constants of PARAMS can be
+overridden (the others are rejected).
+
+command line:
+    python -m engine.runner --games 1000 --pilot random --out results.jsonl [--workers N]
+                            [--max-ticks 36000] [--numpy] [--lockstep 1] [--set NAME=VALUE ...]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import argparse
+import json
+import multiprocessing
+import sys
+from time import time as wall_clock
+
+from . import world as world_module
+from .pilots import PILOTS, Squadron
+from .world import World
+
+##################################################################
+
+# 10 minutes of play
+MAX_TICKS = 36000
+
+# constants of engine/world.py that can be overridden (--set): they are read by the world and the pilots
+# when they are used, and the constants derived from them are computed again (world.derive_constants)
+# (the others either do not change a headless game, like WIDTH or TICK_RATE, or are derived, like MISSILE_LIFE)
+PARAMS = ("WORLD_WIDTH", "WORLD_HEIGHT", "BOUNCE_MODE", "ROCK_BROADPHASE", "MISSILE_SWEPT", "HYPER_FIELD_EAGER",
+          "MAX_LIVES", "SPAWN_TICKS", "SHIP_SECURITY_PERIMETER", "SHIP_ANGLE_INCREMENT", "SHIP_ACCELERATION",
+          "SHIP_GRAVITY_PULL", "SPACE_FRICTION", "VELOCITY_MAX_SHIP", "ROCK_MAX_NUMBER", "VELOCITY_MIN_ROCK",
+          "VELOCITY_MAX_ROCK", "ROTATION_MAX_ROCK", "ROTATION_MIN_ROCK", "VELOCITY_MISSILE", "MISSILE_MAX_NUMBER")
+
+def play_game(seed, pilot = "random", max_ticks = MAX_TICKS, numpy_physics = False):
+    # play one game and return its statistics
+    return play_games([seed], pilot, max_ticks, numpy_physics)[0]
+
+def play_games(seeds, pilot = "random", max_ticks = MAX_TICKS, numpy_physics = False):
+    # play one game per seed, all in lockstep (the pilots act together, see pilots.Squadron),
+    # and return their statistics (in the order of the seeds)
+    worlds = []
+    for seed in seeds:
+        world = World()
+        world.sounds = None
+        world.numpy_physics = numpy_physics
+        world.game_init(seed)
+        worlds.append(world)
+    players = [PILOTS[pilot](seed) for seed in seeds]
+    playing = list(range(0, len(seeds)))
+    while playing:
+        Squadron([players[k] for k in playing]).act([worlds[k] for k in playing])
+        for k in playing:
+            worlds[k].tick()
+        playing = [k for k in playing if worlds[k].ticks < max_ticks and not worlds[k].is_over()]
+    results = []
+    for world, player in zip(worlds, players):
+        stats = world.get_stats()
+        stats["pilot"] = pilot
+        stats["lives_lost"] = world.ship_crashes
+        stats["game_over"] = world.is_over()
+        if getattr(player, "decision_ticks", 0):
+            # time spent by the pilot deciding, per tick played
+            stats["decision_ms_per_tick"] = 1000.0 * player.decision_time / player.decision_ticks
+        results.append(stats)
+    return results
+
+def init_worker(params):
+    # set the overridden constants in the worker process (see PARAMS)
+    for name in params:
+        if name not in PARAMS:
+            raise ValueError("constant %s cannot be overridden" % name)
+        setattr(world_module, name, params[name])
+    world_module.derive_constants()
+    return
+
+def run_games(args):
+    # worker entry point (arguments packed for Pool.imap_unordered)
+    return play_games(*args)
+
+def run_batch(seeds, out, pilot = "random", max_ticks = MAX_TICKS, params = None, workers = None,
+              numpy_physics = False, lockstep = 1):
+    # play one game per seed on 'workers' processes (default: all the cores), 'lockstep' games at a
+    # time per process, and stream the statistics of each game (one JSON object per line, in order
+    # of completion) to file 'out'
+    # return the number of games played
+    params = params or {}
+    seeds = list(seeds)
+    jobs = [(seeds[k:k + lockstep], pilot, max_ticks, numpy_physics) for k in range(0, len(seeds), lockstep)]
+    # chunks amortize the communication with the workers while keeping them all busy
+    workers = workers or multiprocessing.cpu_count()
+    chunksize = max(1, len(jobs) // (8 * workers))
+    games = 0
+    pool = multiprocessing.Pool(workers, init_worker, (params,))
+    try:
+        with open(out, "w") as f:
+            for results in pool.imap_unordered(run_games, jobs, chunksize):
+                for stats in results:
+                    if params:
+                        stats["params"] = params
+                    f.write(json.dumps(stats, sort_keys = True) + "\n")
+                    games += 1
+    finally:
+        pool.close()
+        pool.join()
+    return games
+
+##################################################################
+
+def parse_value(text):
+    # value of a --set NAME=VALUE option (boolean or number if possible)
+    if text in ("True", "False"):
+        return text == "True"
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog = "python -m engine.runner", description = "Run headless Asteroids games in parallel.")
+    parser.add_argument("--games", type = int, default = 100, help = "number of games (seeds 0 to games - 1)")
+    parser.add_argument("--first-seed", type = int, default = 0, help = "seed of the first game")
+    parser.add_argument("--pilot", choices = sorted(PILOTS), default = "random")
+    parser.add_argument("--max-ticks", type = int, default = MAX_TICKS, help = "ticks per game at most (60 ticks = 1 second)")
+    parser.add_argument("--workers", type = int, default = None, help = "number of processes (default: all the cores)")
+    parser.add_argument("--numpy", action = "store_true", help = "use the NumPy rock physics")
+    parser.add_argument("--lockstep", type = int, default = 1,
+                        help = "games played together by each process (the AutoPilots decide in batches)")
+    parser.add_argument("--set", action = "append", default = [], metavar = "NAME=VALUE",
+                        help = "override a constant of engine/world.py (one of: %s)" % ", ".join(PARAMS))
+    parser.add_argument("--out", default = "results.jsonl", help = "output file (JSON lines)")
+    args = parser.parse_args(argv[1:])
+
+    params = {}
+    for option in args.set:
+        if "=" not in option:
+            parser.error("--set %s: NAME=VALUE expected" % option)
+        name, value = option.split("=", 1)
+        if name not in PARAMS:
+            parser.error("--set %s: not a constant that can be overridden (one of: %s)" % (name, ", ".join(PARAMS)))
+        value = parse_value(value)
+        kind = type(getattr(world_module, name))
+        if kind is float and type(value) is int:
+            value = float(value)
+        if type(value) is not kind:
+            parser.error("--set %s: %s value expected" % (name, kind.__name__))
+        params[name] = value
+
+    start = wall_clock()
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    games = run_batch(seeds, args.out, args.pilot, args.max_ticks, params, args.workers, args.numpy,
+                      max(1, args.lockstep))
+    elapsed = wall_clock() - start
+
+    # summary (read back from the file)
+    ticks = 0
+    score = 0
+    decisions = []
+    with open(args.out) as f:
+        for line in f:
+            stats = json.loads(line)
+            ticks += stats["ticks"]
+            score += stats["score"]
+            if "decision_ms_per_tick" in stats:
+                decisions.append(stats["decision_ms_per_tick"])
+    print("%d games in %.1f s (%.1f games/s, %.0f ticks/s)  mean score %.1f  mean survival %.1f s  -> %s"
+          % (games, elapsed, games / elapsed, ticks / elapsed, float(score) / max(games, 1),
+             float(ticks) / max(games, 1) / 60.0, args.out))
+    if decisions:
+        print("pilot decision time: %.4f ms per tick (mean), %.4f ms per tick (worst game)"
+              % (sum(decisions) / len(decisions), max(decisions)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,457 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - multiplayer server                                 #
+# ---------------------------------------------------------------- #
+"""
+
+Server-authoritative multiplayer: the server runs the tick loop of an
+Arena (see engine/arena.py), the clients only send their ship controls,
+and the server sends them the state of the arena around their ship.
+
+Protocol (TCP, little endian): each message is a frame, made of its length
+(uint32) and its payload.
+    client -> server: KEY       key (uint8, index in ARENA_KEYS) / flag (uint8, 1 -> key down, 0 -> key up)
+    server -> client: WELCOME   id of the client's ship (uint32) / width, height of the world (uint16)
+                      STATE     tick (uint32) / score (int32) / lives (int8) /
+                                number of entities, removals, explosions (uint16) followed by
+                      ENTITY    id (uint32) / kind (uint8: ROCK, MISSILE, SHIP + THRUST) /
+                                x, y (uint16: fraction of the world) / vx, vy (int16: 1/256 pixel per tick) /
+                                angle (uint8: 1/256 turn) / angular velocity (int8: 1/1024 turn per tick)
+                      REMOVAL   id (uint32)
+                      EXPLOSION x, y (uint16: fraction of the world) / scale (uint8: 1/10) / sheet (uint8)
+
+A STATE is sent every SEND_TICKS ticks, and only holds what the client
+does not already know:
+* interest management: a client is only told about the entities within
+  the view around its ship (plus INTEREST_MARGIN), found with a coarse
+  SpatialGrid of the entities built once per STATE for all the clients.
+  An entity leaving the view is removed.
+* delta: the client moves the entities it knows along their last velocity
+  (dead reckoning, see ClientView.predict). An entity is only sent again
+  when this prediction is off by more than POSITION_TOLERANCE pixels or
+  ANGLE_TOLERANCE radians, or when it changes kind (thrust of a ship). The
+  server keeps what each client knows (the decoded values it was sent).
+* backpressure: a client whose socket has more than MAX_BUFFER bytes left
+  to send is skipped (what it knows is unchanged, so the next STATE catches
+  up); the explosions it missed are dropped.
+
+Stand-in clients play with the pilots of engine/pilots.py (they see a
+ClientView with key_input() and ticks, as they see a World): they can run
+in the same event loop as the server, which reports the cost of its ticks
+and the bandwidth per client.
+
+command line (Python 3):
+    python -m engine.server [--host 127.0.0.1] [--port 8765] [--stand-ins N] [--pilot random] [--seconds 10]
+    python -m engine.server --connect HOST:PORT [--pilot random] [--seconds 10]
+
+"""
+##################################################################
+
+import argparse
+import asyncio
+import math
+import struct
+import sys
+from time import perf_counter
+
+from .arena import Arena, ARENA_KEYS, ARENA_ROCKS_PER_SHIP
+from .grid import SpatialGrid
+from .pilots import PILOTS
+from . import world as world_module
+from .world import asteroid_info
+
+FRAME = struct.Struct("<I")
+KEY = struct.Struct("<BB")
+WELCOME = struct.Struct("<IHH")
+STATE = struct.Struct("<IibHHH")
+ENTITY = struct.Struct("<IBHHhhBb")
+REMOVAL = struct.Struct("<I")
+EXPLOSION = struct.Struct("<HHBB")
+
+# kinds of entities
+ROCK = 0
+MISSILE = 1
+SHIP = 2
+THRUST = 4
+# ids of the ships (the ids of the rocks and missiles are the serial numbers of the arena's TaggedPool)
+SHIP_ID = 0x80000000
+
+PORT = 8765
+# a STATE is sent every SEND_TICKS ticks (20 per second)
+SEND_TICKS = 3
+# the entities closer than INTEREST_MARGIN to the view of a client are sent to it
+INTEREST_MARGIN = 2 * asteroid_info.get_radius()
+# dead reckoning tolerances (an entity is sent again when the client's prediction is off by more)
+POSITION_TOLERANCE = 2.0
+ANGLE_TOLERANCE = 0.1
+# bytes waiting in the socket of a client above which it is skipped
+MAX_BUFFER = 64 * 1024
+
+##################################################################
+
+# quantization of the values sent (encode -> integer / decode -> value as known by the client)
+
+def encode_x(x, size):
+    return int(x * 65536.0 / size) & 0xFFFF
+
+def decode_x(q, size):
+    return q * size / 65536.0
+
+def encode_v(v):
+    return max(-32768, min(32767, int(round(v * 256.0))))
+
+def decode_v(q):
+    return q / 256.0
+
+def encode_angle(angle):
+    return int(round(angle * 256.0 / (2.0 * math.pi))) & 0xFF
+
+def decode_angle(q):
+    return q * 2.0 * math.pi / 256.0
+
+def encode_angle_vel(angle_vel):
+    return max(-128, min(127, int(round(angle_vel * 1024.0 / (2.0 * math.pi)))))
+
+def decode_angle_vel(q):
+    return q * 2.0 * math.pi / 1024.0
+
+def offset(a, b, size):
+    # signed offset from b to a around a dimension of the world of 'size'
+    return (a - b + size / 2.0) % size - size / 2.0
+
+def angle_offset(a, b):
+    return offset(a, b, 2.0 * math.pi)
+
+def send_frame(writer, payload):
+    writer.write(FRAME.pack(len(payload)) + payload)
+    return
+
+async def read_frame(reader):
+    # return the payload of the next frame (None at the end of the stream)
+    try:
+        header = await reader.readexactly(FRAME.size)
+        return await reader.readexactly(FRAME.unpack(header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+##################################################################
+
+
+# Client class (a connection, as seen by the server)
+class Client:
+    def __init__(self, player, writer):
+        self.player = player
+        self.writer = writer
+        # id -> (kind, x, y, vx, vy, angle, angle_vel, tick) as last sent (decoded)
+        self.known = {}
+        # statistics
+        self.bytes_sent = 0
+        self.skipped = 0
+        return
+
+
+# Server class
+class Server:
+    def __init__(self, seed = None, send_ticks = SEND_TICKS):
+        self.arena = Arena(seed)
+        self.send_ticks = send_ticks
+        # ident -> Client
+        self.clients = {}
+        # size of the world and of the view of a client (the constants of engine/world.py when the server is created)
+        self.width = world_module.WORLD_WIDTH
+        self.height = world_module.WORLD_HEIGHT
+        self.view_size = (world_module.WIDTH, world_module.HEIGHT)
+        # coarse grid of the entities: the 3 x 3 cells around a ship cover its view and the margin
+        cell = max(self.view_size) / 2.0 + INTEREST_MARGIN
+        self.interest_grid = SpatialGrid(self.width, self.height, cell)
+        # cost of each tick (step and STATE) in seconds
+        self.tick_times = []
+        # encodings shared by the clients during a broadcast (see encode and is_stale)
+        self.encoded = {}
+        self.stale = {}
+        self.running = False
+        return
+
+    async def handle(self, reader, writer):
+        # a client: one ship in the arena as long as the connection is open
+        player = self.arena.add_player()
+        client = Client(player, writer)
+        self.clients[player.ident] = client
+        send_frame(writer, WELCOME.pack(SHIP_ID | player.ident, self.width, self.height))
+        try:
+            while True:
+                payload = await read_frame(reader)
+                if payload is None or len(payload) != KEY.size:
+                    break
+                key, flag = KEY.unpack(payload)
+                if key < len(ARENA_KEYS):
+                    self.arena.player_input(player.ident, ARENA_KEYS[key], flag)
+        finally:
+            del self.clients[player.ident]
+            self.arena.remove_player(player.ident)
+            writer.close()
+        return
+
+    async def run(self, seconds = None):
+        # tick loop (at TICK_RATE, for 'seconds' or until stop())
+        loop = asyncio.get_running_loop()
+        tick_rate = world_module.TICK_RATE
+        start = loop.time()
+        ticks = 0
+        self.running = True
+        while self.running and (seconds is None or ticks < seconds * tick_rate):
+            t0 = perf_counter()
+            self.arena.tick()
+            if self.arena.ticks % self.send_ticks == 0:
+                self.broadcast()
+            self.tick_times.append(perf_counter() - t0)
+            ticks += 1
+            delay = start + ticks / tick_rate - loop.time()
+            if delay < -1.0:
+                # too far behind: drop the late ticks rather than never catching up
+                start -= delay
+                delay = 0.0
+            await asyncio.sleep(max(0.0, delay))
+        return
+
+    def stop(self):
+        self.running = False
+        return
+
+    def entities(self):
+        # return the list of the entities of the arena: (id, kind, pos, vel, angle, angle_vel)
+        arena = self.arena
+        arena.activate(None)
+        tag = arena.tag
+        result = [(tag(rock), ROCK, rock.pos, rock.vel, rock.angle, rock.angle_vel) for rock in arena.rock_group]
+        for player in arena.players.values():
+            ship = player.my_ship
+            result.append((SHIP_ID | player.ident, SHIP + THRUST * ship.thrust, ship.pos, ship.vel, ship.angle, ship.angle_vel))
+            result.extend((tag(missile), MISSILE, missile.pos, missile.vel, missile.angle, 0.0)
+                          for missile in player.missile_group)
+        return result
+
+    def broadcast(self):
+        # send a STATE to each client
+        entities = self.entities()
+        events = self.arena.take_events()
+        self.interest_grid.build([entity[2] for entity in entities])
+        # shared by all the clients: ident -> (ENTITY packed, values decoded by the clients) /
+        # (ident, tick last sent) -> the client's prediction is off / explosions (x, y, EXPLOSION packed)
+        self.encoded = {}
+        self.stale = {}
+        explosions = [(x, y, EXPLOSION.pack(encode_x(x, self.width), encode_x(y, self.height), min(255, int(round(scale * 10))), sheet))
+                      for x, y, scale, sheet in events]
+        for client in list(self.clients.values()):
+            writer = client.writer
+            if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                client.skipped += 1
+                continue
+            payload = self.encode_state(client, entities, explosions)
+            send_frame(writer, payload)
+            client.bytes_sent += FRAME.size + len(payload)
+        return
+
+    def encode(self, entity):
+        # return the ENTITY packed of 'entity', and its values as decoded by the clients (once per STATE)
+        ident, kind, pos, vel, angle, angle_vel = entity
+        if ident not in self.encoded:
+            q = (ident, kind, encode_x(pos[0], self.width), encode_x(pos[1], self.height), encode_v(vel[0]), encode_v(vel[1]),
+                 encode_angle(angle), encode_angle_vel(angle_vel))
+            self.encoded[ident] = (ENTITY.pack(*q),
+                                   (kind, decode_x(q[2], self.width), decode_x(q[3], self.height), decode_v(q[4]),
+                                    decode_v(q[5]), decode_angle(q[6]), decode_angle_vel(q[7]), self.arena.ticks))
+        return self.encoded[ident]
+
+    def is_stale(self, entity, last):
+        # True if the prediction of a client that knows 'last' (see ClientView.predict) is off for 'entity'
+        # (the clients sent the same entity at the same tick know the same values: computed once per STATE)
+        key = (entity[0], last[7])
+        if key not in self.stale:
+            ident, kind, pos, vel, angle, angle_vel = entity
+            age = self.arena.ticks - last[7]
+            self.stale[key] = (last[0] != kind or
+                               abs(offset(last[1] + last[3] * age, pos[0], self.width)) > POSITION_TOLERANCE or
+                               abs(offset(last[2] + last[4] * age, pos[1], self.height)) > POSITION_TOLERANCE or
+                               abs(angle_offset(last[5] + last[6] * age, angle)) > ANGLE_TOLERANCE)
+        return self.stale[key]
+
+    def encode_state(self, client, entities, explosions):
+        # STATE of 'client': the entities of its view it does not know (well enough), its removals and explosions
+        player = client.player
+        center = player.my_ship.pos
+        reach_x = self.view_size[0] / 2.0 + INTEREST_MARGIN
+        reach_y = self.view_size[1] / 2.0 + INTEREST_MARGIN
+        # (no test along a dimension where the view and its margin cover the whole world)
+        test_x = 2.0 * reach_x < self.width
+        test_y = 2.0 * reach_y < self.height
+        known = client.known
+        seen = set()
+        updates = []
+        for i in self.interest_grid.query(center):
+            entity = entities[i]
+            pos = entity[2]
+            if ((test_x and abs(offset(pos[0], center[0], self.width)) > reach_x) or
+                    (test_y and abs(offset(pos[1], center[1], self.height)) > reach_y)):
+                continue
+            ident = entity[0]
+            seen.add(ident)
+            last = known.get(ident)
+            if last is None or self.is_stale(entity, last):
+                packed, known[ident] = self.encode(entity)
+                updates.append(packed)
+        removals = [ident for ident in known if ident not in seen]
+        for ident in removals:
+            del known[ident]
+        removals = [REMOVAL.pack(ident) for ident in removals]
+        explosions = [packed for x, y, packed in explosions
+                      if not (test_x and abs(offset(x, center[0], self.width)) > reach_x) and
+                      not (test_y and abs(offset(y, center[1], self.height)) > reach_y)]
+        header = STATE.pack(self.arena.ticks, player.score, max(-128, min(127, player.lives)),
+                            len(updates), len(removals), len(explosions))
+        return b"".join([header] + updates + removals + explosions)
+
+##################################################################
+
+
+# ClientView class (the arena as known by a client, from the STATEs it receives)
+class ClientView:
+    def __init__(self, welcome):
+        self.ship_id, self.width, self.height = WELCOME.unpack(welcome)
+        # id -> [kind, x, y, vx, vy, angle, angle_vel, tick]
+        self.entities = {}
+        # explosions of the last STATE: (x, y, scale, sheet)
+        self.explosions = []
+        self.tick = 0
+        self.score = 0
+        self.lives = 0
+        self.states = 0
+        return
+
+    def apply(self, payload):
+        # update the view with a STATE
+        self.tick, self.score, self.lives, n_updates, n_removals, n_explosions = STATE.unpack_from(payload, 0)
+        view = memoryview(payload)
+        at = STATE.size
+        for ident, kind, x, y, vx, vy, angle, angle_vel in ENTITY.iter_unpack(view[at:at + n_updates * ENTITY.size]):
+            self.entities[ident] = [kind, decode_x(x, self.width), decode_x(y, self.height), decode_v(vx), decode_v(vy),
+                                    decode_angle(angle), decode_angle_vel(angle_vel), self.tick]
+        at += n_updates * ENTITY.size
+        for (ident,) in REMOVAL.iter_unpack(view[at:at + n_removals * REMOVAL.size]):
+            self.entities.pop(ident, None)
+        at += n_removals * REMOVAL.size
+        self.explosions = [(decode_x(x, self.width), decode_x(y, self.height), scale / 10.0, sheet)
+                           for x, y, scale, sheet in EXPLOSION.iter_unpack(view[at:at + n_explosions * EXPLOSION.size])]
+        self.states += 1
+        return
+
+    def predict(self, ident, tick):
+        # return (kind, x, y, angle) of entity 'ident' at 'tick' (moved along its last velocity)
+        kind, x, y, vx, vy, angle, angle_vel, known = self.entities[ident]
+        age = tick - known
+        return (kind, (x + vx * age) % self.width, (y + vy * age) % self.height, angle + angle_vel * age)
+
+
+# StandIn class (a client played by a pilot of engine/pilots.py)
+class StandIn:
+    def __init__(self, pilot = "random", seed = None):
+        self.pilot = PILOTS[pilot](seed)
+        self.view = None
+        self.writer = None
+        # pilots see 'ticks' (number of STATEs acted upon)
+        self.ticks = 0
+        self.bytes_received = 0
+        return
+
+    def key_input(self, key, flag):
+        # (the controls that are not ship controls in the arena are ignored)
+        if key in ARENA_KEYS:
+            send_frame(self.writer, KEY.pack(ARENA_KEYS.index(key), flag))
+        return
+
+    async def play(self, host, port, seconds = None):
+        # play until the server closes the connection (or for 'seconds')
+        reader, self.writer = await asyncio.open_connection(host, port)
+        loop = asyncio.get_running_loop()
+        end = None if seconds is None else loop.time() + seconds
+        welcome = await read_frame(reader)
+        if welcome is None:
+            return
+        self.view = ClientView(welcome)
+        self.bytes_received += FRAME.size + len(welcome)
+        try:
+            while end is None or loop.time() < end:
+                payload = await read_frame(reader)
+                if payload is None:
+                    break
+                self.bytes_received += FRAME.size + len(payload)
+                self.view.apply(payload)
+                self.pilot.act(self)
+                self.ticks += 1
+        finally:
+            self.writer.close()
+        return
+
+##################################################################
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+async def serve(args):
+    # server (and stand-in clients in the same event loop) for args.seconds
+    server = Server(args.seed)
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    stand_ins = [StandIn(args.pilot, seed) for seed in range(0, args.stand_ins)]
+    players = [asyncio.ensure_future(stand_in.play(args.host, args.port)) for stand_in in stand_ins]
+    await server.run(args.seconds)
+    clients = list(server.clients.values())
+    listener.close()
+    for client in clients:
+        client.writer.close()
+    await asyncio.gather(*players, return_exceptions = True)
+    await listener.wait_closed()
+
+    times = server.tick_times
+    arena = server.arena
+    print("%d ships  %d ticks  rocks %d (max %d)  ship crashes %d" %
+          (len(clients), len(times), len(arena.rock_group), ARENA_ROCKS_PER_SHIP * len(clients),
+           sum(client.player.ship_crashes for client in clients)))
+    print("tick (step + STATE): mean %.2f ms  p95 %.2f ms  max %.2f ms  (budget %.2f ms)" %
+          (1000.0 * sum(times) / max(len(times), 1), 1000.0 * percentile(times, 0.95), 1000.0 * max(times or [0.0]),
+           1000.0 / world_module.TICK_RATE))
+    if clients:
+        seconds = len(times) / world_module.TICK_RATE
+        sent = sum(client.bytes_sent for client in clients)
+        print("sent %.0f bytes per client per second  skipped %d STATEs" %
+              (sent / len(clients) / seconds, sum(client.skipped for client in clients)))
+    return 0
+
+async def connect(args):
+    # one stand-in client playing on a remote server for args.seconds
+    host, port = args.connect.rsplit(":", 1)
+    stand_in = StandIn(args.pilot, args.seed)
+    await stand_in.play(host, int(port), args.seconds)
+    view = stand_in.view
+    if view is not None:
+        print("tick %d  score %d  lives %d  entities %d  received %d bytes" %
+              (view.tick, view.score, view.lives, len(view.entities), stand_in.bytes_received))
+    return 0
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog = "python -m engine.server", description = "Run a multiplayer Asteroids arena.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = PORT)
+    parser.add_argument("--seed", type = int, default = None)
+    parser.add_argument("--stand-ins", type = int, default = 0, help = "number of stand-in clients played by pilots")
+    # (stand-ins only see their controls and the ticks: the pilots that look at the world cannot play them)
+    parser.add_argument("--pilot", choices = sorted(name for name in PILOTS if name != "auto"), default = "random",
+                        help = "pilot of the stand-in clients")
+    parser.add_argument("--seconds", type = float, default = None, help = "run for this time (default: forever)")
+    parser.add_argument("--connect", default = None, metavar = "HOST:PORT", help = "play as a stand-in client of a server")
+    args = parser.parse_args(argv[1:])
+    if args.connect is not None:
+        return asyncio.run(connect(args))
+    return asyncio.run(serve(args))
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,631 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - binary snapshots of the world                      #
+# ---------------------------------------------------------------- #
+"""
+
+Compact, versioned binary snapshots of a World: the ship, the rocks, the
+missiles and the explosions, the score, lives, time and ship stillness
+(and optionally everything else World.load_state needs: random state,
+statistics, texts), for save files, replay seeking and network sync.
+
+Snapshot (little endian):
+    header: "ASNP" / version (uint16) / flags (uint16) / ticks (uint32) / width, height of the world (uint16) /
+            score (int32) / lives (int32) / time, base time, ship stillness (float64)
+    groups: ship (1 entity), rocks, missiles, explosions, each:
+            number of entities (uint32), then one column per field (all the values of a field, contiguous)
+    state:  (flag STATE) seed (uint64) / bounce mode (uint8) / accumulator (float64) / statistics (4 x uint32) /
+            random state (625 x uint32, gauss flag (uint8), gauss (float64)) /
+            texts: number (uint16), then line, lifespan (uint16) / age (float64) / length (uint16) / utf-8 text
+
+The entities are stored by columns (as in RockStore and ExplosionBatch),
+each column aligned on 8 bytes: a column is read without copy, as a
+memoryview cast (or a NumPy array over the buffer), and Snapshot only
+locates the columns (nothing is decoded until a value is read).
+
+Fields are packed in fixed point (EXACT flag not set):
+    x, y        uint16  fraction of the world (1/65536 of its width, height)
+    vx, vy      int16   1/256 pixel per frame
+    angle       uint16  1/65536 turn (modulo 1 turn)
+    angle_vel   int16   1/65536 turn per frame
+    mass        uint16  1/65536
+    age         uint16  1/16 frame (saturated: only the rocks, which never die, get older)
+    scale       uint8   1/50 (explosions)
+    thrust, sheet uint8
+so that a rock or a missile takes 16 bytes (EXACT flag set: float64 fields,
+64 bytes, and a restored world plays exactly as the original).
+
+A delta snapshot (DELTA flag set) is encoded against a previous snapshot
+(its base, at 'base time') by a SnapshotEncoder. For each group:
+    number of entities (uint32) / number of runs (uint32) /
+    runs: first entity of the base (uint32, NEW for new entities) / length (uint32)
+    masks: one uint8 per entity (bit i set -> field i is in the delta)
+    for each field: number of values (uint32), then the values of the entities with this bit set
+The runs tell where each entity comes from in the base (the groups keep
+their order, so a few runs describe a whole group). A field not in the
+delta is predicted from the base: x, y and angle moved along their
+velocity, age increased by the time elapsed, the others unchanged. The
+fixed point positions and angles are only sent when the prediction is
+off by more than TOLERANCE (the encoder keeps the base as decoded, so the
+error does not add up from one delta to the next).
+
+apply_delta(base, delta) returns the snapshot (not delta) the delta
+describes, and restore(world, snapshot) puts a world in its state.
+
+"""
+##################################################################
+
+import array
+import math
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import world as world_module
+
+MAGIC = b"ASNP"
+VERSION = 1
+
+# flags
+DELTA = 1
+EXACT = 2
+STATE = 4
+
+HEADER = struct.Struct("<4sHHIHHiiddd")
+COUNT = struct.Struct("<I")
+RUN = struct.Struct("<II")
+STATE_HEADER = struct.Struct("<QBd4I")
+RANDOM = struct.Struct("<625IBd")
+TEXT = struct.Struct("<HHdH")
+
+# first entity of a run of new entities
+NEW = 0xFFFFFFFF
+
+# fields of each group: (name, kind)
+SHIP_FIELDS = (("x", "pos"), ("y", "pos"), ("vx", "vel"), ("vy", "vel"),
+               ("angle", "angle"), ("angle_vel", "angle_vel"), ("thrust", "flag"))
+SPRITE_FIELDS = (("x", "pos"), ("y", "pos"), ("vx", "vel"), ("vy", "vel"),
+                 ("angle", "angle"), ("angle_vel", "angle_vel"), ("mass", "mass"), ("age", "age"))
+EXPLOSION_FIELDS = (("x", "pos"), ("y", "pos"), ("scale", "scale"), ("sheet", "flag"), ("age", "age"))
+GROUPS = (("ship", SHIP_FIELDS), ("rocks", SPRITE_FIELDS), ("missiles", SPRITE_FIELDS), ("explosions", EXPLOSION_FIELDS))
+
+# kind -> (typecode, units per unit of value, lowest, highest) in fixed point
+# (the positions and the angles wrap around: their units are set by the size of the world / by 1 turn)
+FIXED = {"pos":       ("H", None, 0, 65535),
+         "angle":     ("H", 65536.0 / (2.0 * math.pi), 0, 65535),
+         "vel":       ("h", 256.0, -32768, 32767),
+         "angle_vel": ("h", 65536.0 / (2.0 * math.pi), -32768, 32767),
+         "mass":      ("H", 65536.0, 0, 65535),
+         "age":       ("H", 16.0, 0, 65535),
+         "scale":     ("B", 50.0, 0, 255),
+         "flag":      ("B", 1.0, 0, 255)}
+
+# fields moved along a velocity by the prediction of a delta
+MOTION = {"x": "vx", "y": "vy", "angle": "angle_vel"}
+
+# largest error (in units) of a predicted fixed point field that is not sent
+TOLERANCE = {"pos": 8, "angle": 32}
+
+# memoryview.cast reads the columns in place on little endian machines only
+LITTLE_ENDIAN = (sys.byteorder == "little")
+
+##################################################################
+
+# columns (numpy arrays, or lists without numpy)
+
+def typecode(kind, exact):
+    if exact and kind != "flag":
+        return "d"
+    return FIXED[kind][0]
+
+def quantize(kind, values, size, exact):
+    # return the column of 'values' as stored (fixed point integers, or floats if exact)
+    code, units, low, high = FIXED[kind]
+    if kind == "pos":
+        units = 65536.0 / size
+    if numpy is not None:
+        # (a copy: the columns of the NumPy rocks are views of their arrays)
+        values = numpy.array(values, dtype = float)
+        if exact and kind != "flag":
+            return values
+        q = numpy.floor(values * units + 0.5)
+        if kind in ("pos", "angle"):
+            q %= 65536
+        else:
+            q = numpy.clip(q, low, high)
+        return q.astype(numpy.int64)
+    if exact and kind != "flag":
+        return [float(v) for v in values]
+    if kind in ("pos", "angle"):
+        return [int(math.floor(v * units + 0.5)) % 65536 for v in values]
+    return [max(low, min(high, int(math.floor(v * units + 0.5)))) for v in values]
+
+def dequantize(kind, column, size, exact):
+    # return the values of a column (numpy array, or list)
+    if exact:
+        if numpy is not None:
+            return numpy.asarray(column, dtype = float)
+        return [float(q) for q in column]
+    units = FIXED[kind][1]
+    if kind == "pos":
+        units = 65536.0 / size
+    if numpy is not None:
+        return numpy.asarray(column, dtype = float) / units
+    return [q / units for q in column]
+
+def column_bytes(column, code):
+    # the column packed (little endian)
+    if numpy is not None:
+        return numpy.asarray(column).astype("<" + numpy.dtype(code).char).tobytes()
+    packed = array.array(code, column)
+    if not LITTLE_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+def read_column(buffer, offset, count, code):
+    # the column of 'count' values at 'offset' of 'buffer', without copy if possible
+    if numpy is not None:
+        return numpy.frombuffer(buffer, dtype = "<" + numpy.dtype(code).char, count = count, offset = offset)
+    size = struct.calcsize(code)
+    view = memoryview(buffer)[offset:offset + count * size]
+    if LITTLE_ENDIAN:
+        return view.cast(code)
+    column = array.array(code)
+    column.frombytes(view.tobytes())
+    column.byteswap()
+    return column
+
+def padding(offset):
+    # bytes of padding to the next multiple of 8
+    return (-offset) % 8
+
+def predict(fields, base, sources, dt, width, height, exact):
+    # return the columns {field: values} of the entities of the base 'sources' (indexes) after 'dt' frames
+    result = {}
+    if numpy is not None:
+        sources = numpy.asarray(sources, dtype = numpy.intp)
+    for name, kind in fields:
+        if numpy is not None:
+            values = numpy.asarray(base[name])[sources]
+        else:
+            column = base[name]
+            values = [column[i] for i in sources]
+        if name in MOTION and MOTION[name] in base:
+            if numpy is not None:
+                vel = numpy.asarray(base[MOTION[name]])[sources]
+            else:
+                column = base[MOTION[name]]
+                vel = [column[i] for i in sources]
+            size = width if name == "x" else height
+            if exact:
+                if kind == "pos":
+                    values = move(values, vel, dt, size)
+                else:
+                    values = move(values, vel, dt, None)
+            elif kind == "pos":
+                # velocity units (1/256 pixel per frame) -> position units (size / 65536)
+                values = move_fixed(values, vel, dt * 65536.0 / (256.0 * size))
+            else:
+                values = move_fixed(values, vel, dt)
+        elif name == "age":
+            if exact:
+                values = move(values, [1.0] * len(sources) if numpy is None else 1.0, dt, None)
+            else:
+                high = FIXED["age"][3]
+                step = int(math.floor(dt * FIXED["age"][1] + 0.5))
+                if numpy is not None:
+                    values = numpy.minimum(values + step, high)
+                else:
+                    values = [min(v + step, high) for v in values]
+        result[name] = values
+    return result
+
+def move(values, vel, dt, size):
+    # values + vel * dt (modulo size if not None), in floats
+    if numpy is not None:
+        values = values + vel * dt
+        if size is not None:
+            values %= size
+        return values
+    if size is None:
+        return [values[i] + vel[i] * dt for i in range(0, len(values))]
+    return [(values[i] + vel[i] * dt) % size for i in range(0, len(values))]
+
+def move_fixed(values, vel, factor):
+    # values + vel * factor (rounded, modulo 1 turn or the size of the world), in fixed point
+    if numpy is not None:
+        return (values + numpy.floor(vel * factor + 0.5).astype(numpy.int64)) % 65536
+    return [(values[i] + int(math.floor(vel[i] * factor + 0.5))) % 65536 for i in range(0, len(values))]
+
+def is_off(kind, actual, predicted, exact):
+    # return the mask of the values too far from their prediction (numpy array or list of booleans)
+    tolerance = 0 if exact else TOLERANCE.get(kind, 0)
+    if numpy is not None:
+        error = numpy.abs(numpy.asarray(actual) - numpy.asarray(predicted))
+        if not exact and kind in ("pos", "angle"):
+            error = numpy.minimum(error, 65536 - error)
+        return error > tolerance
+    if not exact and kind in ("pos", "angle"):
+        return [min(abs(a - p), 65536 - abs(a - p)) > tolerance for a, p in zip(actual, predicted)]
+    return [abs(a - p) > tolerance for a, p in zip(actual, predicted)]
+
+##################################################################
+
+# writing
+
+def write_snapshot(header, groups, state, exact):
+    # return the snapshot (not delta) of 'header' (values of HEADER after the magic number and the version),
+    # groups {name: (count, {field: column})} and 'state' (bytes of the STATE section, or None)
+    chunks = [HEADER.pack(MAGIC, VERSION, *header)]
+    offset = HEADER.size
+    for name, fields in GROUPS:
+        count, columns = groups[name]
+        chunks.append(COUNT.pack(count))
+        offset += COUNT.size
+        for field, kind in fields:
+            pad = padding(offset)
+            data = column_bytes(columns[field], typecode(kind, exact))
+            chunks.append(b"\0" * pad)
+            chunks.append(data)
+            offset += pad + len(data)
+    if state is not None:
+        chunks.append(b"\0" * padding(offset))
+        chunks.append(state)
+    return b"".join(chunks)
+
+def state_bytes(world):
+    # STATE section of 'world'
+    version, internal, gauss = world.random.getstate()
+    stats = world.get_stats()
+    chunks = [STATE_HEADER.pack(world.seed, world.bounce_mode, world.accumulator, stats["ship_crashes"], stats["rock_hits"],
+                                stats["rock_bounces"], stats["hyperspace_jumps"]),
+              RANDOM.pack(*(tuple(internal) + (gauss is not None, gauss or 0.0))),
+              COUNT.pack(len(world.text_group))]
+    for text in world.text_group:
+        data = text.text.encode("utf-8")
+        chunks.append(TEXT.pack(text.y, text.lifespan, text.age, len(data)))
+        chunks.append(data)
+    return b"".join(chunks)
+
+def world_groups(world):
+    # return {group: (keys, {field: values})} of 'world' (keys: identity of the entities, in order)
+    ship = world.my_ship
+    result = {"ship": ([ship], {"x": [ship.pos[0]], "y": [ship.pos[1]], "vx": [ship.vel[0]], "vy": [ship.vel[1]],
+                                "angle": [ship.angle], "angle_vel": [ship.angle_vel], "thrust": [int(ship.thrust)]})}
+    for name, group in (("rocks", world.rock_group), ("missiles", world.missile_group)):
+        sprites = list(group)
+        store = getattr(group, "store", None)
+        if store is not None:
+            # NumPy rocks (engine/physics.py): the arrays are the columns
+            n = store.n
+            columns = {"x": store.pos[:n, 0], "y": store.pos[:n, 1], "vx": store.vel[:n, 0], "vy": store.vel[:n, 1],
+                       "angle": store.angle[:n], "angle_vel": store.angle_vel[:n], "mass": store.mass[:n], "age": store.age[:n]}
+        else:
+            columns = {"x": [s.pos[0] for s in sprites], "y": [s.pos[1] for s in sprites],
+                       "vx": [s.vel[0] for s in sprites], "vy": [s.vel[1] for s in sprites],
+                       "angle": [s.angle for s in sprites], "angle_vel": [s.angle_vel for s in sprites],
+                       "mass": [s.mass for s in sprites], "age": [s.age for s in sprites]}
+        result[name] = (sprites, columns)
+    explosions = world.explosions
+    # (the explosions do not move: they are known by where they are)
+    result["explosions"] = (list(zip(explosions.x, explosions.y, explosions.scale, explosions.sheet)),
+                            {"x": explosions.x, "y": explosions.y, "scale": explosions.scale,
+                             "sheet": explosions.sheet, "age": explosions.age})
+    return result
+
+def encode(world, exact = False, state = False):
+    # return a snapshot (not delta) of 'world'
+    return SnapshotEncoder(exact, state).encode(world, delta = False)
+
+##################################################################
+
+
+# SnapshotEncoder class (snapshots of a world, each one a delta against the previous one)
+class SnapshotEncoder:
+    def __init__(self, exact = False, state = False):
+        # exact -> float64 fields / state -> STATE section
+        self.exact = exact
+        self.state = state
+        # the last snapshot as decoded: time, size of the world, {group: (keys, {field: column as stored})}
+        self.base = None
+        # statistics
+        self.snapshots = 0
+        self.deltas = 0
+        return
+
+    def encode(self, world, delta = True):
+        # return a snapshot of 'world' (a delta against the previous one if 'delta' and there is one)
+        exact = self.exact
+        flags = (EXACT if exact else 0) | (STATE if self.state else 0)
+        groups = world_groups(world)
+        width = world_module.WORLD_WIDTH
+        height = world_module.WORLD_HEIGHT
+        quantized = {}
+        for name, fields in GROUPS:
+            keys, columns = groups[name]
+            quantized[name] = (keys, dict((field, quantize(kind, columns[field], height if field == "y" else width, exact))
+                                          for field, kind in fields))
+        state = state_bytes(world) if self.state else None
+        base = self.base
+        if delta and base is not None and base[1] == (width, height):
+            flags |= DELTA
+            header = (flags, world.ticks, width, height, int(world.score), world.lives,
+                      world.time, base[0], world.ship_stillness)
+            chunks, decoded = self.encode_delta(header, quantized, world.time - base[0])
+            if state is not None:
+                chunks.append(b"\0" * padding(sum(len(chunk) for chunk in chunks)))
+                chunks.append(state)
+            result = b"".join(chunks)
+            self.deltas += 1
+        else:
+            header = (flags, world.ticks, width, height, int(world.score), world.lives,
+                      world.time, world.time, world.ship_stillness)
+            result = write_snapshot(header, dict((name, (len(quantized[name][0]), quantized[name][1])) for name in quantized),
+                                    state, exact)
+            decoded = dict((name, quantized[name][1]) for name in quantized)
+        self.base = (world.time, (width, height),
+                     dict((name, (quantized[name][0], decoded[name])) for name in quantized))
+        self.snapshots += 1
+        return result
+
+    def encode_delta(self, header, quantized, dt):
+        # return the chunks of the delta against the base, and the columns as decoded {group: {field: column}}
+        chunks = [HEADER.pack(MAGIC, VERSION, *header)]
+        offset = HEADER.size
+        decoded = {}
+        for name, fields in GROUPS:
+            keys, columns = quantized[name]
+            base_keys, base_columns = self.base[2][name]
+            runs, sources = match(base_keys, keys)
+            masks, values, decoded[name] = delta_columns(fields, base_columns, sources, columns, dt,
+                                                         header[2], header[3], self.exact)
+            chunks.append(COUNT.pack(len(keys)) + COUNT.pack(len(runs)) + b"".join(RUN.pack(*run) for run in runs))
+            chunks.append(column_bytes(masks, "B"))
+            offset += 2 * COUNT.size + len(runs) * RUN.size + len(keys)
+            for field, kind in fields:
+                pad = padding(offset + COUNT.size)
+                data = column_bytes(values[field], typecode(kind, self.exact))
+                chunks.append(COUNT.pack(len(values[field])) + b"\0" * pad)
+                chunks.append(data)
+                offset += COUNT.size + pad + len(data)
+        return chunks, decoded
+
+##################################################################
+
+def match(base_keys, keys):
+    # return the runs [(first entity of the base or NEW, length)] and the entity of the base of each key (or NEW)
+    # (a key found several times in the base is its first entity: a prediction from another entity is only
+    # less accurate, so the fields off are sent)
+    index = dict(zip(reversed(base_keys), range(len(base_keys) - 1, -1, -1)))
+    sources = [index.get(key, NEW) for key in keys]
+    if numpy is not None:
+        s = numpy.asarray(sources, dtype = numpy.int64)
+        # a run starts where an entity does not follow the previous one of the base (and is not new after a new one)
+        follows = ((s[1:] == s[:-1] + 1) & (s[1:] != NEW)) | ((s[1:] == NEW) & (s[:-1] == NEW))
+        starts = numpy.concatenate(([0], numpy.nonzero(~follows)[0] + 1)) if len(s) else numpy.zeros(0, dtype = numpy.int64)
+        lengths = numpy.diff(numpy.append(starts, len(s)))
+        return list(zip(s[starts].tolist(), lengths.tolist())), sources
+    runs = []
+    for source in sources:
+        if runs and ((source == NEW and runs[-1][0] == NEW) or
+                     (source != NEW and runs[-1][0] != NEW and runs[-1][0] + runs[-1][1] == source)):
+            runs[-1][1] += 1
+        else:
+            runs.append([source, 1])
+    return [tuple(run) for run in runs], sources
+
+def delta_columns(fields, base, sources, columns, dt, width, height, exact):
+    # return the masks, the values sent {field: values} and the columns as decoded {field: column} of the entities
+    # of 'columns' (entity j is entity sources[j] of 'base', or NEW)
+    count = len(sources)
+    kept = [j for j in range(0, count) if sources[j] != NEW]
+    predicted = predict(fields, base, [sources[j] for j in kept], dt, width, height, exact)
+    values = {}
+    decoded = {}
+    if numpy is not None:
+        kept = numpy.asarray(kept, dtype = numpy.intp)
+        masks = numpy.zeros(count, dtype = numpy.uint8)
+        for bit in range(0, len(fields)):
+            field, kind = fields[bit]
+            column = numpy.array(columns[field])
+            off = is_off(kind, column[kept], predicted[field], exact)
+            sent = numpy.ones(count, dtype = bool)
+            sent[kept] = off
+            masks |= sent.astype(numpy.uint8) << bit
+            values[field] = column[sent]
+            column[kept[~off]] = predicted[field][~off]
+            decoded[field] = column
+        return masks, values, decoded
+    masks = [0] * count
+    for bit in range(0, len(fields)):
+        field, kind = fields[bit]
+        column = list(columns[field])
+        off = is_off(kind, [column[j] for j in kept], predicted[field], exact)
+        sent = [True] * count
+        for k in range(0, len(kept)):
+            if not off[k]:
+                sent[kept[k]] = False
+                column[kept[k]] = predicted[field][k]
+        values[field] = [columns[field][j] for j in range(0, count) if sent[j]]
+        for j in range(0, count):
+            if sent[j]:
+                masks[j] |= 1 << bit
+        decoded[field] = column
+    return masks, values, decoded
+
+def apply_delta(base, delta):
+    # return the snapshot (not delta) described by 'delta' (bytes) applied to 'base' (Snapshot of its base)
+    (magic, version, flags, ticks, width, height, score, lives,
+     time, base_time, ship_stillness) = HEADER.unpack_from(delta, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a snapshot of version %d" % VERSION)
+    if not flags & DELTA:
+        return bytes(delta)
+    exact = bool(flags & EXACT)
+    if base.time != base_time or base.exact != exact:
+        raise ValueError("the delta (base time %s) does not apply to this snapshot (time %s)" % (base_time, base.time))
+    offset = HEADER.size
+    groups = {}
+    for name, fields in GROUPS:
+        count, n_runs = struct.unpack_from("<II", delta, offset)
+        offset += 2 * COUNT.size
+        runs = [RUN.unpack_from(delta, offset + i * RUN.size) for i in range(0, n_runs)]
+        offset += n_runs * RUN.size
+        masks = read_column(delta, offset, count, "B")
+        offset += count
+        sources = []
+        for first, length in runs:
+            sources.extend([NEW] * length if first == NEW else range(first, first + length))
+        kept = [j for j in range(0, count) if sources[j] != NEW]
+        predicted = predict(fields, dict((field, base.column(name, field)) for field, kind in fields),
+                            [sources[j] for j in kept], time - base_time, width, height, exact)
+        columns = {}
+        for bit in range(0, len(fields)):
+            field, kind = fields[bit]
+            n = COUNT.unpack_from(delta, offset)[0]
+            offset += COUNT.size
+            offset += padding(offset)
+            code = typecode(kind, exact)
+            values = read_column(delta, offset, n, code)
+            offset += n * struct.calcsize(code)
+            if numpy is not None:
+                column = numpy.zeros(count, dtype = float if exact and kind != "flag" else numpy.int64)
+                column[numpy.asarray(kept, dtype = numpy.intp)] = predicted[field]
+                column[(numpy.asarray(masks) >> bit & 1).astype(bool)] = values
+            else:
+                column = [0] * count
+                for k in range(0, len(kept)):
+                    column[kept[k]] = predicted[field][k]
+                v = 0
+                for j in range(0, count):
+                    if masks[j] >> bit & 1:
+                        column[j] = values[v]
+                        v += 1
+            columns[field] = column
+        groups[name] = (count, columns)
+    state = None
+    if flags & STATE:
+        state = bytes(delta[offset + padding(offset):])
+    return write_snapshot((flags & ~DELTA, ticks, width, height, score, lives, time, time, ship_stillness), groups, state, exact)
+
+##################################################################
+
+
+# Snapshot class (reads a snapshot in place)
+class Snapshot:
+    def __init__(self, buffer):
+        # buffer: bytes, bytearray, memoryview, mmap...
+        self.buffer = buffer
+        (magic, version, self.flags, self.ticks, self.width, self.height, self.score, self.lives,
+         self.time, self.base_time, self.ship_stillness) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a snapshot")
+        if version != VERSION:
+            raise ValueError("snapshot version %d is not supported (version %d)" % (version, VERSION))
+        if self.flags & DELTA:
+            raise ValueError("delta snapshot: apply it to its base first (see apply_delta)")
+        self.exact = bool(self.flags & EXACT)
+        # group -> number of entities / (group, field) -> (offset, typecode) of the column
+        self.counts = {}
+        self.columns = {}
+        offset = HEADER.size
+        for name, fields in GROUPS:
+            count = COUNT.unpack_from(buffer, offset)[0]
+            offset += COUNT.size
+            self.counts[name] = count
+            for field, kind in fields:
+                offset += padding(offset)
+                code = typecode(kind, self.exact)
+                self.columns[(name, field)] = (offset, code)
+                offset += count * struct.calcsize(code)
+        self.state_offset = offset + padding(offset) if self.flags & STATE else None
+        return
+
+    def count(self, group):
+        return self.counts[group]
+
+    def column(self, group, field):
+        # the column of 'field' of 'group' as stored (fixed point), read in place
+        offset, code = self.columns[(group, field)]
+        return read_column(self.buffer, offset, self.counts[group], code)
+
+    def values(self, group, field):
+        # the values of 'field' of 'group' (numpy array, or list)
+        kind = dict(dict(GROUPS)[group])[field]
+        return dequantize(kind, self.column(group, field), self.height if field == "y" else self.width, self.exact)
+
+    def entity(self, group, i):
+        # return the fields of entity i of 'group' {field: value}
+        result = {}
+        for field, kind in dict(GROUPS)[group]:
+            offset, code = self.columns[(group, field)]
+            q = struct.unpack_from("<" + code, self.buffer, offset + i * struct.calcsize(code))[0]
+            result[field] = dequantize(kind, [q], self.height if field == "y" else self.width, self.exact)[0]
+        return result
+
+    def rows(self, group):
+        # return the list of the entities of 'group' as tuples (in the order of the fields)
+        columns = [self.values(group, field) for field, kind in dict(GROUPS)[group]]
+        return [tuple(float(v) for v in row) for row in zip(*columns)]
+
+    def state(self):
+        # return the STATE section as a dictionary (None if there is none)
+        if self.state_offset is None:
+            return None
+        buffer = self.buffer
+        offset = self.state_offset
+        seed, bounce_mode, accumulator, crashes, hits, bounces, jumps = STATE_HEADER.unpack_from(buffer, offset)
+        offset += STATE_HEADER.size
+        random_state = RANDOM.unpack_from(buffer, offset)
+        offset += RANDOM.size
+        texts = []
+        count = COUNT.unpack_from(buffer, offset)[0]
+        offset += COUNT.size
+        for i in range(0, count):
+            line, lifespan, age, length = TEXT.unpack_from(buffer, offset)
+            offset += TEXT.size
+            texts.append((bytes(buffer[offset:offset + length]).decode("utf-8"), line, lifespan, age))
+            offset += length
+        return {"seed":        seed,
+                "bounce_mode": bool(bounce_mode),
+                "accumulator": accumulator,
+                "stats":       {"ship_crashes": crashes, "rock_hits": hits, "rock_bounces": bounces, "hyperspace_jumps": jumps},
+                "random":      (3, tuple(random_state[:625]), random_state[626] if random_state[625] else None),
+                "texts":       texts}
+
+    def to_state(self, world):
+        # return the state of World.save_state() described by the snapshot
+        # (without a STATE section, the random state, seed, statistics... are those of 'world', and there is no text)
+        state = self.state()
+        if state is None:
+            state = {"seed":        world.seed,
+                     "bounce_mode": world.bounce_mode,
+                     "accumulator": world.accumulator,
+                     "stats":       world.get_stats(),
+                     "random":      world.random.getstate(),
+                     "texts":       []}
+        x, y, vx, vy, angle, angle_vel, thrust = self.rows("ship")[0]
+        # (save_state order: x, y, vx, vy, mass, angle, angle_vel, age)
+        sprites = [[(x, y, vx, vy, mass, angle, angle_vel, age)
+                    for x, y, vx, vy, angle, angle_vel, mass, age in self.rows(group)]
+                   for group in ("rocks", "missiles")]
+        state.update({"score":          self.score,
+                      "lives":          self.lives,
+                      "time":           self.time,
+                      "ticks":          self.ticks,
+                      "ship_stillness": self.ship_stillness,
+                      "ship":           (x, y, vx, vy, angle, angle_vel, bool(thrust)),
+                      "rocks":          sprites[0],
+                      "missiles":       sprites[1],
+                      "explosions":     [(x, y, scale, int(sheet), age) for x, y, scale, sheet, age in self.rows("explosions")]})
+        return state
+
+def restore(world, snapshot):
+    # put 'world' in the state of 'snapshot' (Snapshot, or bytes of a snapshot that is not a delta)
+    if not isinstance(snapshot, Snapshot):
+        snapshot = Snapshot(snapshot)
+    world.load_state(snapshot.to_state(world))
+    return world
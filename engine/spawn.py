@@ -0,0 +1,170 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - placement of the new rocks                         #
+# ---------------------------------------------------------------- #
+"""
+
+Rocks are spawned on an edge of the view of the world (the canvas), at a
+free point: not too close to the ship, and not overlapping an existing
+rock (in bounce mode).
+
+Instead of drawing random points until one is free (which spins when the
+edges are crowded), the free intervals of each edge are computed from the
+obstacles (each obstacle blocks the interval of the edge within its
+distance), and a point is drawn among the free points only. The cost is
+bounded (proportional to the number of obstacles), and there is no point
+at all when the edges are full.
+
+When the edges are nearly empty, a few random points are tried first
+(rejection sampling, stopped after SAMPLE_TRIES points): a free point is
+usually found at the first try, for less than the cost of the intervals.
+Either way, the free points are drawn with the same probabilities.
+
+The edges are the edges of a frame (x0, y0, frame_width, frame_height) of
+the world: by default the whole world, whose edges are the lines where
+opposite sides are connected. An edge is a line of integer points
+k = 0 .. length - 1 (coordinates modulo the size of the world):
+    "left"   -> (x0, y0 + k)                    "right"  -> (x0 + frame_width - 1, y0 + k)
+    "top"    -> (x0 + k, y0)                    "bottom" -> (x0 + k, y0 + frame_height - 1)
+
+"""
+##################################################################
+
+import math
+
+# edge -> (fixed coordinate index, position of the edge in the frame (None -> last point), coordinate along the edge)
+EDGES = {"left":   (0, 0,    1),
+         "right":  (0, None, 1),
+         "top":    (1, 0,    0),
+         "bottom": (1, None, 0)}
+
+# number of random points tried before the free intervals are computed
+SAMPLE_TRIES = 4
+
+##################################################################
+
+def edge_length(edge, frame):
+    # number of points of 'edge' of 'frame'
+    return frame[2 + EDGES[edge][2]]
+
+def edge_point(edge, k, frame, width, height):
+    # point number k of 'edge' of 'frame' (in a world of size width x height)
+    fixed, line, along = EDGES[edge]
+    if line is None:
+        line = frame[2 + fixed] - 1
+    size = (width, height)
+    point = [0, 0]
+    point[fixed] = (frame[fixed] + line) % size[fixed]
+    point[along] = (frame[along] + k) % size[along]
+    return (point[0], point[1])
+
+def is_free(point, obstacles, width, height):
+    # True if 'point' is further than its distance from all the obstacles (distance measured around the world)
+    x, y = point
+    for positions, distance in obstacles:
+        distance_squared = distance * distance
+        for pos in positions:
+            # (most obstacles are too far along x: one test)
+            dx = abs(x - pos[0]) % width
+            if dx > distance and width - dx > distance:
+                continue
+            dy = abs(y - pos[1]) % height
+            dx = min(dx, width - dx)
+            dy = min(dy, height - dy)
+            if dx * dx + dy * dy <= distance_squared:
+                return False
+    return True
+
+def free_intervals(edge, obstacles, width, height, frame = None):
+    # return the sorted list of the free intervals (first, last) of 'edge' of 'frame' (points first to last
+    # included, default frame: the whole world)
+    # obstacles: list of (positions, distance): the points of the edge within 'distance' of one of the
+    # 'positions' (distance measured around the world, see torus_dist_squared) are not free
+    if frame is None:
+        frame = (0, 0, width, height)
+    fixed, line, along = EDGES[edge]
+    size = (width, height)
+    if line is None:
+        line = frame[2 + fixed] - 1
+    side = size[fixed]
+    world_length = size[along]
+    length = frame[2 + along]
+    # coordinates of the edge in the world: line (across), origin (along)
+    line += frame[fixed]
+    origin = frame[along]
+    blocked = []
+    for positions, distance in obstacles:
+        for pos in positions:
+            # distance of the obstacle to the line of the edge
+            d = abs(pos[fixed] - line) % side
+            if d > distance and side - d > distance:
+                continue
+            d = min(d, side - d)
+            # blocked points: along the edge, within 'half' of the obstacle
+            half = math.sqrt(distance * distance - d * d)
+            if 2 * half >= world_length:
+                return []
+            a = (pos[along] - origin) % world_length
+            first = int(math.ceil(a - half))
+            last = int(math.floor(a + half))
+            if first > last:
+                continue
+            if first >= 0 and last < length:
+                blocked.append((first, last))
+                continue
+            # (intervals across the end of the world are cut in two, and cut at the ends of the edge)
+            for shift in (-world_length, 0, world_length):
+                low = max(first + shift, 0)
+                high = min(last + shift, length - 1)
+                if low <= high:
+                    blocked.append((low, high))
+    blocked.sort()
+    # free intervals: between the (merged) blocked intervals
+    result = []
+    start = 0
+    for first, last in blocked:
+        if first > start:
+            result.append((start, first - 1))
+        start = max(start, last + 1)
+    if start < length:
+        result.append((start, length - 1))
+    return result
+
+def pick_point(edges, obstacles, rnd, width, height, frame = None):
+    # return a free point drawn from 'edges' of 'frame' (default: the whole world), None if there is no free point
+    # an edge is drawn at random, then a point of this edge: so the free points are drawn with the same
+    # probabilities as drawing points until one is free (each edge is weighted by 1 / its length)
+    if frame is None:
+        frame = (0, 0, width, height)
+    # cheap path: a few points drawn that way (an edge, then a point of the edge), the first free one is kept
+    for attempt in range(0, SAMPLE_TRIES):
+        edge = edges[rnd.randrange(len(edges))]
+        point = edge_point(edge, rnd.randrange(edge_length(edge, frame)), frame, width, height)
+        if is_free(point, obstacles, width, height):
+            return point
+    # crowded edges: draw among the free intervals
+    free = []
+    weights = []
+    for edge in edges:
+        intervals = free_intervals(edge, obstacles, width, height, frame)
+        count = sum(last - first + 1 for first, last in intervals)
+        free.append((edge, intervals, count))
+        weights.append(float(count) / edge_length(edge, frame))
+    total = sum(weights)
+    if total == 0.0:
+        return None
+    # draw the edge
+    edge, intervals, count = [f for f in free if f[2] > 0][-1]
+    if len(edges) > 1:
+        r = rnd.random() * total
+        for i in range(0, len(edges)):
+            if r < weights[i] and free[i][2] > 0:
+                edge, intervals, count = free[i]
+                break
+            r -= weights[i]
+    # draw the point of the edge
+    k = rnd.randrange(count)
+    for first, last in intervals:
+        if k <= last - first:
+            return edge_point(edge, first + k, frame, width, height)
+        k -= last - first + 1
+    return None
@@ -0,0 +1,218 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - telemetry ring buffer                              #
+# ---------------------------------------------------------------- #
+"""
+
+Always-on telemetry of long running sessions: one record per tick in a
+fixed-size ring buffer, memory-mapped to a file, so that the session can
+run for days in constant space, and another process can read the ring
+while the game runs (python -m engine.telemetry <ring>).
+
+Ring file (little endian):
+    header: "ATLM" / version (uint16) / record size (uint16) / capacity (uint32) / reserved (uint32) /
+            number of records written (uint64), padded to HEADER_SIZE bytes
+    records (RECORD): tick (uint32) / frame time (float32, seconds) / wall clock time (float64, seconds) /
+            rocks, missiles, explosions (uint16) /
+            rock bounces, rock hits, ship crashes of the tick (uint16) / ship stillness (float32)
+Record n is in slot n % capacity. The writer writes the record, then the
+number of records: a reader reads the number, the records, then the
+number again, and drops the records overwritten in between.
+
+Writing a record is one struct.pack_into in the mapped file (no system
+call: the system writes the pages back). The frame time is the time
+between two frames of the front-end (given by it in 'frame_time', 0 when
+headless).
+
+When World.telemetry is None, no record is written.
+
+command line:  python -m engine.telemetry <ring> [--last N] [--bins 10] [--follow SECONDS]
+
+"""
+##################################################################
+
+from __future__ import print_function
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"ATLM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+COUNT = struct.Struct("<Q")
+COUNT_OFFSET = HEADER.size
+HEADER_SIZE = 32
+RECORD = struct.Struct("<IfdHHHHHHf")
+
+FIELDS = ("tick", "frame_time", "wall_time", "rocks", "missiles", "explosions",
+          "rock_bounces", "rock_hits", "ship_crashes", "ship_stillness")
+
+# 2^20 records of 32 bytes (32 MB): about 4h50 of play at 60 ticks per second
+CAPACITY = 2 ** 20
+
+##################################################################
+
+
+# Telemetry class (writes the ring)
+class Telemetry:
+    def __init__(self, path, capacity = CAPACITY):
+        # open the ring 'path' (a ring of the same capacity goes on, anything else is replaced)
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * RECORD.size
+        header = HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, 0)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            same = (os.fstat(fd).st_size == size and os.read(fd, HEADER.size) == header)
+            if not same:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        if not same:
+            self.map[0:HEADER.size] = header
+            COUNT.pack_into(self.map, COUNT_OFFSET, 0)
+        self.count = COUNT.unpack_from(self.map, COUNT_OFFSET)[0]
+        # time between the last two frames of the front-end (seconds)
+        self.frame_time = 0.0
+        # totals of the world at the previous record (the records hold the increase of each tick)
+        self.last = None
+        return
+
+    def record(self, world):
+        # write the record of the tick just played by 'world'
+        totals = (world.rock_bounces, world.rock_hits, world.ship_crashes)
+        last = self.last
+        if last is None or totals[0] < last[0] or totals[1] < last[1] or totals[2] < last[2]:
+            # first record, or new game
+            last = (0, 0, 0)
+        RECORD.pack_into(self.map, HEADER_SIZE + (self.count % self.capacity) * RECORD.size,
+                         world.ticks & 0xFFFFFFFF, self.frame_time, time.time(),
+                         min(len(world.rock_group), 65535), min(len(world.missile_group), 65535),
+                         min(len(world.explosions), 65535), min(totals[0] - last[0], 65535),
+                         min(totals[1] - last[1], 65535), min(totals[2] - last[2], 65535), world.ship_stillness)
+        self.count += 1
+        COUNT.pack_into(self.map, COUNT_OFFSET, self.count)
+        self.last = totals
+        return
+
+    def close(self):
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        return
+
+
+# TelemetryReader class (reads the ring, while it is written)
+class TelemetryReader:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, record_size, self.capacity, reserved = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError("%s is not a telemetry ring of version %d" % (path, VERSION))
+        return
+
+    def count(self):
+        # number of records written so far
+        return COUNT.unpack_from(self.map, COUNT_OFFSET)[0]
+
+    def records(self, last = None):
+        # return the list of the records still in the ring (the 'last' ones at most), oldest first
+        end = self.count()
+        first = max(0, end - self.capacity)
+        if last is not None:
+            first = max(first, end - last)
+        view = memoryview(self.map)
+        chunks = []
+        # (at most two pieces: up to the end of the ring, and from its start)
+        n = first
+        while n < end:
+            slot = n % self.capacity
+            stop = min(end - n, self.capacity - slot)
+            start = HEADER_SIZE + slot * RECORD.size
+            chunks.append(bytes(view[start:start + stop * RECORD.size]))
+            n += stop
+        view.release()
+        # the records overwritten while they were read are dropped
+        overwritten = max(0, self.count() - self.capacity - first)
+        records = [record for chunk in chunks for record in RECORD.iter_unpack(chunk)]
+        return records[overwritten:]
+
+    def close(self):
+        self.map.close()
+        return
+
+##################################################################
+
+def summary(records):
+    # return [(field, mean, p50, p95, p99, max)] of the records (frame time in milliseconds)
+    result = []
+    for i in range(0, len(FIELDS)):
+        if FIELDS[i] in ("tick", "wall_time"):
+            continue
+        values = sorted(record[i] for record in records)
+        if FIELDS[i] == "frame_time":
+            values = [1000.0 * value for value in values]
+        rank = lambda p: values[int(round(p / 100.0 * (len(values) - 1)))]
+        result.append((FIELDS[i], sum(values) / len(values), rank(50), rank(95), rank(99), values[-1]))
+    return result
+
+def histogram(values, bins = 10, width = 40):
+    # return the lines of a text histogram of 'values'
+    low = min(values)
+    high = max(values)
+    step = (high - low) / float(bins) or 1.0
+    counts = [0] * bins
+    for value in values:
+        counts[min(bins - 1, int((value - low) / step))] += 1
+    top = max(counts)
+    return ["%10.2f - %10.2f %8d %s" % (low + k * step, low + (k + 1) * step, counts[k], "#" * int(round(width * counts[k] / float(top))))
+            for k in range(0, bins)]
+
+def report(reader, last, bins):
+    records = reader.records(last)
+    if not records:
+        print("no record")
+        return
+    span = records[-1][2] - records[0][2]
+    print("%d records (ticks %d to %d, %.1f s), %d written" % (len(records), records[0][0], records[-1][0], span, reader.count()))
+    print("%-15s %10s %10s %10s %10s %10s" % ("", "mean", "p50", "p95", "p99", "max"))
+    for field, mean, p50, p95, p99, high in summary(records):
+        print("%-15s %10.2f %10.2f %10.2f %10.2f %10.2f" % (field + (" (ms)" if field == "frame_time" else ""),
+                                                             mean, p50, p95, p99, high))
+    for field in ("frame_time", "rocks", "explosions"):
+        i = FIELDS.index(field)
+        values = [record[i] * (1000.0 if field == "frame_time" else 1) for record in records]
+        print("")
+        print(field + (" (ms)" if field == "frame_time" else ""))
+        for line in histogram(values, bins):
+            print(line)
+    return
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog = "python -m engine.telemetry", description = "Summary of a telemetry ring.")
+    parser.add_argument("ring")
+    parser.add_argument("--last", type = int, default = None, help = "only the last N records")
+    parser.add_argument("--bins", type = int, default = 10, help = "bins of the histograms")
+    parser.add_argument("--follow", type = float, default = None, metavar = "SECONDS", help = "report again every SECONDS")
+    args = parser.parse_args(argv[1:])
+    reader = TelemetryReader(args.ring)
+    try:
+        while True:
+            report(reader, args.last, args.bins)
+            if args.follow is None:
+                break
+            time.sleep(args.follow)
+            print("")
+    except KeyboardInterrupt:
+        pass
+    reader.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,1050 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - headless world                                     #
+# ---------------------------------------------------------------- #
+"""
+
+World of Asteroids: ship, rocks, missiles, explosions and texts, and all the
+rules of the game (gravity, bounce, collisions, scoring, hyperspace...).
+
+Nothing in this module draws or plays sound: the World only records which
+sounds should be played in 'World.sounds' (a list of sound names), and the
+front-end (Asteroids.py) empties that list after each frame.
+
+The game is deterministic: all the randomness comes from 'World.random'
+(seeded by World(seed)), the groups are iterated in insertion order, and
+rocks are spawned every SPAWN_TICKS ticks. The same seed and the same
+inputs (at the same ticks) give exactly the same game.
+
+Usage (headless):
+    world = World(seed = 1)
+    for tick in range(0, 3600):
+        world.tick()
+
+"""
+##################################################################
+
+import math
+import random
+
+from .grid import SpatialGrid
+from .group import Group
+from .effects import ExplosionBatch
+from .pool import Pool
+from .spawn import pick_point
+
+# size of the canvas (the view of the world)
+WIDTH  = 800
+HEIGHT = 600
+
+# size of the world (opposite sides are connected): at least the size of the canvas
+# when the world is larger than the canvas, the view follows the ship (see view_center and engine/camera.py)
+WORLD_WIDTH  = WIDTH
+WORLD_HEIGHT = HEIGHT
+
+# rocks bounce off each other or not
+# original Asteroids' mode was False, but True is much cooler (but slows down the game)
+BOUNCE_MODE = True
+
+# rock-rock collisions are searched with a spatial grid (only rocks in neighbouring cells are tested)
+# False -> brute force test of every pair of rocks (kept for comparison)
+ROCK_BROADPHASE = True
+
+# missiles hit the rocks they have crossed during the step (swept test along their trajectory)
+# False -> only the rocks touched by the missiles at the end of the step (fast missiles may cross thin rock edges)
+MISSILE_SWEPT = True
+
+# rocks are kept in NumPy arrays and updated all at once (see engine/physics.py, requires numpy)
+# False -> each rock is a Sprite updated one at a time
+NUMPY_PHYSICS = False
+
+# the hyperspace distance field is refreshed at each step while hyperspace is affordable
+# False -> it is only refreshed (at most once per step) when it is used
+HYPER_FIELD_EAGER = False
+
+# number of lives per game
+MAX_LIVES = 3
+
+# fixed timestep: the world is updated TICK_RATE times per second of play, whatever the frame rate
+TICK_RATE = 60.0
+# a rock is spawned (and the survival bonus is scored) every SPAWN_TICKS ticks (1 second)
+SPAWN_TICKS = 60
+# maximum number of ticks run by one call to World.advance() (the world slows down below this frame rate)
+MAX_TICKS_PER_ADVANCE = 5
+
+# Security perimeter (in number of ship radius) around the ship
+SHIP_SECURITY_PERIMETER = 5.0
+
+# constants for ship / rocks / missiles
+SHIP_ANGLE_INCREMENT = (2.0 * math.pi) / 54.0
+SHIP_ACCELERATION = 0.2
+SHIP_GRAVITY_PULL = 1500.0
+SPACE_FRICTION = 0.04
+VELOCITY_MAX_SHIP = 20.0
+
+ROCK_MAX_NUMBER = 10
+VELOCITY_MIN_ROCK = 0.5
+VELOCITY_MAX_ROCK = 3.0
+ROTATION_MAX_ROCK = 1.0
+ROTATION_MIN_ROCK = 0.25
+
+VELOCITY_MISSILE  = 4.0
+# lifespan of missiles: MISSILE_LIFE (see derive_constants)
+# number of allowed missile at one time (can actually be somehow redundant with MISSILE_LIFE)
+MISSILE_MAX_NUMBER = 10
+
+# Hyperspace grid: HYPER_GRID (see derive_constants)
+# define elementary cell for hyperspace (no need to make it much smaller than the ship)
+hyper_cell = [40, 40]
+
+# The other modules read the constants of this module when they use them (world.WORLD_WIDTH...),
+# not when they are imported: a constant can be changed (see engine/runner.py), then derive_constants()
+# must be called, before the next World is created.
+
+##################################################################
+
+
+# Image class
+class ImageInfo:
+    def __init__(self, center, size, radius = 0, lifespan = None, animated = False):
+        self.center = center
+        self.size = size
+        self.radius = radius
+        if lifespan:
+            self.lifespan = lifespan
+        else:
+            self.lifespan = float('inf')
+        self.animated = animated
+        return
+
+    def get_center(self):
+        return self.center
+
+    def get_size(self):
+        return self.size
+
+    def get_radius(self):
+        return self.radius
+
+    def get_lifespan(self):
+        return self.lifespan
+
+    def get_animated(self):
+        return self.animated
+
+# geometry of the art assets (the images themselves are loaded by the front-end)
+ship_info = ImageInfo([45, 45], [90, 90], 35)
+# Note that the missile images have different sizes:
+# missile_info = ImageInfo([5,5],   [10, 10], 3, life) for shot1.png and shot2.png
+# missile_info = ImageInfo([10,10], [20, 20], 3, life) for shot3.png
+# (lifespan: MISSILE_LIFE, see derive_constants)
+missile_info = ImageInfo([10, 10], [20, 20], 3)
+asteroid_info = ImageInfo([45, 45], [90, 90], 40)
+explosion_info = ImageInfo([64, 64], [128, 128], 17, 24, True)
+
+##################################################################
+
+def derive_constants():
+    # compute the constants derived from the constants above (again after any of them has been changed)
+    global MISSILE_LIFE, HYPER_GRID
+    # if the ship fires at rest, a missile disappears after travelling about 0.35 of the canvas width
+    MISSILE_LIFE = (0.35 * WIDTH) // VELOCITY_MISSILE
+    missile_info.lifespan = MISSILE_LIFE
+    # hyperspace grid (over the whole world)
+    HYPER_GRID = []
+    for i in range(0, WORLD_WIDTH // hyper_cell[0]):
+        for j in range(0, WORLD_HEIGHT // hyper_cell[1]):
+            HYPER_GRID += [(hyper_cell[0] * (i + 1/2),
+                            hyper_cell[1] * (j + 1/2))]
+    return
+
+derive_constants()
+
+##################################################################
+
+def angle_to_vector(ang):
+    # transformation angle (in radian) -> vector ([x,y])
+    return [math.cos(ang), math.sin(ang)]
+
+def dist_squared(p, q):
+    # distance between 2 points p and q squared
+    return ((p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2)
+
+def torus_dist_squared(p, q, width = None, height = None):
+    # distance between 2 points p and q squared, where opposite sides of the world are connected
+    # (minimum image: each coordinate difference is wrapped once, no square root)
+    # the world is WORLD_WIDTH x WORLD_HEIGHT unless 'width' and 'height' are given
+    # see engine/physics.py for the batched (NumPy) version
+    if width is None:
+        width = WORLD_WIDTH
+        height = WORLD_HEIGHT
+    dx = abs(p[0] - q[0])
+    if dx > width * 0.5:
+        dx = width - dx
+    dy = abs(p[1] - q[1])
+    if dy > height * 0.5:
+        dy = height - dy
+    return dx * dx + dy * dy
+
+def dist(p, q, curved_space = True):
+    # distance between 2 points p and q
+    # (collision tests compare squared distances instead, see torus_dist_squared)
+    if curved_space:
+        # opposites side of the canvas are actually connected
+        # and this 'dist' calculation takes this into account
+        return math.sqrt(torus_dist_squared(p, q))
+    else:
+        # return simple (Euclidian) distance
+        return math.sqrt(dist_squared(p, q))
+
+def view_center(pos):
+    # center of the view of the world (the canvas) following the point 'pos'
+    # (the view only scrolls along the dimensions where the world is larger than the canvas)
+    x = WIDTH / 2.0
+    y = HEIGHT / 2.0
+    if WORLD_WIDTH > WIDTH:
+        x = pos[0]
+    if WORLD_HEIGHT > HEIGHT:
+        y = pos[1]
+    return (x, y)
+
+def view_frame(pos):
+    # frame (x0, y0, WIDTH, HEIGHT) of the view following 'pos' (x0, y0: integer top left corner)
+    center = view_center(pos)
+    return (int(math.floor(center[0] - WIDTH / 2.0)) % WORLD_WIDTH,
+            int(math.floor(center[1] - HEIGHT / 2.0)) % WORLD_HEIGHT,
+            WIDTH, HEIGHT)
+
+def norm(p):
+    # return the norm of vector p
+    return math.sqrt(p[0] ** 2 + p[1] ** 2)
+
+def sign(x):
+    # return the sign of x
+    if x > 0:
+        return  1
+    elif x < 0:
+        return -1
+    else:
+        return  0
+
+def bounce_rock(m1, v1, m2, v2):
+    # elastic collision between:
+    # rock #1: mass m1 (float) and speed v1 (tuple (v_x, v_y))
+    # rock #2: mass m1 (float) and speed v2 (tuple (v_x, v_y))
+
+    # some math and comments for elastic collision equations can be found at:
+    # http://batesvilleinschools.com/physics/apphynet/Dynamics/Collisions/elastic_deriv.htm
+
+    # Ref2 is the referential where ball #2 is fixed before the collision
+    v1_ref2 = (v1[0] - v2[0], v1[1] - v2[1])
+
+    # after choc, in Ref2
+    v1_after_ref2 = (((m1 - m2) / (m1 + m2)) * v1_ref2[0],
+                     ((m1 - m2) / (m1 + m2)) * v1_ref2[1])
+    v2_after_ref2 = (2.0 * m1 / (m1 + m2) * v1_ref2[0],
+                     2.0 * m1 / (m1 + m2) * v1_ref2[1])
+
+    # back to initial referential
+    v1_after = (v1_after_ref2[0] + v2[0],
+                v1_after_ref2[1] + v2[1])
+    v2_after = (v2_after_ref2[0] + v2[0],
+                v2_after_ref2[1] + v2[1])
+
+    return (v1_after, v2_after)
+
+##################################################################
+# 'dt' is expressed in frames: dt = 1.0 is one frame of the original
+# 60 frames per second game, and gives exactly the original physics.
+
+# Ship class
+class Ship:
+    def __init__(self, pos, vel, angle, info):
+        self.pos = [pos[0], pos[1]]
+        self.vel = [vel[0], vel[1]]
+        self.thrust = False
+        self.angle = angle
+        self.angle_vel = 0.0
+        self.radius = info.get_radius()
+        return
+
+    def update(self, dt = 1.0):
+        self.angle += self.angle_vel * dt
+        if self.thrust:
+            # manage acceleration
+            vect = angle_to_vector(self.angle)
+            self.vel[0] += SHIP_ACCELERATION * vect[0] * dt
+            self.vel[1] += SHIP_ACCELERATION * vect[1] * dt
+            # respect speed limit for ship
+            if self.get_speed() > VELOCITY_MAX_SHIP:
+                self.vel[0] = VELOCITY_MAX_SHIP * vect[0]
+                self.vel[1] = VELOCITY_MAX_SHIP * vect[1]
+        else:
+            # deceleration through friction
+            friction = (1.0 - SPACE_FRICTION) ** dt
+            self.vel[0] *= friction
+            self.vel[1] *= friction
+        # update position + remain within the world (modulo WORLD_WIDTH and WORLD_HEIGHT)
+        self.pos[0] = (self.pos[0] + self.vel[0] * dt) % WORLD_WIDTH
+        self.pos[1] = (self.pos[1] + self.vel[1] * dt) % WORLD_HEIGHT
+        return
+
+    def get_speed(self):
+        # returns speed of ship
+        return norm(self.vel)
+
+    def get_angle(self):
+        # returns angle of ship
+        return self.angle
+
+    def get_position(self):
+        # return position of ship
+        return self.pos
+
+    def get_radius(self):
+        # return radius of ship
+        return self.radius
+
+    def get_mass(self):
+        # return mass of ship (for consistancy only, mass of the ship is irrelevant but cannot be zero)
+        return 1.0
+
+    def shoot(self, pool = None):
+        # return one missile shot from ship (recycled from 'pool' if given)
+        vect = angle_to_vector(self.angle)
+        # initial position is: top of the ship
+        pos = (self.pos[0] + self.radius * vect[0],
+               self.pos[1] + self.radius * vect[1])
+        # initial velocity is: speed of ship + VELOCITY_MISSILE + bonus for speed of ship
+        # Note: the ship is not necessarily oriented in the direction of its speed
+        bonus = 1.0 + 1.5 * self.get_speed() / VELOCITY_MAX_SHIP
+        vel = (self.vel[0] + VELOCITY_MISSILE * vect[0] * bonus,
+               self.vel[1] + VELOCITY_MISSILE * vect[1] * bonus)
+        # angle: is the same as the ship
+        if pool is not None:
+            return pool.acquire(pos, vel, 0.0, self.angle, 0.0, missile_info)
+        return Sprite(pos, vel, 0.0, self.angle, 0.0, missile_info)
+
+##################################################################
+# Sprite class
+# Sprite and Text have __slots__ (no per-instance __dict__), and a reset()
+# method with the arguments of their constructor so that they can be recycled (see engine/pool.py)
+class Sprite(object):
+    __slots__ = ("pos", "vel", "mass", "angle", "angle_vel", "radius", "lifespan", "age")
+
+    def __init__(self, pos, vel, mass, ang, ang_vel, info):
+        self.pos = [pos[0], pos[1]]
+        self.vel = [vel[0], vel[1]]
+        self.reset(pos, vel, mass, ang, ang_vel, info)
+        return
+
+    def reset(self, pos, vel, mass, ang, ang_vel, info):
+        self.pos[0] = pos[0]
+        self.pos[1] = pos[1]
+        self.vel[0] = vel[0]
+        self.vel[1] = vel[1]
+        self.mass = mass
+        self.angle = ang
+        self.angle_vel = ang_vel
+        self.radius = info.get_radius()
+        self.lifespan = info.get_lifespan()
+        self.age = 0
+        return
+
+    def get_position(self):
+        # return position of sprite
+        return self.pos
+
+    def get_mass(self):
+        # return mass of sprite
+        return self.mass
+
+    def get_velocity(self):
+        # return velocity of sprite
+        return self.vel
+
+    def get_radius(self):
+        # return radius of sprite
+        return self.radius
+
+    def collide(self, other_object):
+        # return True if self and other_object collide
+        radius = self.radius + other_object.get_radius()
+        if self.mass == 0.0 or other_object.get_mass() == 0.0:
+            # use euclidian distance if one of the object is a missile (for quicker calculation)
+            # missiles are the only Sprite with zero mass
+            return (dist_squared(self.pos, other_object.get_position())       <= radius * radius)
+        else:
+            return (torus_dist_squared(self.pos, other_object.get_position()) <= radius * radius)
+
+    def is_dead(self):
+        return (self.age > self.lifespan)
+
+    def update(self, ship, dt = 1.0):
+        # update angle
+        self.angle += self.angle_vel * dt
+        # update speed: if mass != 0, Sprite is gravitationally attracted to the ship
+        if self.get_mass() > 0.0:
+            # define a normalized vector self -> ship
+            vect = (ship.get_position()[0] - self.pos[0],
+                    ship.get_position()[1] - self.pos[1])
+            n = norm(vect)
+            vect = (vect[0] / n, vect[1] / n)
+            # calculate Newtonian gravity
+            gravity_pull = SHIP_GRAVITY_PULL * self.mass / dist_squared(ship.get_position(), self.get_position())
+            self.vel[0] += vect[0] * gravity_pull * dt
+            self.vel[1] += vect[1] * gravity_pull * dt
+        # update position + remain within the world
+        self.pos[0] = (self.pos[0] + self.vel[0] * dt) % WORLD_WIDTH
+        self.pos[1] = (self.pos[1] + self.vel[1] * dt) % WORLD_HEIGHT
+        self.age += dt
+        return
+
+##################################################################
+
+
+# Text class (temporary information on the screen)
+
+class Text(object):
+    __slots__ = ("text", "y", "age", "lifespan")
+
+    def __init__(self, text, line, lifespan):
+        self.reset(text, line, lifespan)
+        return
+
+    def reset(self, text, line, lifespan):
+        self.text = text
+        self.y = line
+        self.age = 0
+        self.lifespan = lifespan
+        return
+
+    def is_dead(self):
+        return (self.age > self.lifespan)
+
+    def update(self, dt = 1.0):
+        self.age += dt
+        return
+
+##################################################################
+
+
+# World class
+class World:
+    def __init__(self, seed = None):
+        # source of all the randomness of the game
+        self.random = random.Random(seed)
+        self.bounce_mode = BOUNCE_MODE
+        self.rock_broadphase = ROCK_BROADPHASE
+        self.missile_swept = MISSILE_SWEPT
+        self.rock_max_number = ROCK_MAX_NUMBER
+        # (a change of numpy_physics is taken into account by the next game_init())
+        self.numpy_physics = NUMPY_PHYSICS
+        # broadphase for rock-rock and missile-rock collisions: 2 rocks closer than 2 rock radius are in neighbouring cells
+        self.rock_grid = SpatialGrid(WORLD_WIDTH, WORLD_HEIGHT, 2 * asteroid_info.get_radius())
+        # distance of the HYPER_GRID points to their nearest rock (see engine/hyperspace.py)
+        from .hyperspace import DistanceField
+        self.hyper_field = DistanceField(HYPER_GRID, hyper_cell[0], WORLD_WIDTH, WORLD_HEIGHT)
+        self.hyper_field_eager = HYPER_FIELD_EAGER
+        # names of the sounds to be played by the front-end (None -> sounds are not recorded)
+        self.sounds = []
+        # engine.replay.Recorder of the ship controls (None -> not recorded)
+        self.recorder = None
+        # engine.profiler.Profiler timing the phases of step() (None -> not profiled)
+        self.profiler = None
+        # engine.telemetry.Telemetry recording each tick (None -> not recorded)
+        self.telemetry = None
+        # recycled entities (see allocations())
+        self.sprite_pool = Pool(Sprite)
+        self.text_pool = Pool(Text)
+        self.rock_group = Group()
+        self.missile_group = Group()
+        # all the explosions (see engine/effects.py)
+        self.explosions = ExplosionBatch(explosion_info)
+        self.text_group = Group()
+        # keyboard controls of the ship (key name -> handler(flag))
+        self.key_inputs = {"space": self.fire_missile,
+                           "up":    self.ship_thrust,
+                           "left":  self.ship_rotate_left,
+                           "right": self.ship_rotate_right,
+                           "h":     self.hyperspace,
+                           "b":     self.toggle_bounce}
+        self.game_init()
+        return
+
+    def game_init(self, seed = None):
+        # initialize variables for a new game
+        # each game has its own seed (drawn from the world's random if not given)
+        if seed is None:
+            seed = self.random.randrange(2 ** 32)
+        self.seed = seed
+        self.random.seed(seed)
+        self.score = 0
+        self.lives = MAX_LIVES
+        self.time = 0
+        # number of ticks played and time (in seconds) not yet simulated (see advance())
+        self.ticks = 0
+        self.accumulator = 0.0
+        self.ship_stillness = 0.0
+        # statistics of the game
+        self.ship_crashes = 0
+        self.rock_hits = 0
+        self.rock_bounces = 0
+        self.hyperspace_jumps = 0
+        self.my_ship = Ship([WORLD_WIDTH // 2, WORLD_HEIGHT // 2], [0, 0], -math.pi / 2.0, ship_info)
+        # recycle the entities of the previous game
+        self.sprite_pool.release_all(self.rock_group)
+        self.sprite_pool.release_all(self.missile_group)
+        self.text_pool.release_all(self.text_group)
+        if self.numpy_physics:
+            from .physics import RockGroup
+            self.rock_group = RockGroup(asteroid_info)
+        else:
+            self.rock_group = Group()
+        self.missile_group = Group()
+        self.explosions.clear()
+        self.text_group = Group()
+        self.hyper_field.time = None
+        return
+
+    def rock_positions(self):
+        # return the list of the positions of the rocks
+        if self.numpy_physics:
+            return self.rock_group.positions().tolist()
+        return [rock.pos for rock in self.rock_group]
+
+    def refresh_hyper_field(self):
+        # bring the hyperspace distance field up to date (if the rocks have moved since its last refresh)
+        if self.hyper_field.time != (self.time, len(self.rock_group)):
+            self.hyper_field.refresh(self.rock_positions(), (self.time, len(self.rock_group)))
+        return
+
+    def is_over(self):
+        # game has ended ('Live = 0' has been played => lives = -1)
+        return (self.lives < 0)
+
+    def get_stats(self):
+        # return the statistics of the game
+        return {"seed":             self.seed,
+                "score":            self.score,
+                "ticks":            self.ticks,
+                "ship_crashes":     self.ship_crashes,
+                "rock_hits":        self.rock_hits,
+                "rock_bounces":     self.rock_bounces,
+                "hyperspace_jumps": self.hyperspace_jumps}
+
+    def allocations(self):
+        # return the number of entities (sprites, texts) allocated so far
+        # (it does not increase in steady-state play, as entities are recycled, and explosions are batched)
+        return self.sprite_pool.allocated + self.text_pool.allocated
+
+    def new_explosion(self, pos, scale, sheet):
+        # add an explosion to the world
+        self.explosions.add(pos, scale, sheet)
+        return
+
+    def new_text(self, text, line, lifespan):
+        # add a text (recycled) to the world
+        self.text_group.add(self.text_pool.acquire(text, line, lifespan))
+        return
+
+    def play_sound(self, name):
+        # record a sound for the front-end
+        if self.sounds is not None:
+            self.sounds.append(name)
+        return
+
+    def key_input(self, key, flag):
+        # dispatch a ship control (flag == 1 -> key down / flag == 0 -> key up)
+        if self.recorder is not None:
+            self.recorder.record(self.ticks, key, flag)
+        self.key_inputs[key](flag)
+        return
+
+    def toggle_bounce(self, flag):
+        # toggle bounce mode true/false
+        if flag == 1:
+            self.bounce_mode = not self.bounce_mode
+        return
+
+    ##############################################################
+
+    # state of the world (snapshots used to seek in replays)
+
+    def save_state(self):
+        # return the state of the game (plain Python values)
+        ship = self.my_ship
+        return {"random":         self.random.getstate(),
+                "seed":           self.seed,
+                "bounce_mode":    self.bounce_mode,
+                "score":          self.score,
+                "lives":          self.lives,
+                "time":           self.time,
+                "ticks":          self.ticks,
+                "accumulator":    self.accumulator,
+                "ship_stillness": self.ship_stillness,
+                "stats":          self.get_stats(),
+                "ship":       (float(ship.pos[0]), float(ship.pos[1]), float(ship.vel[0]), float(ship.vel[1]),
+                               ship.angle, ship.angle_vel, ship.thrust),
+                "rocks":      [(float(rock.pos[0]), float(rock.pos[1]), float(rock.vel[0]), float(rock.vel[1]),
+                                float(rock.mass), float(rock.angle), float(rock.angle_vel), float(rock.age))
+                               for rock in self.rock_group],
+                "missiles":   [(missile.pos[0], missile.pos[1], missile.vel[0], missile.vel[1],
+                                missile.mass, missile.angle, missile.angle_vel, missile.age)
+                               for missile in self.missile_group],
+                "explosions": self.explosions.get_state(),
+                "texts":      [(text.text, text.y, text.lifespan, text.age) for text in self.text_group]}
+
+    def load_state(self, state):
+        # restore a state returned by save_state()
+        recorder = self.recorder
+        self.recorder = None
+        self.game_init(state["seed"])
+        self.recorder = recorder
+        self.random.setstate(state["random"])
+        for name in ("bounce_mode", "score", "lives", "time", "ticks", "accumulator", "ship_stillness"):
+            setattr(self, name, state[name])
+        for name in ("ship_crashes", "rock_hits", "rock_bounces", "hyperspace_jumps"):
+            setattr(self, name, state["stats"][name])
+        ship = self.my_ship
+        ship.pos[0], ship.pos[1], ship.vel[0], ship.vel[1], ship.angle, ship.angle_vel, ship.thrust = state["ship"]
+        for group, info, sprites in ((self.rock_group, asteroid_info, state["rocks"]),
+                                     (self.missile_group, missile_info, state["missiles"])):
+            for x, y, vx, vy, mass, angle, angle_vel, age in sprites:
+                sprite = self.sprite_pool.acquire((x, y), (vx, vy), mass, angle, angle_vel, info)
+                sprite.age = age
+                group.add(sprite)
+                if self.numpy_physics and group is self.rock_group:
+                    # the rock group has copied the rock in its arrays
+                    self.sprite_pool.release(sprite)
+        for x, y, scale, sheet, age in state["explosions"]:
+            self.explosions.add((x, y), scale, sheet, age)
+        for text, line, lifespan, age in state["texts"]:
+            effect = self.text_pool.acquire(text, line, lifespan)
+            effect.age = age
+            self.text_group.add(effect)
+        return
+
+    ##############################################################
+
+    # ship controls
+
+    def fire_missile(self, flag):
+        if flag == 1:
+            if len(self.missile_group) < MISSILE_MAX_NUMBER:
+                self.missile_group.add(self.my_ship.shoot(self.sprite_pool))
+                self.play_sound("missile")
+        return
+
+    def ship_thrust(self, flag):
+        self.my_ship.thrust = (flag == 1)
+        return
+
+    def ship_rotate_left(self, flag):
+        self.ship_rotate(flag, -1)
+        return
+
+    def ship_rotate_right(self, flag):
+        self.ship_rotate(flag, 1)
+        return
+
+    def ship_rotate(self, flag, direction):
+        # flag == 1 -> rotate the ship: direction ==  1 -> right
+        #                               direction == -1 -> left
+        # flag == 0 -> stop rotation if the ship was turning in the relevant direction
+        # for example: Left Down / Right Down / Left Up -> does not stop rotation
+        if flag == 1:
+            # key down
+            self.my_ship.angle_vel = direction * SHIP_ANGLE_INCREMENT
+        else:
+            # key up
+            if sign(self.my_ship.angle_vel) == direction:
+                self.my_ship.angle_vel = 0
+        return
+
+    def hyperspace(self, flag):
+        my_ship = self.my_ship
+        if flag == 1:
+            if self.score < 100:
+                self.new_text("NO CREDIT FOR HYPERSPACE", 70, 30)
+            else:
+                # put the ship outside of the world (so it cannot be destroyed during calculation)
+                old_pos = my_ship.pos
+                my_ship.pos = [WORLD_WIDTH + my_ship.get_radius() + 1, WORLD_HEIGHT + my_ship.get_radius() + 1]
+                # point within HYPER_GRID further from all the rocks
+                self.refresh_hyper_field()
+                hyper_point = self.hyper_field.get_safest()[0]
+                # hyper_point is the index in HYPER_GRID (the points of the field) where the ship will emerge
+                hyper_grid = self.hyper_field.points
+                if torus_dist_squared(hyper_grid[hyper_point], my_ship.get_position()) < ((SHIP_SECURITY_PERIMETER / 2.0) * my_ship.get_radius()) ** 2:
+                    self.new_text("POSITION CANNOT BE IMPROVED", 70, 30)
+                    my_ship.pos = old_pos
+                else:
+                    self.new_text("** HYPERSPACE **", 70, 30)
+                    my_ship.pos[0] = hyper_grid[hyper_point][0]
+                    my_ship.pos[1] = hyper_grid[hyper_point][1]
+                    my_ship.vel[0] = 0.0
+                    my_ship.vel[1] = 0.0
+                    my_ship.angle = -math.pi / 2.0
+                    self.clean_area_around_ship()
+                    self.score -= 100
+                    self.hyperspace_jumps += 1
+                    # insert 'hyperspace sound' sound here...
+        return
+
+    ##############################################################
+
+    # game rules
+
+    def update_score(self, increase_score):
+        # update scores, and add 1 life every 2.000 points
+        old_score = self.score
+        self.score += increase_score
+        if (old_score // 2000) != (self.score // 2000):
+            # x2.000 points crossed!
+            self.lives += 1
+            self.new_text("** EXTRA LIFE! **", 110, 30)
+        return
+
+    def rock_spawner(self):
+        # spawns a rock: must be called every 1 second of play
+        # and is also used to increase the score due to survival rate
+        my_ship = self.my_ship
+        # increase score from +1 (at speed = 0) to +10 (at speed = VELOCITY_MAX_SHIP)
+        speed_ratio = 9.0 * my_ship.get_speed() / VELOCITY_MAX_SHIP
+        self.update_score(1 + round(speed_ratio))
+        # update ship stillness
+        if speed_ratio >= 2.0:
+            self.ship_stillness = 0.0
+        elif speed_ratio >= 1.0:
+            if self.ship_stillness < 15.0:
+                self.ship_stillness += 0.5
+            else:
+                self.ship_stillness -= 1.0
+        else:
+            self.ship_stillness += 1.0
+        ship_stillness = self.ship_stillness
+        if len(self.rock_group) < self.rock_max_number:
+            # generate a rock (from a random side of the view only / never from the middle)
+            # rules for ship_stillness penalty:
+            #  0 to 15 = nothing
+            # 15 to 25 = rock spawn towards ship
+            # 25 to 35 = rock spawn towards ship from behind
+            # 35 to 45 = rock spawn towards ship from behind + at increased spin
+            # 45 to 60 = rock spawn towards ship from behind + at increased spin + at maximum velocity
+            # above 60 = rock spawn towards ship from behind + at maximum spin   + at maximum velocity
+            #
+            # Overlap rules for rock generation:
+            # a new rock cannot be too close from the ship (not within SHIP_SECURITY_PERIMETER ship radius)
+            # a new rock cannot overlap an existing rock if bounce_mode == True
+            # the center of the rock is drawn among the free points of the edges (see engine/spawn.py):
+            # if there is none, no rock is spawned this time
+            if ship_stillness > 25.0:
+                angle = my_ship.get_angle() % (2.0 * math.pi)
+                if math.pi / 4.0 <= angle <= 3.0 * math.pi / 4.0:
+                    edges = ("top",)
+                elif 3.0 * math.pi / 4.0 <= angle <= 5.0 * math.pi / 4.0:
+                    edges = ("right",)
+                elif 5.0 * math.pi / 4.0 <= angle <= 7.0 * math.pi / 4.0:
+                    edges = ("bottom",)
+                else:
+                    edges = ("left",)
+            else:
+                edges = ("left", "top")
+            obstacles = [([my_ship.get_position()], SHIP_SECURITY_PERIMETER * my_ship.get_radius())]
+            if self.bounce_mode:
+                obstacles.append((self.rock_positions(), 2 * asteroid_info.get_radius()))
+            frame = view_frame(my_ship.get_position())
+            center = pick_point(edges, obstacles, self.random, WORLD_WIDTH, WORLD_HEIGHT, frame)
+            if center is None:
+                return
+            # random speed between VELOCITY_MIN_ROCK and VELOCITY_MAX_ROCK
+            if ship_stillness > 45.0:
+                velocity = VELOCITY_MAX_ROCK
+            else:
+                velocity = VELOCITY_MIN_ROCK + self.random.random() * (VELOCITY_MAX_ROCK - VELOCITY_MIN_ROCK)
+            # random trajectory angle between 0 and 2 * PI
+            # though generated on left or top side, the rock can enter from right or bottom side, depending on angle:
+            # also, adjust angle to target ship after 15 seconds of stillness
+            if ship_stillness > 15.0:
+                # (vector in the coordinates of the view, where the rock is on an edge and the ship inside)
+                s = my_ship.get_position()
+                angle = ((s[0] - frame[0]) % WORLD_WIDTH - (center[0] - frame[0]) % WORLD_WIDTH,
+                         (s[1] - frame[1]) % WORLD_HEIGHT - (center[1] - frame[1]) % WORLD_HEIGHT)
+                n = norm(angle)
+                angle = (angle[0] / n, angle[1] / n)
+            else:
+                angle = angle_to_vector(self.random.random() * 2.0 * math.pi)
+            velocity_vect = (angle[0] * velocity, angle[1] * velocity)
+            # random rotation between ROTATION_MIN_ROCK and ROTATION_MAX_ROCK turns per
+            # second, increasing with the score (min = +15% every 5.000 points / max = +30%)
+            spin_min = ROTATION_MIN_ROCK * (1.0 + 0.15 * (self.score / 5000.0))
+            spin_max = ROTATION_MAX_ROCK * (1.0 + 0.30 * (self.score / 5000.0))
+            if ship_stillness > 60.0:
+                spin_min = spin_max
+            elif ship_stillness > 35.0:
+                spin_min = (spin_max + spin_min) / 2.0
+            rotation = self.random.choice([-1, 1]) * (spin_min + self.random.random() * (spin_max - spin_min)) * (2.0 * math.pi / 60.0)
+            # mass of rock is proportional to its spin rate
+            mass = abs(rotation)
+            new_rock = self.sprite_pool.acquire(center, velocity_vect, mass, 0.0, rotation, asteroid_info)
+            self.rock_group.add(new_rock)
+            if self.numpy_physics:
+                # the rock group has copied the rock in its arrays
+                self.sprite_pool.release(new_rock)
+        return
+
+    def group_collide(self, group, sprite):
+        # test for collision between all members of 'group' (group of sprites) vs. 'sprite' (one sprite)
+        g = set()
+        num_collision = 0
+        for member in list(group):
+            if member.collide(sprite):
+                num_collision += 1
+                g.add(member)
+                # explosion is centered on 'member' (not 'sprite')
+                self.new_explosion(member.get_position(), 1, 1)
+                self.play_sound("explosion")
+        group.difference_update(g)
+        self.sprite_pool.release_all(g)
+        return num_collision
+
+    def missile_hits(self, missiles, rocks, positions, dt = 1.0):
+        # return the list of all the hits (i, j), sorted: missile missiles[i] hits rock rocks[j] (at positions[j])
+        # the missiles are handled in order, and a rock is only hit by the first missile that reaches it
+        # the rocks near each missile are found with the grid (one build for all the missiles), and
+        # the missile is tested along its trajectory of the step (from pos - vel * dt to pos) if swept
+        # as in Sprite.collide, the distance missile-rock is Euclidian
+        if not missiles or not rocks:
+            return []
+        grid = self.rock_grid
+        grid.build(positions)
+        reach = asteroid_info.get_radius()
+        hits = []
+        for i in range(0, len(missiles)):
+            missile = missiles[i]
+            q = missile.pos
+            if self.missile_swept:
+                p = (q[0] - missile.vel[0] * dt, q[1] - missile.vel[1] * dt)
+            else:
+                p = q
+            # distance of each rock to the segment p -> q (through the projection of the rock on the segment)
+            dx = q[0] - p[0]
+            dy = q[1] - p[1]
+            length_squared = dx * dx + dy * dy
+            for j in grid.query_segment(p, q, reach + missile.radius):
+                c = positions[j]
+                if length_squared > 0.0:
+                    t = max(0.0, min(1.0, ((c[0] - p[0]) * dx + (c[1] - p[1]) * dy) / length_squared))
+                else:
+                    t = 0.0
+                ex = p[0] + t * dx - c[0]
+                ey = p[1] + t * dy - c[1]
+                radius = rocks[j].radius + missile.radius
+                if ex * ex + ey * ey <= radius * radius:
+                    hits.append((i, j))
+                    # the rock is destroyed: the next missiles cannot hit it
+                    grid.remove(j)
+        return hits
+
+    def group_group_collide(self, group1, group2, dt = 1.0):
+        # test for collision between all members of 'group1' (group of sprites) vs. 'group2' (group of sprites)
+        # group1 -> missiles
+        # group2 -> rocks
+        # all the hits are found at once (see missile_hits): a missile destroys all the rocks it hits
+        # (one explosion each) that have not already been destroyed by a previous missile
+        missiles = list(group1)
+        rocks = list(group2)
+        if group2 is self.rock_group:
+            positions = self.rock_positions()
+        else:
+            positions = [rock.pos for rock in rocks]
+        g1 = []
+        g2 = []
+        for i, j in self.missile_hits(missiles, rocks, positions, dt):
+            g2.append(rocks[j])
+            # explosion is centered on the rock (not the missile)
+            self.new_explosion(rocks[j].get_position(), 1, 1)
+            self.play_sound("explosion")
+            if not g1 or g1[-1] is not missiles[i]:
+                g1.append(missiles[i])
+        group1.difference_update(g1)
+        self.sprite_pool.release_all(g1)
+        group2.difference_update(g2)
+        self.sprite_pool.release_all(g2)
+        return len(g2)
+
+    def clean_area_around_ship(self):
+        # eliminate all rocks whithin SHIP_SECURITY_PERIMETER radius of the ship
+        # (no points added to score)
+        my_ship = self.my_ship
+        perimeter_squared = (SHIP_SECURITY_PERIMETER * my_ship.get_radius()) ** 2
+        rocks = list(self.rock_group)
+        if self.numpy_physics:
+            distance = self.rock_group.torus_dist_squared(my_ship.get_position())
+        else:
+            distance = [torus_dist_squared(rock.get_position(), my_ship.get_position()) for rock in rocks]
+        cleaned = []
+        for i in range(0, len(rocks)):
+            if distance[i] <= perimeter_squared:
+                # the rocks within ship perimeter explode with a different explosion (scaled 30%) image & no sound & no score
+                self.new_explosion(rocks[i].get_position(), 0.30, 2)
+                cleaned.append(rocks[i])
+        # (removed all at once: the NumPy rocks are compacted only once)
+        self.rock_group.difference_update(cleaned)
+        self.sprite_pool.release_all(cleaned)
+        return
+
+    ##############################################################
+
+    # world update
+
+    def process_sprite_group(self, group, dt = 1.0):
+        # update each sprite in the group
+        dead = set()
+        for sprite in list(group):
+            sprite.update(self.my_ship, dt)
+            if sprite.is_dead():
+                dead.add(sprite)
+        group.difference_update(dead)
+        self.sprite_pool.release_all(dead)
+        return
+
+    def process_rock_collision(self, group):
+        # handle collision rock-rock
+        g = list(group)
+        if self.rock_broadphase:
+            self.rock_grid.build([rock.pos for rock in g])
+            pairs = self.rock_grid.pairs()
+        else:
+            pairs = [(rock1, rock2) for rock1 in range(0, len(g)) for rock2 in range(rock1+1, len(g))]
+        for rock1, rock2 in pairs:
+            if g[rock1].collide(g[rock2]):
+                # elastic collision between rock1 & rock2. Because mass1 != mass 2, after the collision
+                # the speed of 1 rock may be over VELOCITY_MAX_ROCK. This is intentionally not adjusted!
+                new_vel = bounce_rock(g[rock1].get_mass(), g[rock1].get_velocity(), g[rock2].get_mass(), g[rock2].get_velocity())
+                g[rock1].vel[0], g[rock1].vel[1] = new_vel[0][0], new_vel[0][1]
+                g[rock2].vel[0], g[rock2].vel[1] = new_vel[1][0], new_vel[1][1]
+                self.rock_bounces += 1
+                # insert 'rock bouncing off one another' sound here...
+        return
+
+    def process_ship_collision(self):
+        # check if the ship has hit a rock
+        if self.group_collide(self.rock_group, self.my_ship) > 0:
+            self.ship_crash()
+        return
+
+    def ship_crash(self):
+        # the ship has hit a rock
+        my_ship = self.my_ship
+        # the ship explodes with a large explosion (scaled 4x) image
+        self.new_explosion(my_ship.get_position(), 4, 1)
+        self.clean_area_around_ship()
+        # stop ship
+        my_ship.vel[0] = 0.0
+        my_ship.vel[1] = 0.0
+        self.play_sound("explosion")
+        # lose 1 life but score 50 points...
+        self.lives -= 1
+        self.ship_crashes += 1
+        self.ship_stillness = 0.0
+        self.update_score(50)
+        # indicative display (0.5 second)
+        self.new_text("** SHIP DESTROYED! **", 150, 30)
+        return
+
+    def step_effects(self, dt = 1.0):
+        # age explosions and texts (also used while the game is paused or over)
+        self.explosions.update(dt)
+        dead = set()
+        for text in list(self.text_group):
+            text.update(dt)
+            if text.is_dead():
+                dead.add(text)
+        self.text_group.difference_update(dead)
+        self.text_pool.release_all(dead)
+        return
+
+    def step(self, dt = 1.0):
+        # advance the world by 'dt' frames
+        # (if profiling, each phase is timed by a lap of the profiler)
+        profiler = self.profiler
+        self.time += dt
+
+        # explosions and texts: aged before the phases that create new ones, so that a new explosion or text is
+        # drawn at age 0 (first frame of the spritesheet) after the step that created it
+        self.step_effects(dt)
+        if profiler is not None:
+            profiler.lap("effects")
+
+        # process rocks
+        if self.numpy_physics:
+            self.rock_group.update(self.my_ship, dt)
+        else:
+            self.process_sprite_group(self.rock_group, dt)
+        if profiler is not None:
+            profiler.lap("rocks")
+        # handle rock collisions
+        if self.bounce_mode:
+            self.process_rock_collision(self.rock_group)
+        if profiler is not None:
+            profiler.lap("rock collision")
+
+        # process missiles
+        self.process_sprite_group(self.missile_group, dt)
+        if profiler is not None:
+            profiler.lap("missiles")
+
+        # update ship
+        self.my_ship.update(dt)
+        if profiler is not None:
+            profiler.lap("ship")
+
+        # check if the ship has hit a rock
+        self.process_ship_collision()
+        if profiler is not None:
+            profiler.lap("ship collision")
+
+        # check if a missile has hit a rock
+        hit = self.group_group_collide(self.missile_group, self.rock_group, dt)
+        self.rock_hits += hit
+        self.update_score(50 * hit)
+        if profiler is not None:
+            profiler.lap("missile collision")
+
+        # keep the hyperspace distance field up to date while hyperspace is affordable
+        if self.hyper_field_eager and self.score >= 100:
+            self.refresh_hyper_field()
+            if profiler is not None:
+                profiler.lap("hyperspace field")
+        return
+
+    def tick(self):
+        # advance the world by one fixed tick (1 / TICK_RATE second of play)
+        self.step(1.0)
+        self.ticks += 1
+        # spawn rocks from the tick count (every second of play)
+        if self.ticks % SPAWN_TICKS == 0:
+            self.rock_spawner()
+            if self.profiler is not None:
+                self.profiler.lap("rock spawner")
+        if self.telemetry is not None:
+            self.telemetry.record(self)
+            if self.profiler is not None:
+                self.profiler.lap("telemetry")
+        return
+
+    def advance(self, elapsed):
+        # run the ticks due after 'elapsed' seconds of play (the remainder is kept for the next call)
+        # return the number of ticks run
+        self.accumulator += elapsed
+        ticks = 0
+        while self.accumulator >= 1.0 / TICK_RATE and not self.is_over():
+            if ticks == MAX_TICKS_PER_ADVANCE:
+                # too far behind: drop the remaining time rather than never catching up
+                self.accumulator = 0.0
+                break
+            self.tick()
+            self.accumulator -= 1.0 / TICK_RATE
+            ticks += 1
+        return ticks
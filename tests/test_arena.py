@@ -0,0 +1,91 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the multi-ship arena                      #
+# ---------------------------------------------------------------- #
+"""
+
+Arena (engine/arena.py) with two players: the state of each player (ship,
+missiles, score, lives, statistics) is its own, whichever player is
+active, across activate() and the steps.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.arena import Arena, PLAYER_ATTRIBUTES
+from engine.world import Sprite, asteroid_info, MAX_LIVES
+
+##################################################################
+
+def two_players():
+    arena = Arena(seed = 0)
+    return arena, arena.add_player(), arena.add_player()
+
+##################################################################
+
+def test_activate_swaps_the_player_state():
+    arena, first, second = two_players()
+    assert first.my_ship is not second.my_ship
+    arena.activate(first)
+    assert arena.my_ship is first.my_ship and arena.missile_group is first.missile_group
+    arena.score = 100
+    arena.lives = 1
+    arena.rock_hits = 2
+    arena.activate(second)
+    assert arena.my_ship is second.my_ship and arena.missile_group is second.missile_group
+    assert (arena.score, arena.lives, arena.rock_hits) == (0, MAX_LIVES, 0)
+    assert (second.score, second.rock_hits) == (0, 0)
+    assert (first.score, first.lives, first.rock_hits) == (100, 1, 2)
+    arena.activate(None)
+    assert (second.score, second.rock_hits) == (0, 0)
+    # the values of a player are put back as they were
+    arena.activate(first)
+    for name in PLAYER_ATTRIBUTES:
+        assert getattr(arena, name) is getattr(first, name)
+    return
+
+def test_controls_and_steps_of_each_player():
+    arena, first, second = two_players()
+    arena.player_input(first.ident, "space", 1)
+    arena.player_input(second.ident, "up", 1)
+    arena.step(1.0)
+    # the missile of the first player, the thrust of the second one
+    assert len(first.missile_group) == 1 and len(second.missile_group) == 0
+    assert not first.my_ship.thrust and second.my_ship.thrust
+    assert second.my_ship.vel[1] < -0.1 and abs(first.my_ship.vel[1]) < 0.01
+    for t in range(0, 10):
+        arena.step(1.0)
+    assert len(first.missile_group) == 1 and len(second.missile_group) == 0
+    assert not first.my_ship.thrust and second.my_ship.thrust
+    return
+
+def test_missile_scores_for_its_player():
+    arena, first, second = two_players()
+    arena.player_input(first.ident, "space", 1)
+    arena.activate(None)
+    missile = list(first.missile_group)[0]
+    # a rock in the way of the missile (out of reach of the ships)
+    pos = (missile.pos[0] + missile.vel[0], missile.pos[1] + missile.vel[1] - 40.0)
+    arena.rock_group.add(Sprite(pos, (0.0, 0.0), 0.0, 0.0, 0.0, asteroid_info))
+    arena.step(1.0)
+    assert len(arena.rock_group) == 0 and len(first.missile_group) == 0
+    assert (first.score, first.rock_hits) == (50, 1)
+    assert (second.score, second.rock_hits) == (0, 0)
+    assert arena.get_scores() == {first.ident: (50, first.lives), second.ident: (0, second.lives)}
+    return
+
+def test_lost_game_of_one_player():
+    arena, first, second = two_players()
+    arena.activate(second)
+    arena.score = 300
+    arena.activate(first)
+    arena.score = 200
+    arena.lives = -1
+    arena.step(1.0)
+    # the first player starts a new game, the second one goes on
+    assert (first.games, first.score, first.lives) == (1, 0, MAX_LIVES)
+    assert (second.games, second.score) == (0, 300)
+    return
@@ -0,0 +1,146 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the sound manager                         #
+# ---------------------------------------------------------------- #
+"""
+
+SoundManager (engine/audio.py) with fake sound objects: the minimum time
+between two starts of a sound, the copies of a sound, the voices taken
+over from the sounds of lower priority, and the looping sounds.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.audio import SoundManager
+
+# name -> (priority, minimum time between two starts (seconds), length (seconds), volume)
+SETTINGS = {"low":  (1, 0.1, 1.0, 0.5),
+            "high": (2, 0.1, 1.0, 1.0)}
+
+##################################################################
+
+
+# FakeSound class (records the calls of the sound manager)
+class FakeSound:
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+        return
+
+    def play(self):
+        self.calls.append("play")
+        return
+
+    def pause(self):
+        self.calls.append("pause")
+        return
+
+    def rewind(self):
+        self.calls.append("rewind")
+        return
+
+    def set_volume(self, volume):
+        self.calls.append(("volume", volume))
+        return
+
+
+def manager(voices = 4, copies = 2):
+    # a sound manager, and the list of the sounds it loads
+    loaded = []
+    def load(name):
+        sound = FakeSound(name)
+        loaded.append(sound)
+        return sound
+    return SoundManager(load, SETTINGS, voices, copies), loaded
+
+def play(audio, now, *names):
+    for name in names:
+        audio.play(name)
+    audio.update(now)
+    return
+
+def playing(audio):
+    # names of the sounds on the voices, oldest start first
+    return [voice[2] for voice in sorted(audio.voices, key = lambda voice: voice[0])]
+
+##################################################################
+
+def test_minimum_time_between_two_starts():
+    audio, loaded = manager()
+    # the same frame, then less than 0.1 s later: dropped
+    play(audio, 10.0, "low", "low")
+    play(audio, 10.0625, "low")
+    assert audio.played == 1 and audio.dropped == 2
+    assert playing(audio) == ["low"]
+    # another sound is not held back
+    play(audio, 10.0625, "high")
+    assert audio.played == 2
+    # the interval is over
+    play(audio, 10.125, "low")
+    assert audio.played == 3 and audio.dropped == 2
+    assert playing(audio) == ["low", "high", "low"]
+    # one copy per voice of the sound, loaded with the volume of the sound
+    assert [sound.name for sound in loaded] == ["low", "high", "low"]
+    assert loaded[0].calls == [("volume", 0.5), "rewind", "play"]
+    return
+
+def test_copies_of_a_sound():
+    audio, loaded = manager(voices = 4, copies = 2)
+    play(audio, 0.0, "low")
+    play(audio, 0.2, "low")
+    # both copies are playing: the oldest one is started again
+    play(audio, 0.4, "low")
+    assert len(loaded) == 2
+    assert audio.played == 3 and audio.dropped == 0
+    assert playing(audio) == ["low", "low"]
+    assert loaded[0].calls == [("volume", 0.5), "rewind", "play", "rewind", "play"]
+    assert loaded[1].calls == [("volume", 0.5), "rewind", "play"]
+    # a copy over is used again (no new load)
+    play(audio, 1.3, "low")
+    assert len(loaded) == 2
+    assert loaded[1].calls[-2:] == ["rewind", "play"]
+    return
+
+def test_lowest_priority_voice_is_replaced():
+    audio, loaded = manager(voices = 3, copies = 3)
+    play(audio, 0.0, "low")
+    play(audio, 0.2, "high")
+    play(audio, 0.4, "low")
+    # all the voices are busy: the oldest sound of the lowest priority stops
+    play(audio, 0.6, "high")
+    assert audio.played == 4 and audio.dropped == 0
+    assert playing(audio) == ["high", "low", "high"]
+    assert loaded[0].calls[-1] == "rewind"
+    # then the other sound of low priority
+    play(audio, 0.8, "high")
+    assert playing(audio) == ["high", "high", "high"]
+    assert loaded[2].calls[-1] == "rewind"
+    return
+
+def test_sound_dropped_when_all_voices_have_a_higher_priority():
+    audio, loaded = manager(voices = 2, copies = 2)
+    play(audio, 0.0, "high")
+    play(audio, 0.2, "high")
+    play(audio, 0.4, "low")
+    assert audio.played == 2 and audio.dropped == 1
+    assert playing(audio) == ["high", "high"]
+    # the sound was not loaded, and no voice was stopped
+    assert [sound.name for sound in loaded] == ["high", "high"]
+    assert all(sound.calls[-1] == "play" for sound in loaded)
+    # a voice is free again when its sound is over
+    play(audio, 1.1, "low")
+    assert audio.played == 3
+    assert playing(audio) == ["high", "low"]
+    return
+
+def test_looping_sound_changes_only():
+    audio, loaded = manager()
+    for on in (False, True, True, True, False, False, True):
+        audio.set_loop("thrust", on)
+    assert len(loaded) == 1
+    assert loaded[0].calls == ["play", "pause", "rewind", "play"]
+    return
@@ -0,0 +1,110 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the batched explosions                    #
+# ---------------------------------------------------------------- #
+"""
+
+ExplosionBatch.update (engine/effects.py) ages the explosions and removes
+the dead ones in one pass: the live ones keep their values and their
+order. A new explosion is drawn from the first frame of its spritesheet.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.effects import ExplosionBatch
+from engine.world import World, ImageInfo, Sprite, asteroid_info
+
+##################################################################
+
+def batch(ages, lifespan = 10):
+    # explosion i at (i, 10 * i), scale i, sheet 1 + i % 2, age ages[i]
+    explosions = ExplosionBatch(ImageInfo([64, 64], [128, 128], 17, lifespan, True))
+    for i in range(0, len(ages)):
+        explosions.add((i, 10 * i), i, 1 + i % 2, ages[i])
+    return explosions
+
+def expected(ages, dt, lifespan = 10):
+    # the explosions (x, y, scale, sheet, age) still alive after update(dt), in order
+    return [(float(i), float(10 * i), i, 1 + i % 2, ages[i] + dt)
+            for i in range(0, len(ages)) if ages[i] + dt <= lifespan]
+
+def check(explosions):
+    # the lists of the batch have the same length
+    assert len(set(len(values) for values in (explosions.x, explosions.y, explosions.scale,
+                                              explosions.sheet, explosions.age))) == 1
+    return
+
+##################################################################
+
+def test_dead_explosions_in_the_middle():
+    ages = [0, 9.5, 3, 10, 9.5, 1, 2]
+    explosions = batch(ages)
+    explosions.update(1.0)
+    check(explosions)
+    assert explosions.get_state() == expected(ages, 1.0)
+    assert [state[0] for state in explosions.get_state()] == [0.0, 2.0, 5.0, 6.0]
+    return
+
+def test_last_explosion_dies():
+    ages = [0, 1, 2, 10]
+    explosions = batch(ages)
+    explosions.update(1.0)
+    check(explosions)
+    assert explosions.get_state() == expected(ages, 1.0)
+    assert len(explosions) == 3
+    return
+
+def test_every_explosion_dies():
+    ages = [10, 9.5, 10]
+    explosions = batch(ages)
+    explosions.update(1.0)
+    check(explosions)
+    assert len(explosions) == 0
+    # the batch can be filled again
+    explosions.add((5, 6), 1, 2)
+    assert explosions.get_state() == [(5.0, 6.0, 1, 2, 0)]
+    return
+
+def test_no_explosion_dies():
+    ages = [0, 1, 2]
+    explosions = batch(ages)
+    explosions.update(1.0)
+    assert explosions.get_state() == expected(ages, 1.0)
+    explosions = batch([])
+    explosions.update(1.0)
+    assert len(explosions) == 0
+    return
+
+def test_update_with_dt_over_one():
+    ages = [0, 4, 6, 7.5, 8, 2]
+    explosions = batch(ages)
+    explosions.update(2.5)
+    check(explosions)
+    assert explosions.get_state() == expected(ages, 2.5)
+    assert [state[4] for state in explosions.get_state()] == [2.5, 6.5, 8.5, 10.0, 4.5]
+    explosions.update(3.0)
+    assert explosions.get_state() == [(0.0, 0.0, 0, 1, 5.5), (1.0, 10.0, 1, 2, 9.5), (5.0, 50.0, 5, 2, 7.5)]
+    return
+
+def test_new_explosion_starts_at_frame_zero():
+    # a missile hits a rock during a step: the front-end draws its explosion at age 0 after this step,
+    # then at age 1 after the next one
+    world = World(seed = 0)
+    world.numpy_physics = False
+    world.game_init()
+    world.my_ship.angle = 0.0
+    world.fire_missile(1)
+    missile = list(world.missile_group)[0]
+    # the missile touches the rock after its move of the step (and the ship does not)
+    world.rock_group.add(Sprite((missile.pos[0] + 45.0, missile.pos[1]), (0.0, 0.0), 0.0, 0.0, 0.0, asteroid_info))
+    world.step(1.0)
+    assert len(world.rock_group) == 0
+    assert len(world.explosions) == 1
+    assert world.explosions.age == [0]
+    world.step(1.0)
+    assert world.explosions.age == [1.0]
+    return
@@ -0,0 +1,112 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the reinforcement learning environments  #
+# ---------------------------------------------------------------- #
+"""
+
+observe() (engine/env.py) ranks the rocks of each world of a batch as a
+plain computation world by world does (nearest rocks around the world
+first, padding after the last one, nothing for a world without rocks),
+and a VecEnv plays the same games as Envs of the same seeds.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine import env as env_module
+from engine import world as world_module
+
+pytestmark = pytest.mark.skipif(env_module.numpy is None, reason = "NumPy is not installed")
+
+from engine.env import (Env, VecEnv, EnvWorld, ACTIONS, NEAREST_ROCKS, SHIP_FEATURES, ROCK_FEATURES,
+                        OBSERVATION_SIZE, observe)
+
+##################################################################
+
+def played_world(seed, rocks):
+    # a seeded game with 'rocks' rocks spawned, played for 20 ticks
+    world = EnvWorld(seed)
+    world.rock_max_number = rocks
+    for k in range(0, rocks):
+        world.rock_spawner()
+    for t in range(0, 20):
+        world.play(t % len(ACTIONS))
+    return world
+
+def expected_rocks(world):
+    # the rock features of 'world', rock by rock (nearest first, as many as observed)
+    size = (world_module.WORLD_WIDTH, world_module.WORLD_HEIGHT)
+    half = (size[0] / 2.0, size[1] / 2.0)
+    velocity_max = world_module.VELOCITY_MAX_SHIP
+    ship = world.my_ship
+    rows = []
+    for rock in world.rock_group:
+        dx = (rock.pos[0] - ship.pos[0] + half[0]) % size[0] - half[0]
+        dy = (rock.pos[1] - ship.pos[1] + half[1]) % size[1] - half[1]
+        rows.append((dx * dx + dy * dy, [1.0, dx / half[0], dy / half[1],
+                                         (rock.vel[0] - ship.vel[0]) / velocity_max,
+                                         (rock.vel[1] - ship.vel[1]) / velocity_max]))
+    rows.sort(key = lambda row: row[0])
+    return [features for distance, features in rows[:NEAREST_ROCKS]]
+
+def check(observation, world):
+    rocks = expected_rocks(world)
+    for k in range(0, NEAREST_ROCKS):
+        features = observation[SHIP_FEATURES + k * ROCK_FEATURES:SHIP_FEATURES + (k + 1) * ROCK_FEATURES].tolist()
+        if k < len(rocks):
+            assert features == pytest.approx(rocks[k], abs = 1e-5)
+        else:
+            assert features == [0.0] * ROCK_FEATURES
+    return
+
+##################################################################
+
+def test_observe_ranks_the_rocks_of_each_world():
+    # more rocks than observed, fewer, none
+    worlds = [played_world(0, 12), played_world(1, 3), played_world(2, 0), played_world(3, NEAREST_ROCKS)]
+    worlds[2].rock_group.difference_update(set(worlds[2].rock_group))
+    assert [min(len(world.rock_group), NEAREST_ROCKS) for world in worlds] == [NEAREST_ROCKS, 3, 0, NEAREST_ROCKS]
+    observations = observe(worlds)
+    assert observations.shape == (len(worlds), OBSERVATION_SIZE)
+    for observation, world in zip(observations, worlds):
+        check(observation, world)
+        # (the same observation alone in its batch)
+        assert (observe([world])[0] == observation).all()
+    # a batch of worlds without rocks only
+    observations = observe([worlds[2], worlds[2]])
+    assert (observations[:, SHIP_FEATURES:] == 0.0).all()
+    return
+
+def test_vec_env_plays_the_games_of_envs():
+    seeds = [5, 6, 7]
+    vec_env = VecEnv(len(seeds), max_ticks = 200)
+    envs = [Env(max_ticks = 200) for seed in seeds]
+    observations, info = vec_env.reset(seeds)
+    assert info["seeds"] == seeds
+    for k in range(0, len(seeds)):
+        observation, info = envs[k].reset(seeds[k])
+        assert (observation == observations[k]).all()
+    finished = 0
+    for t in range(0, 200):
+        actions = [(t * 5 + 3 * k) % len(ACTIONS) for k in range(0, len(seeds))]
+        observations, rewards, terminated, truncated, infos = vec_env.step(actions)
+        for k in range(0, len(seeds)):
+            observation, reward, over, cut, info = envs[k].step(actions[k])
+            assert (reward, over, cut) == (rewards[k], terminated[k], truncated[k])
+            if over or cut:
+                # (the VecEnv world is already reset: its last observation is in the info)
+                assert (observation == infos[k]["final_observation"]).all()
+                assert info["stats"] == infos[k]["stats"]
+                finished += 1
+            else:
+                assert k not in infos
+                assert (observation == observations[k]).all()
+                check(observation, envs[k].world)
+    # all the games are truncated at the last step
+    assert finished == len(seeds)
+    return
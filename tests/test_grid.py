@@ -0,0 +1,111 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the spatial grid                          #
+# ---------------------------------------------------------------- #
+"""
+
+SpatialGrid.pairs(), SpatialGrid.query() and SpatialGrid.query_segment()
+against a brute force scan of all the objects: the grid may return more
+candidates, but never misses an object close enough.
+
+"""
+##################################################################
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine.grid import SpatialGrid
+
+##################################################################
+
+def torus_dist_squared(p, q, width, height):
+    # distance squared around the world (brute force: the nearest of the 9 images of q)
+    return min((p[0] - q[0] - dx) ** 2 + (p[1] - q[1] - dy) ** 2
+               for dx in (-width, 0, width) for dy in (-height, 0, height))
+
+def random_positions(rnd, n, width, height):
+    return [(rnd.uniform(0, width), rnd.uniform(0, height)) for i in range(0, n)]
+
+def segment_dist_squared(pos, p, q, width, height):
+    # distance squared from 'pos' to segment p -> q, around the world
+    best = float("inf")
+    dx, dy = q[0] - p[0], q[1] - p[1]
+    length2 = dx * dx + dy * dy
+    for shift_x in (-width, 0, width):
+        for shift_y in (-height, 0, height):
+            x, y = pos[0] + shift_x, pos[1] + shift_y
+            t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((x - p[0]) * dx + (y - p[1]) * dy) / length2))
+            ex, ey = x - (p[0] + t * dx), y - (p[1] + t * dy)
+            best = min(best, ex * ex + ey * ey)
+    return best
+
+##################################################################
+
+@pytest.mark.parametrize("width, height, cell_size", [(800, 600, 80), (800, 600, 250), (100, 100, 60)])
+def test_pairs_contain_all_close_pairs(width, height, cell_size):
+    rnd = random.Random(width + cell_size)
+    positions = random_positions(rnd, 150, width, height)
+    grid = SpatialGrid(width, height, cell_size)
+    grid.build(positions)
+    pairs = grid.pairs()
+    # sorted, without duplicates, i < j
+    assert pairs == sorted(set(pairs))
+    assert all(i < j for i, j in pairs)
+    candidates = set(pairs)
+    for i in range(0, len(positions)):
+        for j in range(i + 1, len(positions)):
+            if torus_dist_squared(positions[i], positions[j], width, height) < cell_size ** 2:
+                assert (i, j) in candidates
+    return
+
+def test_query_contains_all_close_objects():
+    rnd = random.Random(1)
+    width, height, cell_size = 800, 600, 80
+    positions = random_positions(rnd, 200, width, height)
+    grid = SpatialGrid(width, height, cell_size)
+    grid.build(positions)
+    for pos in random_positions(rnd, 50, width, height):
+        found = set(grid.query(pos))
+        for i in range(0, len(positions)):
+            if torus_dist_squared(pos, positions[i], width, height) < cell_size ** 2:
+                assert i in found
+    return
+
+def test_query_segment_contains_all_close_objects():
+    rnd = random.Random(2)
+    width, height, cell_size = 800, 600, 80
+    positions = random_positions(rnd, 200, width, height)
+    grid = SpatialGrid(width, height, cell_size)
+    grid.build(positions)
+    for k in range(0, 100):
+        p = (rnd.uniform(0, width), rnd.uniform(0, height))
+        angle = rnd.uniform(0, 2 * math.pi)
+        length = rnd.uniform(0, 300)
+        q = (p[0] + length * math.cos(angle), p[1] + length * math.sin(angle))
+        distance = rnd.uniform(0, grid.reach * 0.99)
+        found = grid.query_segment(p, q, distance)
+        assert found == sorted(set(found))
+        for i in range(0, len(positions)):
+            if segment_dist_squared(positions[i], p, q, width, height) < distance ** 2:
+                assert i in found
+    return
+
+def test_query_segment_rejects_distance_over_reach():
+    grid = SpatialGrid(800, 600, 80)
+    grid.build([(0, 0)])
+    with pytest.raises(ValueError):
+        grid.query_segment((0, 0), (10, 10), grid.reach)
+    return
+
+def test_removed_object_is_not_returned():
+    grid = SpatialGrid(800, 600, 80)
+    grid.build([(100, 100), (110, 100), (120, 100)])
+    grid.remove(1)
+    assert sorted(grid.query((110, 100))) == [0, 2]
+    assert grid.pairs() == [(0, 2)]
+    return
@@ -0,0 +1,86 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the hyperspace distance field             #
+# ---------------------------------------------------------------- #
+"""
+
+DistanceField (engine/hyperspace.py) against the search of the original
+game: the distance of every point of the hyperspace grid to every rock,
+then the point furthest from its nearest rock.
+
+"""
+##################################################################
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine.hyperspace import DistanceField
+from engine.world import HYPER_GRID, WIDTH, HEIGHT, hyper_cell
+
+##################################################################
+
+def torus_dist_squared(p, q):
+    # distance squared around the world (brute force: the nearest of the 9 images of q)
+    return min((p[0] - q[0] - dx) ** 2 + (p[1] - q[1] - dy) ** 2
+               for dx in (-WIDTH, 0, WIDTH) for dy in (-HEIGHT, 0, HEIGHT))
+
+def scan_safest(points, rocks):
+    # the search of the original game: (index of the safest point, its distance squared to the nearest rock)
+    d_max = 0.0
+    safest = -1
+    for i in range(0, len(points)):
+        d_min = float('inf')
+        for rock in rocks:
+            d_min = min(d_min, torus_dist_squared(points[i], rock))
+        if d_min > d_max:
+            d_max = d_min
+            safest = i
+    return (safest, d_max)
+
+def random_rocks(rnd, n):
+    # rocks anywhere, and rocks within a few pixels of the edges (their nearest points are across the wrap)
+    rocks = [(rnd.uniform(0, WIDTH), rnd.uniform(0, HEIGHT)) for i in range(0, n)]
+    for i in range(0, rnd.randrange(0, 4)):
+        rocks.append((rnd.choice((rnd.uniform(0, 5), rnd.uniform(WIDTH - 5, WIDTH))), rnd.uniform(0, HEIGHT)))
+        rocks.append((rnd.uniform(0, WIDTH), rnd.choice((rnd.uniform(0, 5), rnd.uniform(HEIGHT - 5, HEIGHT)))))
+    return rocks
+
+##################################################################
+
+@pytest.mark.parametrize("seed", range(0, 100))
+def test_safest_point_matches_the_scan(seed):
+    rnd = random.Random(seed)
+    rocks = random_rocks(rnd, rnd.randrange(1, 30))
+    field = DistanceField(HYPER_GRID, hyper_cell[0])
+    field.refresh(rocks)
+    safest, distance = field.get_safest()
+    expected, expected_distance = scan_safest(HYPER_GRID, rocks)
+    assert safest == expected
+    # (the distance is the one to the rock found by the propagation: the nearest one, or a few pixels further)
+    assert expected_distance - 1e-6 <= distance
+    assert math.sqrt(distance) - math.sqrt(expected_distance) < 8.0
+    return
+
+def test_no_rock():
+    field = DistanceField(HYPER_GRID, hyper_cell[0])
+    assert field.safest == -1
+    field.refresh([])
+    # (as in the original game: every point is at an infinite distance, the first one is chosen)
+    assert field.get_safest() == (0, float('inf'))
+    assert scan_safest(HYPER_GRID, [])[0] == 0
+    return
+
+def test_refresh_follows_the_rocks():
+    field = DistanceField(HYPER_GRID, hyper_cell[0])
+    rnd = random.Random(1)
+    for k in range(0, 5):
+        rocks = random_rocks(rnd, 10)
+        field.refresh(rocks, time = k)
+        assert field.time == k
+        assert field.get_safest()[0] == scan_safest(HYPER_GRID, rocks)[0]
+    return
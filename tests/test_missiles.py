@@ -0,0 +1,102 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the missile-rock collisions               #
+# ---------------------------------------------------------------- #
+"""
+
+World.group_group_collide with the swept test of the missiles (along
+their trajectory of the step) and with the point test (MISSILE_SWEPT =
+False), and a missile hitting several rocks at once.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine.world import World, Sprite, asteroid_info, VELOCITY_MAX_SHIP
+
+##################################################################
+
+def numpy_options():
+    options = [False]
+    try:
+        import numpy
+        options.append(True)
+    except ImportError:
+        pass
+    return options
+
+def empty_world(numpy_physics, missile_swept = True):
+    # a world without rock, its ship at rest in the middle
+    world = World(seed = 0)
+    world.numpy_physics = numpy_physics
+    world.game_init()
+    world.missile_swept = missile_swept
+    return world
+
+def fastest_missile(world):
+    # fire a missile from the ship at full speed towards +x (maximum ship-speed bonus: 2.5 x VELOCITY_MISSILE)
+    ship = world.my_ship
+    ship.angle = 0.0
+    ship.vel = [VELOCITY_MAX_SHIP, 0.0]
+    world.fire_missile(1)
+    missile = list(world.missile_group)[0]
+    assert missile.vel[0] == 30.0 and missile.vel[1] == 0.0
+    return missile
+
+def add_rock(world, pos):
+    world.rock_group.add(Sprite(pos, (0.0, 0.0), 1.0, 0.0, 0.0, asteroid_info))
+    return
+
+##################################################################
+
+@pytest.mark.parametrize("numpy_physics", numpy_options())
+@pytest.mark.parametrize("missile_swept", [True, False])
+def test_fast_missile_crossing_a_rock_edge(numpy_physics, missile_swept):
+    world = empty_world(numpy_physics, missile_swept)
+    missile = fastest_missile(world)
+    # the missile crosses the edge of the rock during the step (a chord of 26 pixels, shorter than its
+    # 30 pixels step): it touches the rock neither before nor after the step
+    radius = asteroid_info.get_radius() + missile.radius
+    rock = (missile.pos[0] + 15.0, missile.pos[1] + 41.0)
+    add_rock(world, rock)
+    assert (missile.pos[0] - rock[0]) ** 2 + (missile.pos[1] - rock[1]) ** 2 > radius ** 2
+    missile.update(world.my_ship, 1.0)
+    assert (missile.pos[0] - rock[0]) ** 2 + (missile.pos[1] - rock[1]) ** 2 > radius ** 2
+    explosions = len(world.explosions)
+    hit = world.group_group_collide(world.missile_group, world.rock_group, 1.0)
+    if missile_swept:
+        assert hit == 1
+        assert len(world.rock_group) == 0
+        assert len(world.missile_group) == 0
+        assert len(world.explosions) == explosions + 1
+    else:
+        # the point test misses it
+        assert hit == 0
+        assert len(world.rock_group) == 1
+        assert len(world.missile_group) == 1
+        assert len(world.explosions) == explosions
+    return
+
+@pytest.mark.parametrize("numpy_physics", numpy_options())
+@pytest.mark.parametrize("missile_swept", [True, False])
+def test_missile_overlapping_two_rocks(numpy_physics, missile_swept):
+    world = empty_world(numpy_physics, missile_swept)
+    missile = fastest_missile(world)
+    missile.update(world.my_ship, 1.0)
+    # one rock above and one below the missile, both touching it (and a third one out of reach)
+    add_rock(world, (missile.pos[0], missile.pos[1] - 30.0))
+    add_rock(world, (missile.pos[0] + 5.0, missile.pos[1] + 30.0))
+    add_rock(world, (missile.pos[0] + 100.0, missile.pos[1]))
+    explosions = len(world.explosions)
+    hit = world.group_group_collide(world.missile_group, world.rock_group, 1.0)
+    assert hit == 2
+    assert len(world.rock_group) == 1
+    assert list(world.rock_group)[0].pos[0] == missile.pos[0] + 100.0
+    assert len(world.missile_group) == 0
+    assert len(world.explosions) == explosions + 2
+    return
@@ -0,0 +1,99 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the vectorized rock physics               #
+# ---------------------------------------------------------------- #
+"""
+
+The NumPy rock physics (engine/physics.py) against the Python one
+(Sprite.update, then a whole seeded game tick by tick), and the removal
+of rocks from a RockGroup.
+
+"""
+##################################################################
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from engine.physics import RockGroup, RockView
+from engine.world import World, Sprite, asteroid_info
+
+##################################################################
+
+def random_rocks(rnd, n):
+    return [Sprite((rnd.uniform(0, 800), rnd.uniform(0, 600)), (rnd.uniform(-2, 2), rnd.uniform(-2, 2)),
+                   rnd.uniform(0.0, 1.0), rnd.uniform(0, 6), rnd.uniform(-0.1, 0.1), asteroid_info)
+            for i in range(0, n)]
+
+def rock_values(rocks):
+    return [(float(rock.pos[0]), float(rock.pos[1]), float(rock.vel[0]), float(rock.vel[1]),
+             float(rock.angle), float(rock.age)) for rock in rocks]
+
+def play(numpy_physics, ticks):
+    # the rocks of each tick of a seeded game
+    world = World(seed = 42)
+    world.numpy_physics = numpy_physics
+    world.game_init()
+    result = []
+    for t in range(0, ticks):
+        if t % 5 == 0:
+            world.key_input("space", 1)
+        if t % 97 == 0:
+            world.key_input("left", t % 2)
+        if t % 300 == 0:
+            world.key_input("up", (t // 300) % 2)
+        world.tick()
+        result.append(rock_values(world.rock_group))
+        if world.is_over():
+            break
+    return result
+
+##################################################################
+
+def test_update_matches_sprite_update():
+    ship = World(seed = 0).my_ship
+    sprites = random_rocks(random.Random(3), 40)
+    group = RockGroup(asteroid_info)
+    views = [group.add(sprite) for sprite in random_rocks(random.Random(3), 40)]
+    for t in range(0, 200):
+        for sprite in sprites:
+            sprite.update(ship, 1.0)
+        group.update(ship, 1.0)
+    assert numpy.allclose(rock_values(views), rock_values(sprites), rtol = 0, atol = 1e-6)
+    return
+
+def test_remove_keeps_order_and_values():
+    group = RockGroup(asteroid_info)
+    views = [group.add(sprite) for sprite in random_rocks(random.Random(4), 6)]
+    values = rock_values(views)
+    removed = views[2]
+    group.remove(removed)
+    assert removed not in group
+    assert list(group) == views[:2] + views[3:]
+    assert rock_values(group) == values[:2] + values[3:]
+    # the removed rock is a plain Sprite with its last values
+    assert not isinstance(removed, RockView)
+    assert rock_values([removed]) == [values[2]]
+    group.difference_update([views[0], views[5], removed])
+    assert list(group) == [views[1], views[3], views[4]]
+    assert rock_values(group) == [values[1], values[3], values[4]]
+    # a removed rock can be added again (at the end)
+    again = group.add(removed)
+    assert list(group)[-1] is again
+    assert rock_values([again]) == [values[2]]
+    return
+
+def test_games_match():
+    python_rocks = play(False, 1500)
+    numpy_rocks = play(True, 1500)
+    assert len(python_rocks) == len(numpy_rocks)
+    for t in range(0, len(python_rocks)):
+        assert len(python_rocks[t]) == len(numpy_rocks[t]), "tick %d" % t
+        if python_rocks[t]:
+            assert numpy.allclose(python_rocks[t], numpy_rocks[t], rtol = 0, atol = 1e-6), "tick %d" % t
+    return
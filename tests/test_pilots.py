@@ -0,0 +1,108 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the threat evaluation of the AutoPilot    #
+# ---------------------------------------------------------------- #
+"""
+
+threats() (engine/pilots.py) gives the same times to collision and the
+same aims with NumPy (from BATCH_MIN rocks) as the plain loops of
+threats_loop(), for the rocks of seeded games, on both sides of
+BATCH_MIN.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine import pilots
+from engine.pilots import BATCH_MIN, HORIZON, HORIZON_STEP, RandomPilot, rock_arrays, threats, threats_loop
+from engine.world import World
+
+##################################################################
+
+def played_worlds(count):
+    # 'count' seeded games: 12 rocks spawned, then 30 ticks played by the random pilot
+    worlds = []
+    for seed in range(0, count):
+        world = World(seed = seed)
+        world.sounds = None
+        world.rock_max_number = 12
+        for k in range(0, 12):
+            world.rock_spawner()
+        pilot = RandomPilot(seed)
+        for t in range(0, 30):
+            pilot.act(world)
+            world.tick()
+        worlds.append(world)
+    return worlds
+
+def batch(worlds, n):
+    # the first 'n' rocks of the worlds, world after world (as Squadron.act gathers them), and the ships
+    positions = []
+    velocities = []
+    masses = []
+    owner = []
+    ships = []
+    for world in worlds:
+        if len(masses) == n:
+            break
+        p, v, m = rock_arrays(world)
+        k = min(len(m), n - len(masses))
+        positions += [(float(p[i][0]), float(p[i][1])) for i in range(0, k)]
+        velocities += [(float(v[i][0]), float(v[i][1])) for i in range(0, k)]
+        masses += [float(m[i]) for i in range(0, k)]
+        owner += [len(ships)] * k
+        ships.append(world.my_ship)
+    assert len(masses) == n
+    return positions, velocities, masses, [ship.pos for ship in ships], [ship.vel for ship in ships], owner
+
+def same_threats(result, expected):
+    ttc, aims = result
+    expected_ttc, expected_aims = expected
+    assert ttc == expected_ttc
+    for aim, expected_aim in zip(aims, expected_aims):
+        if expected_aim is None:
+            assert aim is None
+        else:
+            assert aim[1] == expected_aim[1]
+            assert abs(aim[0] - expected_aim[0]) < 1e-9 and abs(aim[2] - expected_aim[2]) < 1e-9
+    return
+
+##################################################################
+
+@pytest.fixture(scope = "module")
+def worlds():
+    # enough rocks for 3 x BATCH_MIN rocks
+    return played_worlds(8)
+
+@pytest.mark.skipif(pilots.numpy is None, reason = "NumPy is not installed")
+@pytest.mark.parametrize("n", [1, BATCH_MIN - 1, BATCH_MIN, BATCH_MIN + 1, 3 * BATCH_MIN])
+def test_numpy_threats_match_the_loops(worlds, monkeypatch, n):
+    arrays = batch(worlds, n)
+    expected = threats_loop(*(arrays + (HORIZON, HORIZON_STEP)))
+    # some rocks come close, some can be aimed at
+    if n >= BATCH_MIN:
+        assert any(t != float("inf") for t in expected[0]) and any(aim is not None for aim in expected[1])
+    # NumPy from BATCH_MIN rocks (the loops below), then NumPy whatever the number of rocks
+    loops = []
+    monkeypatch.setattr(pilots, "threats_loop", lambda *args: loops.append(args) or threats_loop(*args))
+    same_threats(threats(*arrays), expected)
+    assert len(loops) == (0 if n >= BATCH_MIN else 1)
+    monkeypatch.setattr(pilots, "BATCH_MIN", 0)
+    same_threats(threats(*arrays), expected)
+    # the arrays of the batches (NumPy arrays, and the owners of float type after concatenating empty lists)
+    numpy = pilots.numpy
+    p, v, m, ship_pos, ship_vel, owner = arrays
+    owner = pilots.concatenate([numpy.array([]), numpy.array(owner, dtype = float)])
+    same_threats(threats(numpy.array(p), numpy.array(v), numpy.array(m), ship_pos, ship_vel, owner), expected)
+    same_threats(threats_loop(numpy.array(p), numpy.array(v), numpy.array(m), ship_pos, ship_vel, owner,
+                              HORIZON, HORIZON_STEP), expected)
+    return
+
+def test_no_rock():
+    assert threats([], [], [], [(400.0, 300.0)], [(0.0, 0.0)], []) == ([], [])
+    return
@@ -0,0 +1,70 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the object pools                          #
+# ---------------------------------------------------------------- #
+"""
+
+The entities (missiles, rocks, texts) are recycled through the pools of
+engine/pool.py (and the explosions are batched, see engine/effects.py):
+once the populations have reached their peak, steady-state play does not
+allocate any more.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.pool import Pool
+from engine.world import World, Text
+
+##################################################################
+
+def play(world, seed, ticks):
+    # play 'ticks' ticks of a scripted game (firing and turning, a new game when over)
+    world.game_init(seed)
+    for t in range(0, ticks):
+        if t % 5 == 0:
+            world.key_input("space", 1)
+        if t % 97 == 0:
+            world.key_input("left", t % 2)
+        if t % 300 == 0:
+            world.key_input("up", (t // 300) % 2)
+        world.tick()
+        if world.is_over():
+            world.game_init()
+    return
+
+##################################################################
+
+def test_pool_recycles_released_objects():
+    pool = Pool(Text)
+    first = pool.acquire("a", 100, 30)
+    pool.release(first)
+    second = pool.acquire("b", 200, 60)
+    assert second is first
+    assert (second.text, second.y, second.age, second.lifespan) == ("b", 200, 0, 60)
+    assert pool.allocated == 1
+    # objects of another class are not recycled
+    pool.release(object())
+    assert pool.free == []
+    return
+
+def test_steady_state_does_not_allocate():
+    world = World(seed = 0)
+    # (the NumPy rocks are stored in arrays, not in the pool)
+    world.numpy_physics = False
+    # warm-up: the populations reach their peak
+    play(world, 1, 3000)
+    allocated = world.allocations()
+    assert allocated > 0
+    # the same game again: every entity is recycled
+    play(world, 1, 3000)
+    assert world.allocations() == allocated
+    # another game: no allocation once its peak populations have been reached
+    play(world, 2, 3000)
+    warm = world.allocations()
+    play(world, 2, 3000)
+    assert world.allocations() == warm
+    return
@@ -0,0 +1,86 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the per-phase profiler                    #
+# ---------------------------------------------------------------- #
+"""
+
+The nearest rank percentiles of engine/profiler.py, and the rolling
+windows of the phases (a phase that did not run in a frame counts 0).
+
+"""
+##################################################################
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.profiler import Profiler, percentile
+
+##################################################################
+
+def frame(profiler, times):
+    # close a frame with the given {phase: seconds} (instead of timing the laps)
+    for phase in times:
+        profiler.current[phase] = times[phase]
+    profiler.end_frame()
+    return
+
+##################################################################
+
+def test_percentile():
+    values = list(range(0, 101))
+    assert percentile(values, 0) == 0
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([7], 99) == 7
+    # nearest rank
+    assert percentile([1, 2, 3, 4], 50) == 3
+    assert percentile([1, 2, 3, 4], 25) == 2
+    assert percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 95) == 10
+    return
+
+def test_idle_phases_count_zero():
+    profiler = Profiler(window = 10)
+    frame(profiler, {"ticks": 0.004, "draw": 0.002})
+    frame(profiler, {"draw": 0.002})
+    frame(profiler, {"draw": 0.003})
+    frame(profiler, {"ticks": 0.004, "draw": 0.002, "rock spawner": 0.001})
+    assert list(profiler.times["ticks"]) == [0.004, 0.0, 0.0, 0.004]
+    assert list(profiler.times["draw"]) == [0.002, 0.002, 0.003, 0.002]
+    # a phase is counted from the first frame it runs in
+    assert list(profiler.times["rock spawner"]) == [0.001]
+    assert profiler.times["frame"][1] == 0.002
+    assert abs(profiler.times["frame"][3] - 0.007) < 1e-12
+    summary = profiler.summary()
+    assert summary["ticks"]["count"] == 4
+    assert summary["ticks"]["p50"] == 4.0
+    assert summary["ticks"]["mean"] == 2.0
+    assert profiler.frames == 4
+    return
+
+def test_windows_roll():
+    profiler = Profiler(window = 3)
+    for i in range(0, 5):
+        frame(profiler, {"draw": i * 0.001})
+    assert list(profiler.times["draw"]) == [0.002, 0.003, 0.004]
+    assert profiler.summary()["draw"]["count"] == 3
+    return
+
+def test_dump(tmp_path):
+    profiler = Profiler()
+    frame(profiler, {"ticks": 0.004})
+    path = str(tmp_path / "profile.json")
+    profiler.dump(path)
+    with open(path) as f:
+        data = json.load(f)
+    assert data["frames"] == 1
+    assert list(data["phases"]) == ["ticks", "frame"]
+    path = str(tmp_path / "profile.csv")
+    profiler.dump(path)
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith("phase,count")
+    assert [line.split(",")[0] for line in lines[1:]] == ["ticks", "frame"]
+    return
@@ -0,0 +1,85 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the recording and replay                  #
+# ---------------------------------------------------------------- #
+"""
+
+A recorded game replayed from its recording, and seeked backward and
+forward, goes through exactly the states of the recorded game (compared
+as exact snapshots, see engine/snapshot.py).
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine.replay import Recorder, Replay, read_recording
+from engine.snapshot import encode
+from engine.world import World
+
+##################################################################
+
+def record_game(path, numpy_physics, ticks):
+    # play and record a seeded game: return its exact snapshots {tick: snapshot}
+    world = World()
+    world.sounds = None
+    world.numpy_physics = numpy_physics
+    world.game_init(7)
+    recorder = Recorder(world, path)
+    states = {0: encode(world, exact = True, state = True)}
+    for t in range(0, ticks):
+        if t % 4 == 0:
+            world.key_input("space", 1)
+        if t % 53 == 0:
+            world.key_input("right", (t // 53) % 2)
+        if t % 250 == 0:
+            world.key_input("up", (t // 250) % 2)
+        if t % 640 == 0 and t > 0:
+            world.key_input("h", 1)
+        world.tick()
+        states[world.ticks] = encode(world, exact = True, state = True)
+        if world.is_over():
+            break
+    recorder.close()
+    return states
+
+def numpy_options():
+    options = [False]
+    try:
+        import numpy
+        options.append(True)
+    except ImportError:
+        pass
+    return options
+
+##################################################################
+
+@pytest.mark.parametrize("numpy_physics", numpy_options())
+def test_replay_and_seek_match_the_recorded_game(tmp_path, numpy_physics):
+    path = str(tmp_path / "game.rec")
+    states = record_game(path, numpy_physics, 1500)
+    end = max(states)
+    seed, bounce_mode, recorded_numpy, events, recorded_end = read_recording(path)
+    assert (seed, recorded_numpy, recorded_end) == (7, numpy_physics, end)
+
+    replay = Replay(path, snapshot_interval = 200)
+    # replay the whole game
+    assert encode(replay.run(), exact = True, state = True) == states[end]
+    # seek backward (from a snapshot), then forward (from the current tick, or from a closer snapshot)
+    for tick in (350, 1, 1210, 600, 0, 999, end):
+        world = replay.seek(tick)
+        assert world.ticks == tick
+        assert encode(world, exact = True, state = True) == states[tick], "tick %d" % tick
+    return
+
+def test_replay_stops_at_the_end_of_the_recording(tmp_path):
+    path = str(tmp_path / "game.rec")
+    states = record_game(path, False, 300)
+    replay = Replay(path)
+    world = replay.run_to(10000)
+    assert world.ticks == max(states)
+    return
@@ -0,0 +1,97 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the batch simulation runner               #
+# ---------------------------------------------------------------- #
+"""
+
+The constants that can be overridden with --set (engine/runner.py): any
+other name, or a value of the wrong type, is rejected, and an override
+reaches the constants derived from it in the workers.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine import runner
+from engine import world as world_module
+from engine.world import World
+
+##################################################################
+
+@pytest.fixture
+def restore_constants():
+    # put back the constants of engine/world.py changed by a test
+    saved = dict((name, getattr(world_module, name)) for name in runner.PARAMS)
+    yield
+    for name in saved:
+        setattr(world_module, name, saved[name])
+    world_module.derive_constants()
+    return
+
+def rejected(capsys, option):
+    # run the command line with '--set option': return the error message
+    with pytest.raises(SystemExit) as error:
+        runner.main(["runner", "--games", "1", "--set", option])
+    assert error.value.code == 2
+    return capsys.readouterr().err
+
+##################################################################
+
+def test_parse_value():
+    assert runner.parse_value("True") is True
+    assert runner.parse_value("False") is False
+    assert runner.parse_value("12") == 12 and type(runner.parse_value("12")) is int
+    assert runner.parse_value("1.5") == 1.5
+    assert runner.parse_value("fast") == "fast"
+    return
+
+def test_unknown_and_derived_names_are_rejected(capsys):
+    assert "not a constant that can be overridden" in rejected(capsys, "NO_SUCH_CONSTANT=1")
+    # derived from VELOCITY_MISSILE, and constants that do not change a headless game
+    assert "not a constant that can be overridden" in rejected(capsys, "MISSILE_LIFE=10")
+    assert "not a constant that can be overridden" in rejected(capsys, "TICK_RATE=30.0")
+    assert "NAME=VALUE expected" in rejected(capsys, "ROCK_MAX_NUMBER")
+    return
+
+def test_wrong_types_are_rejected(capsys):
+    assert "int value expected" in rejected(capsys, "ROCK_MAX_NUMBER=1.5")
+    assert "bool value expected" in rejected(capsys, "BOUNCE_MODE=1")
+    assert "float value expected" in rejected(capsys, "SHIP_GRAVITY_PULL=strong")
+    return
+
+def test_init_worker_rejects_other_names(restore_constants):
+    with pytest.raises(ValueError):
+        runner.init_worker({"MISSILE_LIFE": 10.0})
+    return
+
+def test_override_reaches_the_derived_constants(restore_constants):
+    runner.init_worker({"VELOCITY_MISSILE": 8.0, "ROCK_MAX_NUMBER": 3})
+    life = (0.35 * world_module.WIDTH) // 8.0
+    assert world_module.MISSILE_LIFE == life
+    world = World(seed = 0)
+    world.key_input("space", 1)
+    missile = list(world.missile_group)[0]
+    assert missile.lifespan == life
+    # the world reads the other constants when it uses them
+    for t in range(0, 600):
+        world.tick()
+    assert len(world.rock_group) <= 3
+    return
+
+def test_world_size_override(restore_constants):
+    runner.init_worker({"WORLD_WIDTH": 1600})
+    # distances around the new world, hyperspace grid over the new world
+    assert world_module.torus_dist_squared((0, 0), (1500, 0)) == 10000
+    assert max(point[0] for point in world_module.HYPER_GRID) == 1580
+    world = World(seed = 0)
+    assert world.my_ship.pos[0] == 800
+    assert max(point[0] for point in world.hyper_field.points) == 1580
+    for t in range(0, 600):
+        world.tick()
+    assert all(0 <= rock.pos[0] < 1600 for rock in world.rock_group)
+    return
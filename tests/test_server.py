@@ -0,0 +1,169 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the multiplayer protocol                  #
+# ---------------------------------------------------------------- #
+"""
+
+The STATEs of Server.broadcast (engine/server.py), decoded by ClientView:
+a client knows the entities within the view around its ship, and
+predicts them within the tolerances of the server, as the arena plays (in
+a world of the size of the canvas, and in a larger one).
+
+"""
+##################################################################
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine import server as server_module
+from engine import world as world_module
+from engine.server import (Server, Client, ClientView, FRAME, WELCOME, SHIP_ID, SHIP, THRUST, ROCK, MISSILE,
+                           INTEREST_MARGIN, POSITION_TOLERANCE, ANGLE_TOLERANCE, offset, angle_offset)
+
+##################################################################
+
+@pytest.fixture(params = [1, 4])
+def world_scale(request):
+    # the world is 'scale' times as large as the canvas (along each dimension) while the test runs
+    saved = (world_module.WORLD_WIDTH, world_module.WORLD_HEIGHT)
+    world_module.WORLD_WIDTH = request.param * world_module.WIDTH
+    world_module.WORLD_HEIGHT = request.param * world_module.HEIGHT
+    world_module.derive_constants()
+    yield request.param
+    world_module.WORLD_WIDTH, world_module.WORLD_HEIGHT = saved
+    world_module.derive_constants()
+    return
+
+
+# FakeWriter class (the socket of a client: keeps the payloads of the frames sent)
+class FakeWriter:
+    def __init__(self):
+        self.transport = self
+        self.payloads = []
+        return
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def write(self, data):
+        assert FRAME.unpack_from(data, 0)[0] == len(data) - FRAME.size
+        self.payloads.append(data[FRAME.size:])
+        return
+
+
+def connect(server):
+    # a client of 'server' (as Server.handle adds it) and its view
+    player = server.arena.add_player()
+    client = Client(player, FakeWriter())
+    server.clients[player.ident] = client
+    view = ClientView(WELCOME.pack(SHIP_ID | player.ident, server.width, server.height))
+    return client, view
+
+def receive(client, view):
+    # apply the STATEs sent to 'client' since the last call
+    for payload in client.writer.payloads:
+        view.apply(payload)
+    del client.writer.payloads[:]
+    return
+
+def in_view(server, client, pos):
+    center = client.player.my_ship.pos
+    return (abs(offset(pos[0], center[0], server.width)) <= server.view_size[0] / 2.0 + INTEREST_MARGIN and
+            abs(offset(pos[1], center[1], server.height)) <= server.view_size[1] / 2.0 + INTEREST_MARGIN)
+
+def check(server, client, view):
+    # the client knows the entities of its view, and nothing else, within the tolerances of the server
+    # (return the number of entities out of its view)
+    entities = dict((entity[0], entity) for entity in server.entities())
+    assert view.tick == server.arena.ticks
+    assert (view.score, view.lives) == (client.player.score, client.player.lives)
+    visible = set(ident for ident in entities if in_view(server, client, entities[ident][2]))
+    assert set(view.entities) == visible
+    assert set(client.known) == visible
+    # (quantization of the positions: 1/65536 of the world)
+    error = POSITION_TOLERANCE + server.width / 65536.0
+    for ident in visible:
+        kind, pos, vel, angle = entities[ident][1:5]
+        predicted = view.predict(ident, view.tick)
+        assert predicted[0] == kind
+        assert abs(offset(predicted[1], pos[0], server.width)) <= error
+        assert abs(offset(predicted[2], pos[1], server.height)) <= error
+        assert abs(angle_offset(predicted[3], angle)) <= ANGLE_TOLERANCE + 2.0 * math.pi / 256.0
+    return len(entities) - len(visible)
+
+##################################################################
+
+def test_first_state_holds_the_view(world_scale):
+    server = Server(seed = 0)
+    client, view = connect(server)
+    other, other_view = connect(server)
+    server.arena.player_input(other.player.ident, "up", 1)
+    server.arena.step(1.0)
+    server.broadcast()
+    receive(client, view)
+    assert view.states == 1
+    check(server, client, view)
+    # its own ship, the other one (thrusting)
+    own = SHIP_ID | client.player.ident
+    assert view.entities[own][0] == SHIP
+    assert abs(view.entities[own][1] - client.player.my_ship.pos[0]) <= server.width / 65536.0
+    if world_scale == 1:
+        assert view.entities[SHIP_ID | other.player.ident][0] == SHIP + THRUST
+    return
+
+def test_deltas_keep_the_client_in_tolerance(world_scale):
+    server = Server(seed = 1)
+    clients = [connect(server) for i in range(0, 3)]
+    arena = server.arena
+    idents = [client.player.ident for client, view in clients]
+    kinds = set()
+    # bytes of the entities sent, and of all the entities of the views (if they were sent in each STATE)
+    sent = 0
+    full = 0
+    hidden = 0
+    for t in range(1, 601):
+        # each ship turns and fires, the first one thrusts
+        arena.player_input(idents[0], "up", 1)
+        arena.player_input(idents[t % 3], "left", t // 50 % 2)
+        arena.player_input(idents[(t + 1) % 3], "space", 1)
+        arena.tick()
+        if arena.ticks % server.send_ticks == 0:
+            server.broadcast()
+            for client, view in clients:
+                header = server_module.STATE.unpack_from(client.writer.payloads[0], 0)
+                sent += header[3] * server_module.ENTITY.size
+                receive(client, view)
+                hidden += check(server, client, view)
+                full += len(view.entities) * server_module.ENTITY.size
+                kinds.update(entity[0] for entity in view.entities.values())
+    assert ROCK in kinds and MISSILE in kinds and SHIP + THRUST in kinds
+    # most of the entities are predicted well enough by the clients
+    assert sent < full / 2
+    # (in a world of the size of the canvas, the views cover the whole world)
+    assert (hidden > 0) == (world_scale > 1)
+    return
+
+def test_explosions_around_the_client(world_scale):
+    server = Server(seed = 0)
+    client, view = connect(server)
+    ship = client.player.my_ship.pos
+    near = (ship[0] + 100.0, ship[1] - 50.0)
+    far = ((ship[0] + server.width / 2.0) % server.width, (ship[1] + server.height / 2.0) % server.height)
+    server.arena.new_explosion(near, 1, 1)
+    server.arena.new_explosion(far, 2, 2)
+    server.broadcast()
+    receive(client, view)
+    # (the explosion on the other side of a larger world is out of view)
+    assert len(view.explosions) == (2 if world_scale == 1 else 1)
+    x, y, scale, sheet = view.explosions[0]
+    assert abs(x - near[0]) <= server.width / 65536.0 and abs(y - near[1]) <= server.height / 65536.0
+    assert (scale, sheet) == (1.0, 1)
+    # the explosions are sent once
+    server.broadcast()
+    receive(client, view)
+    assert view.explosions == []
+    return
@@ -0,0 +1,124 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the binary snapshots                      #
+# ---------------------------------------------------------------- #
+"""
+
+Snapshots (engine/snapshot.py) encoded, decoded and restored, and delta
+snapshots applied to their base, against the world they describe.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine.snapshot import GROUPS, TOLERANCE, Snapshot, SnapshotEncoder, apply_delta, encode, restore
+from engine.world import World
+
+##################################################################
+
+def new_world(seed = 11):
+    world = World()
+    world.sounds = None
+    world.game_init(seed)
+    return world
+
+def play(world, ticks):
+    # scripted controls: fire, turn and thrust
+    for t in range(0, ticks):
+        if world.ticks % 6 == 0:
+            world.key_input("space", 1)
+        if world.ticks % 40 == 0:
+            world.key_input("left", (world.ticks // 40) % 2)
+        if world.ticks % 150 == 0:
+            world.key_input("up", (world.ticks // 150) % 2)
+        world.tick()
+    return world
+
+def fixed_error(kind, a, b):
+    # difference of two fixed point values (around 1 turn / the world for the angles / the positions)
+    error = abs(int(a) - int(b))
+    if kind in ("pos", "angle"):
+        error = min(error, 65536 - error)
+    return error
+
+##################################################################
+
+def test_exact_snapshot_restores_the_world():
+    world = play(new_world(), 400)
+    snapshot = encode(world, exact = True, state = True)
+    copy = restore(new_world(99), snapshot)
+    assert encode(copy, exact = True, state = True) == snapshot
+    # the restored world plays on exactly as the original
+    play(world, 300)
+    play(copy, 300)
+    assert encode(copy, exact = True, state = True) == encode(world, exact = True, state = True)
+    return
+
+def test_fixed_point_snapshot_values():
+    world = play(new_world(), 300)
+    snapshot = Snapshot(encode(world))
+    assert (snapshot.ticks, snapshot.score, snapshot.lives) == (world.ticks, int(world.score), world.lives)
+    rocks = list(world.rock_group)
+    assert snapshot.count("rocks") == len(rocks)
+    x = snapshot.values("rocks", "x")
+    y = snapshot.values("rocks", "y")
+    vx = snapshot.values("rocks", "vx")
+    for i in range(0, len(rocks)):
+        # (positions: 1/65536 of the world, velocities: 1/256 pixel per frame)
+        assert abs(float(x[i]) - rocks[i].pos[0]) <= snapshot.width / 65536.0
+        assert abs(float(y[i]) - rocks[i].pos[1]) <= snapshot.height / 65536.0
+        assert abs(float(vx[i]) - rocks[i].vel[0]) <= 1 / 256.0
+    ship = snapshot.entity("ship", 0)
+    assert abs(ship["x"] - world.my_ship.pos[0]) <= snapshot.width / 65536.0
+    return
+
+def test_exact_deltas_rebuild_the_snapshots():
+    world = new_world()
+    encoder = SnapshotEncoder(exact = True, state = True)
+    base = Snapshot(encoder.encode(world))
+    for k in range(0, 20):
+        play(world, 15)
+        delta = encoder.encode(world)
+        full = encode(world, exact = True, state = True)
+        rebuilt = apply_delta(base, delta)
+        assert rebuilt == full
+        base = Snapshot(rebuilt)
+    assert encoder.deltas == 20
+    return
+
+def test_fixed_point_deltas_stay_within_tolerance():
+    world = new_world()
+    encoder = SnapshotEncoder()
+    base = Snapshot(encoder.encode(world))
+    for k in range(0, 30):
+        play(world, 10)
+        rebuilt = Snapshot(apply_delta(base, encoder.encode(world)))
+        full = Snapshot(encode(world))
+        assert (rebuilt.ticks, rebuilt.score, rebuilt.lives, rebuilt.time) == (full.ticks, full.score, full.lives, full.time)
+        for name, fields in GROUPS:
+            assert rebuilt.count(name) == full.count(name)
+            for field, kind in fields:
+                # (the error does not add up from one delta to the next)
+                tolerance = TOLERANCE.get(kind, 0)
+                for a, b in zip(rebuilt.column(name, field), full.column(name, field)):
+                    assert fixed_error(kind, a, b) <= tolerance, (name, field)
+        base = rebuilt
+    return
+
+def test_delta_does_not_apply_to_another_base():
+    world = new_world()
+    encoder = SnapshotEncoder()
+    first = Snapshot(encoder.encode(world))
+    play(world, 10)
+    second = Snapshot(apply_delta(first, encoder.encode(world)))
+    play(world, 10)
+    delta = encoder.encode(world)
+    with pytest.raises(ValueError):
+        apply_delta(first, delta)
+    assert Snapshot(apply_delta(second, delta)).ticks == world.ticks
+    return
@@ -0,0 +1,109 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the placement of the new rocks            #
+# ---------------------------------------------------------------- #
+"""
+
+free_intervals(), is_free() and pick_point() (engine/spawn.py), on the
+whole world and on frames of it, against a check of each point of the
+edges and against rejection sampling (drawing points until one is free).
+
+"""
+##################################################################
+
+import collections
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+from engine import spawn
+from engine.spawn import EDGES, edge_length, edge_point, free_intervals, is_free, pick_point
+from engine.world import torus_dist_squared
+
+WIDTH = 200
+HEIGHT = 150
+
+##################################################################
+
+def point_is_free(point, obstacles):
+    for positions, distance in obstacles:
+        for pos in positions:
+            if torus_dist_squared(point, pos, WIDTH, HEIGHT) <= distance * distance:
+                return False
+    return True
+
+def random_obstacles(rnd, n):
+    return [([(rnd.uniform(0, WIDTH), rnd.uniform(0, HEIGHT)) for i in range(0, n)], rnd.uniform(5, 30)),
+            ([(rnd.uniform(0, WIDTH), rnd.uniform(0, HEIGHT))], rnd.uniform(20, 60))]
+
+def free_points(edge, intervals, frame):
+    return set(edge_point(edge, k, frame, WIDTH, HEIGHT) for first, last in intervals for k in range(first, last + 1))
+
+def place(point, frame):
+    # edges of 'frame' the point is on (two for a corner), and half of the frame it is in
+    x, y = point[0] - frame[0], point[1] - frame[1]
+    on = (x == 0, x == frame[2] - 1, y == 0, y == frame[3] - 1)
+    return on + (2 * x < frame[2], 2 * y < frame[3])
+
+def rejection_sampling(edges, obstacles, rnd, frame):
+    # draw an edge, then a point of the edge, until the point is free (None after many tries)
+    for attempt in range(0, 100000):
+        edge = edges[rnd.randrange(len(edges))]
+        point = edge_point(edge, rnd.randrange(edge_length(edge, frame)), frame, WIDTH, HEIGHT)
+        if point_is_free(point, obstacles):
+            return point
+    return None
+
+##################################################################
+
+@pytest.mark.parametrize("frame", [None, (30, 20, 120, 90), (150, 100, 120, 90)])
+def test_free_intervals_match_point_check(frame):
+    rnd = random.Random(5)
+    for k in range(0, 20):
+        obstacles = random_obstacles(rnd, 6)
+        view = frame or (0, 0, WIDTH, HEIGHT)
+        for edge in EDGES:
+            intervals = free_intervals(edge, obstacles, WIDTH, HEIGHT, frame)
+            # sorted, disjoint intervals within the edge
+            for i in range(0, len(intervals)):
+                first, last = intervals[i]
+                assert 0 <= first <= last < edge_length(edge, view)
+                if i > 0:
+                    assert first > intervals[i - 1][1] + 1
+            points = [edge_point(edge, j, view, WIDTH, HEIGHT) for j in range(0, edge_length(edge, view))]
+            free = set(p for p in points if point_is_free(p, obstacles))
+            assert free_points(edge, intervals, view) == free
+            # the check of the cheap path
+            assert set(p for p in points if is_free(p, obstacles, WIDTH, HEIGHT)) == free
+    return
+
+def test_full_edges_have_no_point():
+    obstacles = [([(WIDTH / 2.0, HEIGHT / 2.0)], WIDTH + HEIGHT)]
+    for edge in EDGES:
+        assert free_intervals(edge, obstacles, WIDTH, HEIGHT) == []
+    assert pick_point(list(EDGES), obstacles, random.Random(0), WIDTH, HEIGHT) is None
+    return
+
+@pytest.mark.parametrize("sample_tries", [0, spawn.SAMPLE_TRIES])
+def test_pick_point_matches_rejection_sampling(monkeypatch, sample_tries):
+    # the frequencies of the edges (and of the halves of the edges) of the points drawn are the same,
+    # with or without the random points tried first
+    monkeypatch.setattr(spawn, "SAMPLE_TRIES", sample_tries)
+    rnd = random.Random(6)
+    obstacles = random_obstacles(rnd, 8)
+    frame = (30, 20, 120, 90)
+    edges = ["left", "right", "top", "bottom"]
+    draws = 20000
+    picked = collections.Counter()
+    sampled = collections.Counter()
+    for i in range(0, draws):
+        point = pick_point(edges, obstacles, rnd, WIDTH, HEIGHT, frame)
+        assert point is not None and point_is_free(point, obstacles)
+        picked[place(point, frame)] += 1
+        sampled[place(rejection_sampling(edges, obstacles, rnd, frame), frame)] += 1
+    for key in set(picked) | set(sampled):
+        assert abs(picked[key] - sampled[key]) / float(draws) < 0.02
+    return
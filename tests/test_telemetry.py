@@ -0,0 +1,89 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the telemetry ring                        #
+# ---------------------------------------------------------------- #
+"""
+
+The ring of engine/telemetry.py: once more records than its capacity
+have been written, the reader gets exactly the last ones, oldest first.
+The records hold the increase of the totals of each tick.
+
+"""
+##################################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.telemetry import Telemetry, TelemetryReader, FIELDS
+from engine.world import World
+
+##################################################################
+
+def write(path, ticks, capacity = 8):
+    # write the records of 'ticks' ticks of a seeded game in a ring of 'capacity' records
+    world = World(seed = 3)
+    world.sounds = None
+    world.telemetry = Telemetry(path, capacity)
+    for t in range(0, ticks):
+        world.key_input("space", 1)
+        world.tick()
+    world.telemetry.close()
+    return world
+
+def read(path, last = None):
+    reader = TelemetryReader(path)
+    records = reader.records(last)
+    count = reader.count()
+    reader.close()
+    return records, count
+
+def field(records, name):
+    return [record[FIELDS.index(name)] for record in records]
+
+##################################################################
+
+def test_ring_keeps_the_last_records(tmp_path):
+    path = str(tmp_path / "telemetry.ring")
+    write(path, 21)
+    records, count = read(path)
+    assert count == 21
+    assert field(records, "tick") == list(range(14, 22))
+    # the last ones only
+    records, count = read(path, 3)
+    assert field(records, "tick") == [19, 20, 21]
+    return
+
+def test_ring_not_full(tmp_path):
+    path = str(tmp_path / "telemetry.ring")
+    world = write(path, 5)
+    records, count = read(path)
+    assert count == 5
+    assert field(records, "tick") == [1, 2, 3, 4, 5]
+    assert field(records, "missiles")[-1] == len(world.missile_group)
+    return
+
+def test_ring_goes_on_or_is_replaced(tmp_path):
+    path = str(tmp_path / "telemetry.ring")
+    write(path, 6)
+    # same capacity: the records go on
+    write(path, 6)
+    records, count = read(path)
+    assert count == 12
+    assert field(records, "tick") == [5, 6, 1, 2, 3, 4, 5, 6]
+    # another capacity: a new ring
+    write(path, 6, capacity = 16)
+    records, count = read(path)
+    assert count == 6
+    assert field(records, "tick") == [1, 2, 3, 4, 5, 6]
+    return
+
+def test_records_hold_the_increase_of_each_tick(tmp_path):
+    path = str(tmp_path / "telemetry.ring")
+    world = write(path, 600, capacity = 1024)
+    records, count = read(path)
+    assert count == 600
+    assert world.rock_hits > 0
+    assert sum(field(records, "rock_hits")) == world.rock_hits
+    assert sum(field(records, "ship_crashes")) == world.ship_crashes
+    return
@@ -0,0 +1,80 @@
+# ---------------------------------------------------------------- #
+#   Asteroids - tests of the deterministic world                   #
+# ---------------------------------------------------------------- #
+"""
+
+A World played with the same seed and the same inputs gives exactly the
+same game (the same World.save_state), and advance() (wall-clock time)
+runs the same fixed ticks as calling tick() directly.
+
+"""
+##################################################################
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine.world import World, TICK_RATE, MAX_TICKS_PER_ADVANCE
+
+##################################################################
+
+def control(world, t):
+    # scripted inputs of tick 't'
+    if t % 5 == 0:
+        world.key_input("space", 1)
+    if t % 97 == 0:
+        world.key_input("left", t % 2)
+    if t % 300 == 0:
+        world.key_input("up", (t // 300) % 2)
+    return
+
+def play(seed, ticks):
+    world = World(seed = seed)
+    for t in range(0, ticks):
+        control(world, t)
+        world.tick()
+    return world
+
+##################################################################
+
+def test_same_seed_same_game():
+    for seed in (0, 7, 42):
+        assert play(seed, 2000).save_state() == play(seed, 2000).save_state()
+    assert play(0, 2000).save_state() != play(1, 2000).save_state()
+    return
+
+def test_advance_runs_the_ticks():
+    rnd = random.Random(5)
+    advanced = World(seed = 3)
+    ticked = World(seed = 3)
+    elapsed = 0.0
+    for frame in range(0, 1500):
+        # wall-clock time between two frames (never more than MAX_TICKS_PER_ADVANCE ticks)
+        dt = rnd.uniform(0.0, (MAX_TICKS_PER_ADVANCE - 0.5) / TICK_RATE)
+        elapsed += dt
+        control(advanced, advanced.ticks)
+        control(ticked, ticked.ticks)
+        ticks = advanced.advance(dt)
+        for i in range(0, ticks):
+            ticked.tick()
+        if advanced.is_over():
+            break
+        # the ticks run are the ones due after 'elapsed' seconds (the remainder is kept)
+        assert abs(advanced.ticks + advanced.accumulator * TICK_RATE - elapsed * TICK_RATE) < 1e-6
+        assert advanced.accumulator < 1.0 / TICK_RATE
+    assert advanced.ticks > 1000
+    # (the accumulator aside: the ticked world never accumulates time)
+    state = advanced.save_state()
+    state["accumulator"] = 0.0
+    assert state == ticked.save_state()
+    return
+
+def test_advance_drops_the_time_it_cannot_catch_up():
+    world = World(seed = 0)
+    assert world.advance(10.0) == MAX_TICKS_PER_ADVANCE
+    assert world.accumulator == 0.0
+    assert world.advance(0.5 / TICK_RATE) == 0
+    assert world.advance(0.5 / TICK_RATE) == 1
+    return